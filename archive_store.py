@@ -0,0 +1,282 @@
+import logging
+import os
+import threading
+import urllib.parse
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from storage import SQLiteStorage, TIME_SERIES_TABLES, now_ns
+
+NS_PER_DAY = 86400 * 1_000_000_000
+
+# Columns archived for each table, in storage column order.
+ARCHIVE_COLUMNS: Dict[str, Sequence[str]] = {
+    "price_data": ("symbol", "ts", "price"),
+    "market_data": ("symbol", "ts", "exchange", "price", "volume"),
+}
+
+
+def day_start_ns(ts: int) -> int:
+    """Returns the UTC midnight at or before an epoch-nanosecond timestamp."""
+    return ts - ts % NS_PER_DAY
+
+
+class ParquetArchive:
+    """Cold storage tier for price history.
+
+    Closed UTC days are moved out of the SQLite tables into Parquet files
+    partitioned by symbol and date:
+
+        <archive_dir>/<table>/symbol=<symbol>/date=<YYYY-MM-DD>/part-<first_ts>-<last_ts>.parquet
+
+    `read` unions the cold Parquet history with the hot SQLite tail, so
+    callers do not need to know where the rows live.
+    """
+
+    def __init__(self, storage: SQLiteStorage, archive_dir: str):
+        self.storage = storage
+        self.archive_dir = archive_dir
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _symbol_dir(self, table: str, symbol: str) -> str:
+        return os.path.join(self.archive_dir, table, "symbol=" + urllib.parse.quote(symbol, safe=""))
+
+    def roll_off(self, table: str, before_ns: Optional[int] = None) -> Dict[str, int]:
+        """Moves rows older than a cutoff from SQLite into Parquet.
+
+        Each symbol-day is archived in its own write transaction: its rows
+        are read, written to a temporary file that is renamed into place, and
+        deleted before the commit. Writers wait for that one day, and a row
+        inserted concurrently is either archived with it or left in SQLite.
+        File names are derived from the rows they hold, so a roll-off
+        interrupted before the commit rewrites the same file on the next run.
+
+        Args:
+            table (str): One of `TIME_SERIES_TABLES`.
+            before_ns (int, optional): Exclusive cutoff in epoch nanoseconds.
+                Defaults to the start of the current UTC day.
+
+        Returns:
+            Dict[str, int]: Rows archived per symbol.
+        """
+        if table not in TIME_SERIES_TABLES:
+            raise ValueError(f"Not a time-series table: {table}")
+        cutoff = before_ns if before_ns is not None else day_start_ns(now_ns())
+        columns = ARCHIVE_COLUMNS[table]
+        symbols = [row[0] for row in self.storage.query(
+            f"SELECT DISTINCT symbol FROM {table} WHERE ts < ?", (cutoff,))]
+
+        archived = {}
+        for symbol in symbols:
+            days = [row[0] for row in self.storage.query(
+                f"SELECT DISTINCT ts / {NS_PER_DAY} FROM {table} WHERE symbol = ? AND ts < ? ORDER BY 1",
+                (symbol, cutoff))]
+            count = 0
+            for day in days:
+                start, end = day * NS_PER_DAY, min((day + 1) * NS_PER_DAY, cutoff)
+                with self.storage.write_transaction() as connection:
+                    rows = self.storage.fetch_range(table, symbol, start, end, columns)
+                    if not rows:
+                        continue
+                    self._write_part(table, symbol, start, pd.DataFrame(rows, columns=list(columns)))
+                    connection.execute(f"DELETE FROM {table} WHERE symbol = ? AND ts >= ? AND ts < ?",
+                                       (symbol, start, end))
+                count += len(rows)
+            if count:
+                archived[symbol] = count
+                logging.info(f"Archived {count} {table} rows for {symbol}.")
+        return archived
+
+    def _write_part(self, table: str, symbol: str, day_ns: int, part: pd.DataFrame) -> str:
+        date = datetime.fromtimestamp(day_ns / 1e9, tz=timezone.utc).strftime("%Y-%m-%d")
+        directory = os.path.join(self._symbol_dir(table, symbol), "date=" + date)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"part-{part['ts'].iloc[0]}-{part['ts'].iloc[-1]}.parquet")
+        tmp_path = path + ".tmp"
+        arrow_table = pa.Table.from_pandas(part.drop(columns=["symbol"]), preserve_index=False)
+        pq.write_table(arrow_table, tmp_path, compression="zstd")
+        os.replace(tmp_path, path)
+        return path
+
+    def _partition_files(self, table: str, symbol: str, start_ns: Optional[int], end_ns: Optional[int]) -> List[str]:
+        symbol_dir = self._symbol_dir(table, symbol)
+        if not os.path.isdir(symbol_dir):
+            return []
+        first_day = day_start_ns(start_ns) if start_ns is not None else None
+        files = []
+        for entry in sorted(os.listdir(symbol_dir)):
+            if not entry.startswith("date="):
+                continue
+            day = datetime.strptime(entry[5:], "%Y-%m-%d").replace(tzinfo=timezone.utc)
+            day_ns = int(day.timestamp()) * 1_000_000_000
+            # Partition pruning: skip days entirely outside [start_ns, end_ns).
+            if first_day is not None and day_ns < first_day:
+                continue
+            if end_ns is not None and day_ns >= end_ns:
+                continue
+            directory = os.path.join(symbol_dir, entry)
+            files.extend(os.path.join(directory, name) for name in sorted(os.listdir(directory))
+                         if name.endswith(".parquet"))
+        return files
+
+    def read(self, table: str, symbol: str, start_ns: Optional[int] = None, end_ns: Optional[int] = None,
+             columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """Reads a symbol's history across the Parquet and SQLite tiers.
+
+        A row found in both tiers, left by a roll-off that stopped after the
+        Parquet write, is returned once, from SQLite.
+
+        Args:
+            table (str): One of `TIME_SERIES_TABLES`.
+            symbol (str): Trading symbol.
+            start_ns (int, optional): Inclusive lower bound in epoch nanoseconds.
+            end_ns (int, optional): Exclusive upper bound in epoch nanoseconds.
+            columns (Sequence[str], optional): Columns to load besides `ts`.
+                Defaults to every archived column.
+
+        Returns:
+            pd.DataFrame: Rows ordered by `ts`.
+        """
+        if table not in TIME_SERIES_TABLES:
+            raise ValueError(f"Not a time-series table: {table}")
+        all_columns = [c for c in ARCHIVE_COLUMNS[table] if c != "symbol"]
+        wanted = ["ts"] + [c for c in (columns or all_columns) if c != "ts"]
+
+        filters = []
+        if start_ns is not None:
+            filters.append(("ts", ">=", start_ns))
+        if end_ns is not None:
+            filters.append(("ts", "<", end_ns))
+        frames = []
+        files = self._partition_files(table, symbol, start_ns, end_ns)
+        if files:
+            cold = pq.ParquetDataset(files, filters=filters or None).read(columns=wanted)
+            frames.append(cold.to_pandas())
+
+        hot = self.storage.fetch_range(table, symbol, start_ns, end_ns, wanted)
+        if hot:
+            frames.append(pd.DataFrame(hot, columns=wanted))
+        if not frames:
+            return pd.DataFrame(columns=wanted)
+        data = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+        data = data.drop_duplicates("ts", keep="last")  # ts is unique per symbol; the hot tier comes last
+        return data.sort_values("ts", kind="stable", ignore_index=True)
+
+    def start(self, tables: Sequence[str] = TIME_SERIES_TABLES, interval_seconds: float = 3600.0) -> None:
+        """Starts a background thread that rolls off closed days periodically.
+
+        Args:
+            tables (Sequence[str]): Tables to archive.
+            interval_seconds (float): Seconds between roll-off passes.
+        """
+        if self._thread is not None:
+            return
+        self._stop.clear()
+
+        def run():
+            while not self._stop.is_set():
+                for table in tables:
+                    try:
+                        self.roll_off(table)
+                    except Exception as e:
+                        logging.error(f"Error archiving {table}: {e}")
+                self._stop.wait(interval_seconds)
+            self.storage.release()
+
+        self._thread = threading.Thread(target=run, name="parquet-archive", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stops the periodic roll-off thread."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+
+# Unit tests
+def _seed(storage: SQLiteStorage, symbol: str, first_ns: int, count: int, step_ns: int) -> None:
+    storage.save_many("market_data", [(symbol, first_ns + i * step_ns, "test_exchange", float(i), 1.0)
+                                      for i in range(count)])
+
+
+def test_roll_off_and_read(tmp_path):
+    """Test that closed days move to Parquet and reads span both tiers."""
+    storage = SQLiteStorage(str(tmp_path / "market_data.db"))
+    storage.initialize(["market_data"])
+    day0 = 1735689600 * 1_000_000_000  # 2025-01-01T00:00:00Z
+    step = 6 * 3600 * 1_000_000_000
+    _seed(storage, "BTC/USD", day0, 12, step)  # Three days, four ticks each
+    _seed(storage, "ETH/USD", day0, 4, step)
+
+    archive = ParquetArchive(storage, str(tmp_path / "archive"))
+    archived = archive.roll_off("market_data", before_ns=day0 + 2 * NS_PER_DAY)
+    assert archived == {"BTC/USD": 8, "ETH/USD": 4}, "Unexpected roll-off counts."
+    assert storage.query_one("SELECT COUNT(*) FROM market_data") == (4,), "Archived rows left in SQLite."
+    assert os.path.isdir(tmp_path / "archive" / "market_data" / "symbol=BTC%2FUSD" / "date=2025-01-02"), \
+        "Partition directory missing."
+
+    history = archive.read("market_data", "BTC/USD")
+    assert history["price"].tolist() == [float(i) for i in range(12)], "Cold and hot tiers not unioned in order."
+
+    window = archive.read("market_data", "BTC/USD", day0 + NS_PER_DAY + step, day0 + 2 * NS_PER_DAY + step,
+                          columns=["price"])
+    assert list(window.columns) == ["ts", "price"], "Column pruning not applied."
+    assert window["price"].tolist() == [5.0, 6.0, 7.0, 8.0], "Range filter not applied."
+    storage.close()
+
+
+def test_roll_off_is_idempotent(tmp_path):
+    """Test that re-archiving the same rows rewrites the same file."""
+    storage = SQLiteStorage(str(tmp_path / "market_data.db"))
+    storage.initialize(["market_data"])
+    day0 = 1735689600 * 1_000_000_000
+    _seed(storage, "BTC/USD", day0, 3, 1_000_000_000)
+    archive = ParquetArchive(storage, str(tmp_path / "archive"))
+    archive.roll_off("market_data", before_ns=day0 + NS_PER_DAY)
+    _seed(storage, "BTC/USD", day0, 3, 1_000_000_000)  # Simulate a crash before the delete
+    assert len(archive.read("market_data", "BTC/USD")) == 3, "Rows in both tiers read twice."
+    archive.roll_off("market_data", before_ns=day0 + NS_PER_DAY)
+    assert len(archive.read("market_data", "BTC/USD")) == 3, "Rows duplicated by a repeated roll-off."
+    storage.close()
+
+
+def test_roll_off_keeps_concurrent_inserts(tmp_path):
+    """Test that a row inserted while a day is being archived is not deleted unarchived."""
+    storage = SQLiteStorage(str(tmp_path / "market_data.db"))
+    storage.initialize(["market_data"])
+    day0 = 1735689600 * 1_000_000_000
+    _seed(storage, "BTC/USD", day0, 3, 1_000_000_000)
+    archive = ParquetArchive(storage, str(tmp_path / "archive"))
+    write_part = archive._write_part
+    writers = []
+
+    def write_part_with_late_row(*args):
+        writer = threading.Thread(target=lambda: (_seed(storage, "BTC/USD", day0 + 500_000_000, 1, 1),
+                                                  storage.release()))
+        writer.start()  # Blocks until the roll-off transaction commits
+        writers.append(writer)
+        return write_part(*args)
+
+    archive._write_part = write_part_with_late_row
+    assert archive.roll_off("market_data", before_ns=day0 + NS_PER_DAY) == {"BTC/USD": 3}
+    for writer in writers:
+        writer.join()
+    assert storage.query_one("SELECT COUNT(*) FROM market_data") == (1,), "Late row deleted unarchived."
+    assert len(archive.read("market_data", "BTC/USD")) == 4, "Late row not readable."
+    storage.close()
+
+
+if __name__ == "__main__":
+    import tempfile
+    import pathlib
+    for test in (test_roll_off_and_read, test_roll_off_is_idempotent, test_roll_off_keeps_concurrent_inserts):
+        with tempfile.TemporaryDirectory() as directory:
+            test(pathlib.Path(directory))
+    print("All tests passed.")
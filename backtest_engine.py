@@ -1,184 +1,197 @@
-import time  
-import logging  
-import sqlite3  
-from datetime import datetime, timedelta  
-import requests  
-import pandas as pd  
-import numpy as np  
+import time
+import logging
+import sqlite3
+from datetime import datetime, timedelta
+import pandas as pd
+import numpy as np
 import unittest
-
-\# Configure logging  
-logging.basicConfig(level=logging.INFO, format='%(asctime)s \- %(levelname)s \- %(message)s')
-
-\# Constants  
-API\_URL \= "https://api.binance.com/api/v3/ticker/price"  
-SYMBOL \= "BTCUSDT"  
-DB\_NAME \= "crypto\_prices.db"  
-RATE\_LIMIT \= 60  \# API requests per minute  
-RISK\_PERCENTAGE \= 1  \# Percentage of account balance to risk per trade  
-ACCOUNT\_BALANCE \= 10000  \# Example account balance in USD
-
-\# Database setup  
-def initialize\_database():  
-    """Create the database and tables if not already present."""  
-    conn \= sqlite3.connect(DB\_NAME)  
-    cursor \= conn.cursor()  
-    \# Table for price data  
-    cursor.execute("""  
-        CREATE TABLE IF NOT EXISTS price\_data (  
-            id INTEGER PRIMARY KEY AUTOINCREMENT,  
-            timestamp TEXT NOT NULL,  
-            price REAL NOT NULL  
-        )  
-    """)  
-    \# Table for trading signals  
-    cursor.execute("""  
-        CREATE TABLE IF NOT EXISTS trading\_signals (  
-            id INTEGER PRIMARY KEY AUTOINCREMENT,  
-            timestamp TEXT NOT NULL,  
-            signal TEXT NOT NULL  
-        )  
-    """)  
-    \# Table for positions  
-    cursor.execute("""  
-        CREATE TABLE IF NOT EXISTS positions (  
-            id INTEGER PRIMARY KEY AUTOINCREMENT,  
-            timestamp TEXT NOT NULL,  
-            symbol TEXT NOT NULL,  
-            entry\_price REAL NOT NULL,  
-            position\_size REAL NOT NULL,  
-            stop\_loss REAL NOT NULL,  
-            status TEXT NOT NULL  
-        )  
-    """)  
-    conn.commit()  
-    conn.close()
-
-\# Fetch price data  
-def fetch\_price():  
-    """Fetch the current price of BTC/USDT from Binance."""  
-    try:  
-        response \= requests.get(API\_URL, params={"symbol": SYMBOL})  
-        response.raise\_for\_status()  
-        data \= response.json()  
-        price \= float(data\["price"\])  
-        return price  
-    except requests.exceptions.RequestException as e:  
-        logging.error(f"Error fetching price data: {e}")  
-        return None
-
-\# Save to database  
-def save\_to\_database(table, data):  
-    """Save data to the specified table in the local database."""  
-    try:  
-        conn \= sqlite3.connect(DB\_NAME)  
-        cursor \= conn.cursor()  
-        if table \== "price\_data":  
-            cursor.execute("INSERT INTO price\_data (timestamp, price) VALUES (?, ?)", data)  
-        elif table \== "trading\_signals":  
-            cursor.execute("INSERT INTO trading\_signals (timestamp, signal) VALUES (?, ?)", data)  
-        elif table \== "positions":  
-            cursor.execute("INSERT INTO positions (timestamp, symbol, entry\_price, position\_size, stop\_loss, status) VALUES (?, ?, ?, ?, ?, ?)", data)  
-        conn.commit()  
-    except sqlite3.Error as e:  
-        logging.error(f"Error saving data to database: {e}")  
-    finally:  
-        conn.close()
-
-\# Calculate moving averages  
-def calculate\_moving\_averages():  
-    """Calculate 20-day and 50-day moving averages from the database."""  
-    try:  
-        conn \= sqlite3.connect(DB\_NAME)  
-        cursor \= conn.cursor()  
-        cursor.execute("SELECT timestamp, price FROM price\_data ORDER BY timestamp DESC LIMIT 50")  
-        rows \= cursor.fetchall()  
-        conn.close()  
-        if len(rows) \< 50:  
-            logging.warning("Not enough data for calculating moving averages.")  
+from price_client import get_client
+from storage import get_storage
+from indicator_cache import rolling_mean
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Constants
+API_URL = "https://api.binance.com/api/v3/ticker/price"
+SYMBOL = "BTCUSDT"
+DB_NAME = "crypto_prices.db"
+RATE_LIMIT = 60  # API requests per minute
+RISK_PERCENTAGE = 1  # Percentage of account balance to risk per trade
+ACCOUNT_BALANCE = 10000  # Example account balance in USD
+
+# Database setup
+def initialize_database():
+    """Create the database and tables if not already present."""
+    get_storage(DB_NAME).initialize(["price_data", "trading_signals", "positions"])
+
+# Fetch price data
+def fetch_price():
+    """Fetch the current price of BTC/USDT from Binance."""
+    return get_client(API_URL).get_price(SYMBOL)
+
+# Save to database
+def save_to_database(table, data):
+    """Save data to the specified table in the local database."""
+    try:
+        get_storage(DB_NAME).save(table, data)
+    except sqlite3.Error as e:
+        logging.error(f"Error saving data to database: {e}")
+
+# Calculate moving averages
+def calculate_moving_averages():
+    """Calculate 20-day and 50-day moving averages from the database."""
+    try:
+        rows = get_storage(DB_NAME).fetch_latest("price_data", SYMBOL, 50)
+        if len(rows) < 50:
+            logging.warning("Not enough data for calculating moving averages.")
             return None, None
 
-        \# Convert to DataFrame for calculation  
-        df \= pd.DataFrame(rows, columns=\["timestamp", "price"\])  
-        df\["price"\] \= df\["price"\].astype(float)  
-        df\["20\_MA"\] \= df\["price"\].rolling(window=20).mean()  
-        df\["50\_MA"\] \= df\["price"\].rolling(window=50).mean()
+        # Convert to DataFrame for calculation, oldest tick first
+        df = pd.DataFrame(rows[::-1], columns=["ts", "price"])
+        df["price"] = df["price"].astype(float)
+        df["20_MA"] = df["price"].rolling(window=20).mean()
+        df["50_MA"] = df["price"].rolling(window=50).mean()
 
-        return df.iloc\[-1\]\["20\_MA"\], df.iloc\[-1\]\["50\_MA"\]  
-    except sqlite3.Error as e:  
-        logging.error(f"Error reading data from database: {e}")  
+        return df.iloc[-1]["20_MA"], df.iloc[-1]["50_MA"]
+    except sqlite3.Error as e:
+        logging.error(f"Error reading data from database: {e}")
         return None, None
 
-\# Backtesting module  
-def backtest\_strategy(historical\_data):  
-    """Backtest the SMA crossover strategy on historical data."""  
-    historical\_data\["20\_MA"\] \= historical\_data\["price"\].rolling(window=20).mean()  
-    historical\_data\["50\_MA"\] \= historical\_data\["price"\].rolling(window=50).mean()  
-    historical\_data\["signal"\] \= 0  
-    historical\_data.loc\[historical\_data\["20\_MA"\] \> historical\_data\["50\_MA"\], "signal"\] \= 1  
-    historical\_data.loc\[historical\_data\["20\_MA"\] \< historical\_data\["50\_MA"\], "signal"\] \= \-1
-
-    \# Simulate trades  
-    positions \= \[\]  
-    for i in range(1, len(historical\_data)):  
-        if historical\_data.iloc\[i \- 1\]\["signal"\] \!= historical\_data.iloc\[i\]\["signal"\]:  
-            positions.append({  
-                "timestamp": historical\_data.index\[i\],  
-                "price": historical\_data.iloc\[i\]\["price"\],  
-                "signal": historical\_data.iloc\[i\]\["signal"\]  
-            })
-
-    return positions
-
-def calculate\_performance\_metrics(trades, initial\_balance):  
-    """Calculate strategy performance metrics."""  
-    portfolio \= initial\_balance  
-    portfolio\_values \= \[\]  
-    for trade in trades:  
-        if trade\["signal"\] \== 1:  
-            portfolio \+= portfolio \* 0.01  \# Simulate 1% profit per trade  
-        elif trade\["signal"\] \== \-1:  
-            portfolio \-= portfolio \* 0.005  \# Simulate 0.5% loss per trade  
-        portfolio\_values.append(portfolio)
-
-    returns \= np.diff(portfolio\_values) / portfolio\_values\[:-1\]  
-    sharpe\_ratio \= np.mean(returns) / np.std(returns)  
-    max\_drawdown \= np.min(portfolio\_values) / np.max(portfolio\_values) \- 1  
-    win\_rate \= sum(\[1 for trade in trades if trade\["signal"\] \== 1\]) / len(trades)
-
-    return {  
-        "Sharpe Ratio": sharpe\_ratio,  
-        "Maximum Drawdown": max\_drawdown,  
-        "Win Rate": win\_rate  
+# Backtesting module
+def trade_dtype(timestamp_dtype):
+    """Structured dtype of extracted trades for a given timestamp dtype."""
+    return np.dtype([("timestamp", timestamp_dtype), ("position", np.int64), ("price", np.float64), ("signal", np.int8)])
+
+def extract_trades(signals, prices, timestamps):
+    """Find every signal change and return it as a structured array of trades.
+
+    Args:
+        signals (np.ndarray): Signal per bar (1 long, -1 short, 0 flat).
+        prices (np.ndarray): Price per bar.
+        timestamps (np.ndarray): Timestamp per bar.
+
+    Returns:
+        np.ndarray: Trades with timestamp, bar position, price and new signal, in order.
+    """
+    signals = np.asarray(signals)
+    timestamps = np.asarray(timestamps)
+    changes = np.flatnonzero(signals[1:] != signals[:-1]) + 1
+    trades = np.empty(len(changes), dtype=trade_dtype(timestamps.dtype))
+    trades["timestamp"] = timestamps[changes]
+    trades["position"] = changes
+    trades["price"] = np.asarray(prices, dtype=np.float64)[changes]
+    trades["signal"] = signals[changes]
+    return trades
+
+def backtest_strategy(historical_data):
+    """Backtest the SMA crossover strategy on historical data.
+
+    Adds "20_MA", "50_MA" and "signal" columns to `historical_data`.
+
+    Returns:
+        np.ndarray: Structured array of trades (see `extract_trades`), one per
+            signal change; fields are read as `trades["price"]`, `trades["signal"]`.
+            It replaces the list of {"timestamp", "price", "signal"} dicts
+            returned before; iterating it still yields records indexable by field name.
+    """
+    prices = historical_data["price"].to_numpy(dtype=np.float64)
+    short_ma = rolling_mean(prices, 20)
+    long_ma = rolling_mean(prices, 50)
+    historical_data["20_MA"] = short_ma
+    historical_data["50_MA"] = long_ma
+    signals = np.where(short_ma > long_ma, 1, np.where(short_ma < long_ma, -1, 0)).astype(np.int8)
+    historical_data["signal"] = signals
+
+    # Simulate trades
+    return extract_trades(signals, prices, historical_data.index.to_numpy())
+
+def calculate_performance_metrics(trades, initial_balance, mark_price=None):
+    """Calculate strategy performance metrics.
+
+    Each trade switches the whole balance into its signal's position (1 long,
+    -1 short, 0 flat) at the trade price, and the position is closed at the
+    next trade's price. The last position is only counted when `mark_price`
+    is given.
+
+    Args:
+        trades (np.ndarray): Structured array with "price" and "signal"
+            fields, from `backtest_strategy` or `extract_trades`.
+        initial_balance (float): Starting balance.
+        mark_price (float, optional): Price at which to close the last position.
+
+    Returns:
+        dict: Sharpe ratio (per trade), maximum drawdown, win rate and total return.
+    """
+    prices = trades["price"].astype(np.float64, copy=False)
+    signals = trades["signal"].astype(np.float64)
+    exits = prices[1:]
+    if mark_price is not None and len(prices):
+        exits = np.append(exits, mark_price)
+    entries = prices[:len(exits)]
+    sides = signals[:len(exits)]
+
+    returns = sides * (exits / entries - 1)
+    portfolio_values = initial_balance * np.cumprod(np.concatenate(([1.0], 1 + returns)))
+    std = np.std(returns) if len(returns) else 0.0
+    sharpe_ratio = np.mean(returns) / std if std > 0 else 0.0
+    max_drawdown = np.min(portfolio_values / np.maximum.accumulate(portfolio_values)) - 1
+    held = returns[sides != 0]
+    win_rate = np.count_nonzero(held > 0) / len(held) if len(held) else 0.0
+
+    return {
+        "Sharpe Ratio": sharpe_ratio,
+        "Maximum Drawdown": max_drawdown,
+        "Win Rate": win_rate,
+        "Total Return": portfolio_values[-1] / initial_balance - 1
     }
 
-def generate\_performance\_report(metrics):  
-    """Generate a performance report."""  
-    logging.info("Performance Report:")  
-    for key, value in metrics.items():  
+def generate_performance_report(metrics):
+    """Generate a performance report."""
+    logging.info("Performance Report:")
+    for key, value in metrics.items():
         logging.info(f"{key}: {value:.2f}")
 
-\# Unit tests  
-class TestBacktesting(unittest.TestCase):  
-    def setUp(self):  
-        """Set up mock historical data for testing."""  
-        dates \= pd.date\_range(start="2023-01-01", periods=100)  
-        prices \= \[100 \+ i \* 0.5 for i in range(100)\]  
-        self.historical\_data \= pd.DataFrame({"price": prices}, index=dates)
-
-    def test\_backtest\_strategy(self):  
-        """Test the backtesting logic."""  
-        trades \= backtest\_strategy(self.historical\_data)  
-        self.assertGreater(len(trades), 0\)
-
-    def test\_calculate\_performance\_metrics(self):  
-        """Test the performance metrics calculation."""  
-        trades \= backtest\_strategy(self.historical\_data)  
-        metrics \= calculate\_performance\_metrics(trades, 10000\)  
-        self.assertIn("Sharpe Ratio", metrics)  
-        self.assertIn("Maximum Drawdown", metrics)  
+# Unit tests
+class TestBacktesting(unittest.TestCase):
+    def setUp(self):
+        """Set up mock historical data for testing."""
+        dates = pd.date_range(start="2023-01-01", periods=100)
+        prices = [100 + i * 0.5 for i in range(100)]
+        self.historical_data = pd.DataFrame({"price": prices}, index=dates)
+
+    def test_backtest_strategy(self):
+        """Test the backtesting logic."""
+        trades = backtest_strategy(self.historical_data)
+        self.assertGreater(len(trades), 0)
+
+    def test_calculate_performance_metrics(self):
+        """Test the performance metrics calculation."""
+        trades = backtest_strategy(self.historical_data)
+        metrics = calculate_performance_metrics(trades, 10000)
+        self.assertIn("Sharpe Ratio", metrics)
+        self.assertIn("Maximum Drawdown", metrics)
         self.assertIn("Win Rate", metrics)
 
-if \_\_name\_\_ \== "\_\_main\_\_":  
+    def test_trades_match_row_loop(self):
+        """Test vectorized trade extraction against the row-by-row definition."""
+        prices = 100 + 10 * np.sin(np.arange(300) / 15)
+        data = pd.DataFrame({"price": prices}, index=pd.date_range("2023-01-01", periods=300, freq="min"))
+        trades = backtest_strategy(data)
+        expected = [(data.index[i], data["price"].iloc[i], data["signal"].iloc[i])
+                    for i in range(1, len(data)) if data["signal"].iloc[i - 1] != data["signal"].iloc[i]]
+        self.assertEqual([(t["timestamp"], t["price"], t["signal"]) for t in trades],
+                         [(np.datetime64(ts), p, s) for ts, p, s in expected])
+
+    def test_metrics_use_trade_prices(self):
+        """Test equity from real entry and exit prices."""
+        trades = extract_trades([0, 1, -1, 0, 1], [90.0, 100.0, 110.0, 121.0, 130.0], np.arange(5))
+        metrics = calculate_performance_metrics(trades, 10000, mark_price=143.0)
+        # Long +10%, short -10%, flat, long +10%
+        self.assertAlmostEqual(metrics["Total Return"], 1.1 * 0.9 * 1.1 - 1)
+        self.assertAlmostEqual(metrics["Maximum Drawdown"], -0.1)
+        self.assertAlmostEqual(metrics["Win Rate"], 2 / 3)
+
+if __name__ == "__main__":
     unittest.main()
 
@@ -1,13 +1,18 @@
 import pandas as pd  
 import numpy as np  
-from typing import Callable, Dict, Any
+from typing import Callable, Dict, Any, Optional  
+from parallel\_backtest import ProgressCallback, grid\_search, score\_strategy  
+from search\_strategies import SearchStrategy, history\_slice  
+from walk\_forward import walk\_forward  
+from portfolio\_backtest import SharedMatrix, align\_prices, portfolio\_backtest
 
 class HistoricalDataSimulator:  
     """Implements historical data simulation for trading strategies."""
 
     def \_\_init\_\_(self, data\_path: str):  
         self.data\_path \= data\_path  
-        self.data \= None
+        self.data \= None  
+        self.portfolio \= None  \# (timestamps, symbols, SharedMatrix) from load\_portfolio
 
     def load\_data(self) \-\> pd.DataFrame:  
         """Loads historical data from the provided file path."""  
@@ -15,26 +20,177 @@ class HistoricalDataSimulator:
         self.data.sort\_values('timestamp', inplace=True)  
         return self.data
 
-    def optimize\_parameters(self, strategy\_func: Callable, param\_grid: Dict\[str, Any\]) \-\> Dict\[str, Any\]:  
+    def load\_archive(self, archive, symbol: str, start: Optional\[Any\] \= None, end: Optional\[Any\] \= None,  
+                     table: str \= "price\_data") \-\> pd.DataFrame:  
+        """Loads price history from the Parquet archive and the live SQLite tail.
+
+        Only the \`price\` column and the date partitions overlapping the  
+        window are read, instead of parsing a full CSV.
+
+        Args:  
+            archive (ParquetArchive): Archive to read from.  
+            symbol (str): Trading symbol.  
+            start (Any, optional): Inclusive start, as an ISO string, datetime or epoch seconds.  
+            end (Any, optional): Exclusive end, in the same formats as \`start\`.  
+            table (str): "price\_data" or "market\_data".
+
+        Returns:  
+            pd.DataFrame: Data with \`timestamp\` and \`close\` columns.  
+        """  
+        from storage import to\_epoch\_ns  
+        start\_ns \= to\_epoch\_ns(start) if start is not None else None  
+        end\_ns \= to\_epoch\_ns(end) if end is not None else None  
+        history \= archive.read(table, symbol, start\_ns, end\_ns, columns=\["price"\])  
+        self.data \= pd.DataFrame({  
+            'timestamp': pd.to\_datetime(history\['ts'\].astype('int64'), unit='ns'),  
+            'close': history\['price'\].astype(float),  
+        })  
+        return self.data
+
+    def load\_ticks(self, store, symbol: Optional\[str\] \= None, start: Optional\[Any\] \= None,  
+                   end: Optional\[Any\] \= None) \-\> pd.DataFrame:  
+        """Loads a time window from a memory-mapped tick store.
+
+        The window is located through the store's index and only its rows  
+        are read from disk, so the full tick file is never loaded.
+
+        Args:  
+            store (TickStoreReader): Tick store to read from.  
+            symbol (str, optional): Trading symbol. Defaults to every symbol.  
+            start (Any, optional): Inclusive start, as an ISO string, datetime or epoch seconds.  
+            end (Any, optional): Exclusive end, in the same formats as \`start\`.
+
+        Returns:  
+            pd.DataFrame: Data with \`timestamp\`, \`close\`, \`volume\` and \`symbol\` columns.  
+        """  
+        from storage import to\_epoch\_ns  
+        start\_ns \= to\_epoch\_ns(start) if start is not None else None  
+        end\_ns \= to\_epoch\_ns(end) if end is not None else None  
+        self.data \= store.to\_frame(symbol, start\_ns, end\_ns)  
+        return self.data
+
+    def optimize\_parameters(self, strategy\_func: Callable, param\_grid: Dict\[str, Any\], n\_jobs: int \= 1,  
+                            progress: Optional\[ProgressCallback\] \= None,  
+                            target: Optional\[float\] \= None,  
+                            search: Optional\[SearchStrategy\] \= None) \-\> Dict\[str, Any\]:  
         """Optimizes strategy parameters using historical data.
 
+        With \`n\_jobs\` \> 1 the grid is evaluated on a process pool that shares  
+        the data through memory-mapped files (see \`parallel\_backtest.grid\_search\`);  
+        \`strategy\_func\` must then be picklable. A \`search\` strategy from  
+        \`search\_strategies\` replaces the exhaustive grid with a budgeted,  
+        seeded and resumable search; it runs serially. Strategies that compute  
+        indicators with \`indicator\_cache.rolling\_mean\` reuse them across  
+        parameter sets, e.g. one short SMA for every long window it is paired with.
+
         Args:  
             strategy\_func (Callable): A function implementing the trading strategy.  
-            param\_grid (Dict\[str, Any\]): A dictionary of parameter names and values to test.
+            param\_grid (Dict\[str, Any\]): A dictionary of parameter names and values to test.  
+            n\_jobs (int): Number of worker processes; 1 evaluates serially.  
+            progress (Callable, optional): Called as progress(done, total, best)  
+                after each evaluation; returning True stops the search.  
+            target (float, optional): Stop once a performance reaches this value.  
+            search (SearchStrategy, optional): Random, successive halving or  
+                Bayesian search to use instead of the full grid.
 
         Returns:  
-            Dict\[str, Any\]: The best parameters and associated performance.  
+            Dict\[str, Any\]: The best parameters and associated performance, plus  
+                the full "results" table and search statistics.  
         """  
+        if search is not None:  
+            def objective(params, fidelity):  
+                return score\_strategy(history\_slice(self.data, fidelity), strategy\_func, params)  
+            return search.run(objective, param\_grid, progress=progress, target=target)  
+        if n\_jobs \> 1:  
+            return grid\_search(self.data, strategy\_func, self.\_generate\_param\_combinations(param\_grid),  
+                               processes=n\_jobs, progress=progress, target=target)
+
         best\_params \= None  
-        best\_performance \= \-np.inf
+        best\_performance \= \-np.inf  
+        rows \= \[\]  
+        total \= int(np.prod(\[len(values) for values in param\_grid.values()\]))
 
         for params in self.\_generate\_param\_combinations(param\_grid):  
             performance \= self.\_evaluate\_strategy(strategy\_func, params)  
+            rows.append(dict(params, trial=len(rows), performance=performance, error=None))  
             if performance \> best\_performance:  
                 best\_performance \= performance  
-                best\_params \= params
+                best\_params \= params  
+            stop \= progress(len(rows), total, best\_performance) if progress else False  
+            if stop or (target is not None and best\_performance \>= target):  
+                break
+
+        return {"params": best\_params, "performance": best\_performance, "results": pd.DataFrame(rows),  
+                "completed": len(rows), "total": total, "aborted": len(rows) \< total}
+
+    def walk\_forward(self, strategy\_func: Callable, param\_grid: Dict\[str, Any\], train\_size: int,  
+                     test\_size: int, step: Optional\[int\] \= None, anchored: bool \= False,  
+                     n\_jobs: int \= 1\) \-\> Dict\[str, Any\]:  
+        """Optimizes on rolling training windows and scores each choice on the window after it.
 
-        return {"params": best\_params, "performance": best\_performance}
+        Folds run in parallel when \`n\_jobs\` \> 1. Strategies that accept an  
+        \`indicators\` argument get cached indicator arrays shared across folds  
+        (see \`walk\_forward.IndicatorView\`).
+
+        Args:  
+            strategy\_func (Callable): A function implementing the trading strategy.  
+            param\_grid (Dict\[str, Any\]): A dictionary of parameter names and values to test.  
+            train\_size (int): Rows per training window.  
+            test\_size (int): Rows per test window.  
+            step (int, optional): Rows between folds. Defaults to \`test\_size\`.  
+            anchored (bool): Grow training windows from the first row instead of rolling them.  
+            n\_jobs (int): Number of worker processes.
+
+        Returns:  
+            Dict\[str, Any\]: Per-fold results and the out-of-sample test score.  
+        """  
+        return walk\_forward(self.data, strategy\_func, param\_grid, train\_size, test\_size, step=step,  
+                            anchored=anchored, processes=n\_jobs)
+
+    def load\_portfolio(self, sources: Dict\[str, Any\], column: str \= "close") \-\> SharedMatrix:  
+        """Loads many symbols once into an aligned symbols x time matrix in shared memory.
+
+        Args:  
+            sources (Dict\[str, Any\]): Per symbol, a CSV path with 'timestamp' and  
+                \`column\` columns, or a DataFrame/Series of prices.  
+            column (str): Price column.
+
+        Returns:  
+            SharedMatrix: The shared price matrix, reused by every \`backtest\_portfolio\` call.  
+        """  
+        frames \= {symbol: pd.read\_csv(source, parse\_dates=\['timestamp'\]) if isinstance(source, str) else source  
+                  for symbol, source in sources.items()}  
+        timestamps, symbols, prices \= align\_prices(frames, column)  
+        self.close\_portfolio()  
+        self.portfolio \= (timestamps, symbols, SharedMatrix(prices.shape, prices))  
+        return self.portfolio\[2\]
+
+    def backtest\_portfolio(self, strategy\_func: Callable, params: Optional\[Dict\[str, Any\]\] \= None,  
+                           allocation: str \= "equal", n\_jobs: int \= 1, \*\*options) \-\> Dict\[str, Any\]:  
+        """Runs a strategy over every loaded symbol and aggregates portfolio equity, exposure and drawdown.
+
+        Args:  
+            strategy\_func (Callable): A function implementing the trading strategy.  
+            params (Dict\[str, Any\], optional): Strategy parameters.  
+            allocation (str): "equal", "equal\_active" or "inverse\_volatility".  
+            n\_jobs (int): Number of worker processes.  
+            \*\*options: Further \`portfolio\_backtest.portfolio\_backtest\` options  
+                (initial\_capital, fee\_rate, max\_weight, max\_gross).
+
+        Returns:  
+            Dict\[str, Any\]: Portfolio equity, returns, exposure and drawdown series and summary metrics.  
+        """  
+        if self.portfolio is None:  
+            raise ValueError("No portfolio loaded; call load\_portfolio first.")  
+        timestamps, symbols, shared \= self.portfolio  
+        return portfolio\_backtest(shared.array, timestamps, symbols, strategy\_func, params, allocation=allocation,  
+                                  processes=n\_jobs, shared\_prices=shared, \*\*options)
+
+    def close\_portfolio(self) \-\> None:  
+        """Releases the shared price matrix."""  
+        if self.portfolio is not None:  
+            self.portfolio\[2\].close()  
+            self.portfolio \= None
 
     def analyze\_performance(self, returns: pd.Series) \-\> Dict\[str, Any\]:  
         """Analyzes the performance of the strategy.
@@ -64,9 +220,7 @@ class HistoricalDataSimulator:
 
     def \_evaluate\_strategy(self, strategy\_func: Callable, params: Dict\[str, Any\]) \-\> float:  
         """Evaluates the strategy on historical data with the given parameters."""  
-        signals \= strategy\_func(self.data, \*\*params)  
-        returns \= self.data\['close'\].pct\_change() \* signals.shift(1)  
-        return returns.sum()
+        return score\_strategy(self.data, strategy\_func, params)
 
 \# Example unit tests  
 def test\_load\_data():  
@@ -0,0 +1,289 @@
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from storage import SQLiteStorage, TIME_SERIES_TABLES, event_time_ns, to_epoch_ns
+from tick_writer import TickWriter
+
+NS_PER_SECOND = 1_000_000_000
+
+# Supported bar widths in nanoseconds.
+RESOLUTIONS: Dict[str, int] = {
+    "1m": 60 * NS_PER_SECOND,
+    "5m": 300 * NS_PER_SECOND,
+    "1h": 3600 * NS_PER_SECOND,
+}
+
+Bar = Tuple[int, float, float, float, float, float, int]  # start_ts, open, high, low, close, volume, trades
+
+
+def aggregate_bars(ts: np.ndarray, prices: np.ndarray, volumes: np.ndarray, width_ns: int) -> List[Bar]:
+    """Aggregates time-ordered ticks into OHLCV bars.
+
+    Args:
+        ts (np.ndarray): Epoch-nanosecond timestamps, ascending.
+        prices (np.ndarray): Trade prices.
+        volumes (np.ndarray): Trade volumes.
+        width_ns (int): Bar width in nanoseconds.
+
+    Returns:
+        List[Bar]: One bar per non-empty interval, oldest first.
+    """
+    if len(ts) == 0:
+        return []
+    starts = ts - ts % width_ns
+    first = np.concatenate(([0], np.flatnonzero(np.diff(starts)) + 1))
+    last = np.concatenate((first[1:] - 1, [len(ts) - 1]))
+    return list(zip(
+        starts[first].tolist(),
+        prices[first].tolist(),
+        np.maximum.reduceat(prices, first).tolist(),
+        np.minimum.reduceat(prices, first).tolist(),
+        prices[last].tolist(),
+        np.add.reduceat(volumes, first).tolist(),
+        (last - first + 1).tolist(),
+    ))
+
+
+class BarBuilder:
+    """Maintains OHLCV bars at several resolutions from a tick stream.
+
+    Each (symbol, resolution) has one open bar in memory. A tick past the
+    open bar's end finalizes it into the `bars` table and starts the next
+    one, so indicator code can read a few hundred bars instead of
+    re-windowing raw ticks. Ticks older than the open bar are counted in
+    `late_ticks` and ignored.
+
+    With a `writer`, finalized bars are queued to the `TickWriter` instead of
+    committed inline, so a websocket callback feeding ticks never waits on
+    SQLite; `last_bars` flushes the writer before reading, waiting at most
+    `flush_timeout` seconds.
+    """
+
+    def __init__(self, storage: SQLiteStorage, resolutions: Sequence[str] = ("1m", "5m", "1h"),
+                 writer: Optional[TickWriter] = None, flush_timeout: float = 1.0):
+        self.storage = storage
+        self.writer = writer
+        self.flush_timeout = flush_timeout
+        self.resolutions = {resolution: RESOLUTIONS[resolution] for resolution in resolutions}
+        self._open: Dict[Tuple[str, str], List[Any]] = {}
+        self._lock = threading.Lock()
+        self.late_ticks = 0
+        storage.initialize(["bars"])
+
+    def on_tick(self, symbol: str, ts: int, price: float, volume: float = 0.0) -> List[Tuple[Any, ...]]:
+        """Adds one tick to every resolution.
+
+        Args:
+            symbol (str): Trading symbol.
+            ts (int): Epoch-nanosecond timestamp.
+            price (float): Trade price.
+            volume (float): Trade volume.
+
+        Returns:
+            List[Tuple[Any, ...]]: Rows of the bars finalized by this tick.
+        """
+        finalized = []
+        with self._lock:
+            for resolution, width in self.resolutions.items():
+                start = ts - ts % width
+                bar = self._open.get((symbol, resolution))
+                if bar is not None and start < bar[0]:
+                    self.late_ticks += 1
+                    continue
+                if bar is None or start > bar[0]:
+                    if bar is not None:
+                        finalized.append((symbol, resolution, *bar))
+                    self._open[(symbol, resolution)] = [start, price, price, price, price, volume, 1]
+                    continue
+                if price > bar[2]:
+                    bar[2] = price
+                if price < bar[3]:
+                    bar[3] = price
+                bar[4] = price
+                bar[5] += volume
+                bar[6] += 1
+        if finalized:
+            if self.writer is not None:
+                for row in finalized:
+                    self.writer.submit("bars", row)
+            else:
+                self.storage.save_many("bars", finalized)
+        return finalized
+
+    def on_market_data(self, data: Dict[str, Any]) -> None:
+        """Listener for `MarketDataProcessor` ticks.
+
+        Numeric timestamps may be epoch seconds or milliseconds (Binance `T`),
+        as accepted by `storage.event_time_ns`; strings and
+        datetimes go through `storage.to_epoch_ns`.
+        """
+        ts = event_time_ns(data["timestamp"])
+        if ts is None:
+            ts = to_epoch_ns(data["timestamp"])
+        self.on_tick(data["symbol"], ts, data["price"], data.get("volume", 0.0))
+
+    def _last_stored(self, symbol: str, resolution: str) -> Optional[int]:
+        row = self.storage.query_one(
+            "SELECT MAX(start_ts) FROM bars WHERE symbol = ? AND resolution = ?", (symbol, resolution))
+        return row[0] if row else None
+
+    def backfill(self, symbol: str, table: str = "market_data") -> int:
+        """Rebuilds bars missing since the last stored bar from raw ticks.
+
+        Call on startup before feeding live ticks. The newest bar of each
+        resolution is left open in memory, since more ticks may still
+        belong to it.
+
+        Args:
+            symbol (str): Trading symbol.
+            table (str): Raw tick table, one of `TIME_SERIES_TABLES`.
+
+        Returns:
+            int: Number of bars written.
+        """
+        if table not in TIME_SERIES_TABLES:
+            raise ValueError(f"Not a time-series table: {table}")
+        resume = {}
+        for resolution, width in self.resolutions.items():
+            last = self._last_stored(symbol, resolution)
+            resume[resolution] = last + width if last is not None else None
+        starts = [start for start in resume.values() if start is not None]
+        since = min(starts) if len(starts) == len(resume) else None
+
+        columns = ("ts", "price", "volume") if table == "market_data" else ("ts", "price")
+        rows = self.storage.fetch_range(table, symbol, since, None, columns)
+        if not rows:
+            return 0
+        data = np.array(rows, dtype=np.float64)
+        ts = np.array([row[0] for row in rows], dtype=np.int64)
+        prices = data[:, 1]
+        volumes = np.nan_to_num(data[:, 2]) if data.shape[1] > 2 else np.zeros(len(rows))
+
+        written = 0
+        with self._lock:
+            for resolution, width in self.resolutions.items():
+                lo = int(np.searchsorted(ts, resume[resolution])) if resume[resolution] is not None else 0
+                bars = aggregate_bars(ts[lo:], prices[lo:], volumes[lo:], width)
+                if not bars:
+                    continue
+                closed = [(symbol, resolution, *bar) for bar in bars[:-1]]
+                self.storage.save_many("bars", closed)
+                self._open[(symbol, resolution)] = list(bars[-1])
+                written += len(closed)
+        logging.info(f"Backfilled {written} bars for {symbol}.")
+        return written
+
+    def last_bars(self, symbol: str, resolution: str, n: int, include_open: bool = True) -> List[Bar]:
+        """Returns the last `n` bars for a symbol, oldest first.
+
+        Args:
+            symbol (str): Trading symbol.
+            resolution (str): One of the builder's resolutions, e.g. "1m".
+            n (int): Number of bars.
+            include_open (bool): Include the bar still being built.
+
+        Returns:
+            List[Bar]: (start_ts, open, high, low, close, volume, trades) tuples.
+                If the writer cannot flush in time (closed, stuck or failing),
+                bars it has not committed yet are missing.
+        """
+        if self.writer is not None and not self.writer.flush(self.flush_timeout):
+            logging.warning(f"Bar writer did not flush within {self.flush_timeout}s; reading committed bars only.")
+        bars = self.storage.query(
+            "SELECT start_ts, open, high, low, close, volume, trades FROM bars "
+            "WHERE symbol = ? AND resolution = ? ORDER BY start_ts DESC LIMIT ?", (symbol, resolution, n))
+        bars.reverse()
+        if include_open:
+            with self._lock:
+                bar = self._open.get((symbol, resolution))
+                if bar is not None and (not bars or bar[0] > bars[-1][0]):
+                    bars.append(tuple(bar))
+        return bars[-n:] if n else []
+
+    def last_closes(self, symbol: str, resolution: str, n: int, include_open: bool = True) -> List[float]:
+        """Returns the close prices of the last `n` bars, oldest first."""
+        return [bar[4] for bar in self.last_bars(symbol, resolution, n, include_open)]
+
+
+# Unit tests
+MINUTE = RESOLUTIONS["1m"]
+
+
+def test_finalizes_on_boundary():
+    """Test that bars are finalized when a tick crosses the bar boundary."""
+    storage = SQLiteStorage(":memory:")
+    builder = BarBuilder(storage, ("1m", "5m"))
+    for i, price in enumerate([10.0, 12.0, 9.0, 11.0]):
+        assert builder.on_tick("BTCUSDT", i * 10 * NS_PER_SECOND, price, 1.0) == [], "Bar finalized early."
+    finalized = builder.on_tick("BTCUSDT", MINUTE, 20.0, 2.0)
+    assert finalized == [("BTCUSDT", "1m", 0, 10.0, 12.0, 9.0, 11.0, 4.0, 4)], "Unexpected finalized bar."
+    builder.on_tick("BTCUSDT", 30 * NS_PER_SECOND, 1.0, 1.0)
+    assert builder.late_ticks == 1, "Late tick not counted."
+    bars = builder.last_bars("BTCUSDT", "1m", 5)
+    assert [bar[4] for bar in bars] == [11.0, 20.0], "Stored and open bars not returned in order."
+    assert builder.last_bars("BTCUSDT", "1m", 5, include_open=False) == [(0, 10.0, 12.0, 9.0, 11.0, 4.0, 4)], \
+        "Open bar returned when excluded."
+    assert builder.last_bars("BTCUSDT", "5m", 5) == [(0, 10.0, 20.0, 1.0, 1.0, 7.0, 6)], \
+        "Tick within the open 5m bar not applied."
+    storage.close()
+
+
+def test_backfill_matches_live_and_resumes():
+    """Test that backfill builds the same bars as live ticks and resumes after stored bars."""
+    storage = SQLiteStorage(":memory:")
+    storage.initialize(["market_data"])
+    rng = np.random.default_rng(0)
+    ts = np.sort(rng.integers(0, 30 * MINUTE, 500))
+    ts += np.arange(len(ts))  # Keep timestamps unique for the primary key
+    prices = 100 + rng.standard_normal(len(ts)).cumsum()
+    storage.save_many("market_data", [("BTCUSDT", int(t), "ex", float(p), 1.0) for t, p in zip(ts, prices)])
+
+    live = BarBuilder(SQLiteStorage(":memory:"))
+    for t, p in zip(ts, prices):
+        live.on_tick("BTCUSDT", int(t), float(p), 1.0)
+
+    builder = BarBuilder(storage)
+    assert builder.backfill("BTCUSDT") > 0, "Nothing backfilled."
+    for resolution in ("1m", "5m", "1h"):
+        assert builder.last_bars("BTCUSDT", resolution, 100) == live.last_bars("BTCUSDT", resolution, 100), \
+            f"Backfilled {resolution} bars differ from live bars."
+
+    stored = storage.query_one("SELECT COUNT(*) FROM bars")[0]
+    assert BarBuilder(storage).backfill("BTCUSDT") == 0, "Backfill rewrote stored bars."
+    assert storage.query_one("SELECT COUNT(*) FROM bars")[0] == stored, "Bar count changed on resume."
+    storage.close()
+
+
+def test_decoded_millisecond_ticks_through_writer(tmp_path):
+    """Test that Binance ticks stamped in milliseconds build bars written by the TickWriter."""
+    from fast_decode import TickDecoder
+    storage = SQLiteStorage(str(tmp_path / "bars.db"))
+    writer = TickWriter(storage, flush_interval_ms=5).start()
+    builder = BarBuilder(storage, ("1m",), writer=writer)
+    decoder = TickDecoder()
+    t0 = 1_700_000_040_000  # ms, on a minute boundary
+    for offset, price in [(0, 100.0), (30_000, 101.0), (60_000, 102.0)]:
+        frame = f'{{"e":"trade","s":"BTCUSDT","p":"{price}","q":"1.0","T":{t0 + offset}}}'
+        for tick in decoder.decode(frame):
+            builder.on_market_data(tick)
+    bars = builder.last_bars("BTCUSDT", "1m", 5, include_open=False)
+    assert bars == [(t0 * 1_000_000, 100.0, 101.0, 100.0, 101.0, 2.0, 2)], "Millisecond ticks misread."
+    assert writer.get_metrics()["rows_written"] == 1, "Bar not written through the TickWriter."
+    writer.close()
+    builder.flush_timeout = 0.05
+    builder.on_tick("BTCUSDT", (t0 + 120_000) * 1_000_000, 103.0)  # Queued to the closed writer
+    assert len(builder.last_bars("BTCUSDT", "1m", 5, include_open=False)) == 1, "Read after close did not return."
+    storage.close()
+
+
+if __name__ == "__main__":
+    import tempfile
+    import pathlib
+    test_finalizes_on_boundary()
+    test_backfill_matches_live_and_resumes()
+    with tempfile.TemporaryDirectory() as tmp:
+        test_decoded_millisecond_ticks_through_writer(pathlib.Path(tmp))
+    print("All tests passed.")
@@ -0,0 +1,529 @@
+import os
+import sqlite3
+import tempfile
+import time
+
+from fast_decode import TickDecoder
+from storage import SCHEMA, SQLiteStorage, now_ns
+from streaming_indicators import MovingAverageCrossover
+from tick_ring_buffer import TickRingBuffer
+from tick_writer import TickWriter
+
+
+def bench_tick_writer(n_ticks: int = 20000) -> dict:
+    """Compares connect-per-call and per-tick commits with the batched tick writer.
+
+    Args:
+        n_ticks (int): Number of ticks to insert with each method.
+
+    Returns:
+        dict: Inserts per second for each method and the speedup.
+    """
+    rows = [("BTC/USD", now_ns(), "bench_exchange", 50000.0 + i * 0.01, 1.0) for i in range(n_ticks)]
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "connect_per_call.db")
+        connection = sqlite3.connect(path)
+        connection.execute(SCHEMA["market_data"])
+        connection.close()
+        n_connect = max(1, n_ticks // 10)
+        start = time.perf_counter()
+        for row in rows[:n_connect]:
+            connection = sqlite3.connect(path)
+            connection.execute("INSERT INTO market_data (symbol, ts, exchange, price, volume) VALUES (?, ?, ?, ?, ?)", row)
+            connection.commit()
+            connection.close()
+        connect_per_call = n_connect / (time.perf_counter() - start)
+
+        storage = SQLiteStorage(os.path.join(directory, "per_tick.db"))
+        storage.initialize(["market_data"])
+        start = time.perf_counter()
+        for row in rows:
+            storage.save("market_data", row)
+        per_tick = n_ticks / (time.perf_counter() - start)
+        storage.close()
+
+        storage = SQLiteStorage(os.path.join(directory, "batched.db"))
+        storage.initialize(["market_data"])
+        writer = TickWriter(storage, batch_size=1000, flush_interval_ms=50).start()
+        start = time.perf_counter()
+        for row in rows:
+            writer.submit("market_data", row)
+        writer.flush()
+        batched = n_ticks / (time.perf_counter() - start)
+        metrics = writer.get_metrics()
+        writer.close()
+        storage.close()
+
+    return {
+        "connect_per_call_inserts_per_sec": connect_per_call,
+        "per_tick_inserts_per_sec": per_tick,
+        "batched_inserts_per_sec": batched,
+        "speedup_vs_connect_per_call": batched / connect_per_call,
+        "speedup_vs_per_tick": batched / per_tick,
+        "avg_batch_size": metrics["avg_batch_size"],
+        "avg_flush_ms": metrics["avg_flush_ms"],
+    }
+
+
+def bench_decode(n_messages: int = 100000) -> dict:
+    """Compares stdlib json.loads plus dict normalization with `TickDecoder`.
+
+    Args:
+        n_messages (int): Number of trade frames to decode with each method.
+
+    Returns:
+        dict: Messages per second for each method and the speedup.
+    """
+    import json
+    frames = [json.dumps({"e": "trade", "E": 1640995200000 + i, "s": "BTCUSDT", "t": i, "p": f"{45000 + i * 0.01:.2f}",
+                          "q": "0.0015", "T": 1640995200000 + i, "m": True}) for i in range(n_messages)]
+    start = time.perf_counter()
+    for frame in frames:
+        data = json.loads(frame)
+        {"timestamp": data.get("T", time.time()), "price": float(data.get("p", 0)),
+         "volume": float(data.get("v", 0)), "symbol": data.get("s", "UNKNOWN")}
+    baseline = n_messages / (time.perf_counter() - start)
+
+    decoder = TickDecoder()
+    start = time.perf_counter()
+    for frame in frames:
+        decoder.decode(frame)
+    fast = n_messages / (time.perf_counter() - start)
+
+    batched = "[" + ",".join(frames) + "]"
+    start = time.perf_counter()
+    decoder.decode(batched)
+    batch = n_messages / (time.perf_counter() - start)
+    return {
+        "stdlib_messages_per_sec": baseline,
+        f"{decoder.backend}_messages_per_sec": fast,
+        f"{decoder.backend}_batched_messages_per_sec": batch,
+        "speedup": fast / baseline,
+    }
+
+
+def bench_tick_buffer(capacity: int = 10000, n_snapshots: int = 200) -> dict:
+    """Compares a deque of tick dicts with `TickRingBuffer` for snapshot cost and memory.
+
+    Args:
+        capacity (int): Buffer capacity, filled completely.
+        n_snapshots (int): Number of full snapshots taken with each buffer.
+
+    Returns:
+        dict: Snapshot times and approximate buffer sizes.
+    """
+    import sys
+    from collections import deque
+    ticks = [{"timestamp": 1640995200.0 + i, "price": 45000.0 + i, "volume": 1.5, "symbol": "BTCUSD"}
+             for i in range(capacity)]
+    dicts = deque(ticks, maxlen=capacity)
+    ring = TickRingBuffer(capacity)
+    for tick in ticks:
+        ring.append(tick["timestamp"], tick["price"], tick["volume"], tick["symbol"])
+
+    start = time.perf_counter()
+    for _ in range(n_snapshots):
+        list(dicts)
+    deque_us = (time.perf_counter() - start) / n_snapshots * 1e6
+    start = time.perf_counter()
+    for _ in range(n_snapshots):
+        ring.snapshot()
+    snapshot_us = (time.perf_counter() - start) / n_snapshots * 1e6
+    start = time.perf_counter()
+    for _ in range(n_snapshots):
+        ring.window()
+    window_us = (time.perf_counter() - start) / n_snapshots * 1e6
+
+    deque_bytes = sys.getsizeof(dicts) + sum(sys.getsizeof(t) + sum(sys.getsizeof(v) for v in t.values())
+                                             for t in ticks)
+    ring_bytes = sum(getattr(ring, field).nbytes for field in ("timestamp", "price", "volume", "symbol_id"))
+    return {
+        "deque_snapshot_us": deque_us,
+        "ring_snapshot_us": snapshot_us,
+        "ring_window_us": window_us,
+        "deque_kib": deque_bytes / 1024,
+        "ring_kib": ring_bytes / 1024,
+    }
+
+
+def bench_sma_signal(n_ticks: int = 2000) -> dict:
+    """Compares per-tick SMA computation from SQLite with the streaming tracker.
+
+    Args:
+        n_ticks (int): Number of ticks to process with each method.
+
+    Returns:
+        dict: Microseconds per tick for each method and the speedup.
+    """
+    import pandas as pd
+    prices = [50000.0 + (i % 97) for i in range(n_ticks + 50)]
+    storage = SQLiteStorage(":memory:")
+    storage.initialize(["price_data"])
+    storage.save_many("price_data", [("BTCUSDT", i, p) for i, p in enumerate(prices[:50])])
+
+    start = time.perf_counter()
+    for i in range(50, 50 + n_ticks):
+        storage.save("price_data", ("BTCUSDT", i, prices[i]))
+        rows = storage.fetch_latest("price_data", "BTCUSDT", 50)
+        df = pd.DataFrame(rows[::-1], columns=["ts", "price"])
+        (df["price"].rolling(window=20).mean().iloc[-1], df["price"].rolling(window=50).mean().iloc[-1])
+    db_us = (time.perf_counter() - start) / n_ticks * 1e6
+    storage.close()
+
+    tracker = MovingAverageCrossover(20, 50)
+    tracker.warm_up(prices[:50])
+    start = time.perf_counter()
+    for price in prices[50:]:
+        tracker.update(price)
+    streaming_us = (time.perf_counter() - start) / n_ticks * 1e6
+    return {"db_rolling_us_per_tick": db_us, "streaming_us_per_tick": streaming_us, "speedup": db_us / streaming_us}
+
+
+def bench_panel_signals(n_steps: int = 1000, symbol_counts=(1, 10, 100, 1000)) -> dict:
+    """Compares per-symbol DataFrame signals with batch panel signals as the symbol count grows.
+
+    Args:
+        n_steps (int): Prices per symbol.
+        symbol_counts (Sequence[int]): Panel sizes to time.
+
+    Returns:
+        dict: Milliseconds per panel for each method and size, and the speedups.
+    """
+    import numpy as np
+    import pandas as pd
+    from strategy_factory import SMACrossoverStrategy
+    strategy = SMACrossoverStrategy(20, 50)
+    rng = np.random.default_rng(0)
+    results = {}
+    for n_symbols in symbol_counts:
+        panel = 100 + rng.standard_normal((n_symbols, n_steps)).cumsum(axis=1)
+        start = time.perf_counter()
+        for row in panel:
+            strategy.generate_signals(pd.DataFrame({"price": row}))
+        loop_ms = (time.perf_counter() - start) * 1e3
+        start = time.perf_counter()
+        strategy.generate_signals_batch(panel)
+        batch_ms = (time.perf_counter() - start) * 1e3
+        results[f"{n_symbols}_symbols_loop_ms"] = loop_ms
+        results[f"{n_symbols}_symbols_batch_ms"] = batch_ms
+        results[f"{n_symbols}_symbols_speedup"] = loop_ms / batch_ms
+    return results
+
+
+def bench_backtest(n_bars: int = 525600, n_loop_bars: int = 20000) -> dict:
+    """Compares the row-by-row iloc trade loop with vectorized trade extraction.
+
+    The loop is timed on `n_loop_bars` bars and extrapolated; the vectorized
+    path runs on a full year of minute bars.
+
+    Args:
+        n_bars (int): Bars for the vectorized backtest.
+        n_loop_bars (int): Bars for the iloc loop.
+
+    Returns:
+        dict: Seconds per year of minute bars for each method and the speedup.
+    """
+    import numpy as np
+    import pandas as pd
+    from backtest_engine import backtest_strategy
+    rng = np.random.default_rng(0)
+    index = pd.date_range("2023-01-01", periods=n_bars, freq="min")
+    data = pd.DataFrame({"price": 30000 + rng.standard_normal(n_bars).cumsum() * 10}, index=index)
+
+    sample = data.iloc[:n_loop_bars].copy()
+    backtest_strategy(sample)  # Adds the signal column
+    start = time.perf_counter()
+    positions = []
+    for i in range(1, len(sample)):
+        if sample.iloc[i - 1]["signal"] != sample.iloc[i]["signal"]:
+            positions.append({"timestamp": sample.index[i], "price": sample.iloc[i]["price"],
+                              "signal": sample.iloc[i]["signal"]})
+    loop_s = (time.perf_counter() - start) * n_bars / n_loop_bars
+
+    start = time.perf_counter()
+    backtest_strategy(data)
+    vectorized_s = time.perf_counter() - start
+    return {"iloc_loop_s_per_year": loop_s, "vectorized_s_per_year": vectorized_s, "speedup": loop_s / vectorized_s}
+
+
+def bench_walk_forward(n_rows: int = 50000, fold_counts=(2, 8, 32)) -> dict:
+    """Compares walk-forward runs with and without the shared indicator cache as folds grow.
+
+    Args:
+        n_rows (int): Rows of hourly history.
+        fold_counts (Sequence[int]): Numbers of folds to time.
+
+    Returns:
+        dict: Seconds per run for each fold count, cached and uncached.
+    """
+    import numpy as np
+    import pandas as pd
+    from walk_forward import _crossover, walk_forward
+    rng = np.random.default_rng(0)
+    data = pd.DataFrame({"close": 100 + rng.standard_normal(n_rows).cumsum()},
+                        index=pd.date_range("2020-01-01", periods=n_rows, freq="h"))
+    grid = {"fast": [5, 10, 20, 30], "slow": [50, 100, 200]}
+    results = {}
+    for folds in fold_counts:
+        test_size = n_rows // (folds + 3)
+        for use_cache in (False, True):
+            start = time.perf_counter()
+            walk_forward(data, _crossover, grid, train_size=3 * test_size, test_size=test_size, use_cache=use_cache)
+            results[f"{folds}_folds_{'cached' if use_cache else 'uncached'}_s"] = time.perf_counter() - start
+    return results
+
+
+def bench_indicator_cache(n_rows: int = 200000) -> dict:
+    """Compares an SMA crossover grid with and without the indicator cache.
+
+    Args:
+        n_rows (int): Rows of price history.
+
+    Returns:
+        dict: Seconds per grid with each method, the speedup and the cache counters.
+    """
+    import numpy as np
+    import pandas as pd
+    from indicator_cache import IndicatorCache, rolling_mean
+    close = pd.Series(100 + np.random.default_rng(0).standard_normal(n_rows).cumsum())
+    grid = [(short, long) for short in (5, 10, 15, 20, 25) for long in (50, 100, 150, 200, 250)]
+
+    start = time.perf_counter()
+    for short, long in grid:
+        close.rolling(short).mean() > close.rolling(long).mean()
+    uncached_s = time.perf_counter() - start
+
+    cache = IndicatorCache()
+    start = time.perf_counter()
+    for short, long in grid:
+        rolling_mean(close, short, cache) > rolling_mean(close, long, cache)
+    cached_s = time.perf_counter() - start
+    stats = cache.stats()
+    return {"uncached_s": uncached_s, "cached_s": cached_s, "speedup": uncached_s / cached_s,
+            "hits": stats["hits"], "misses": stats["misses"]}
+
+
+def bench_event_backtester(n_ticks: int = 1000000, n_symbols: int = 100) -> dict:
+    """Measures event-driven backtest throughput with a minimal strategy that trades every 1000 ticks.
+
+    Ticks are delivered one at a time to Python strategy code, so throughput is
+    bounded by the interpreter: the replay loop itself, the strategy call and
+    `TickRecord` construction make up nearly all of the run, while fill
+    handling (equity and risk updates) is about 5% at this fill rate.
+
+    Args:
+        n_ticks (int): Ticks to replay.
+        n_symbols (int): Symbols the ticks are spread over.
+
+    Returns:
+        dict: Events per second, events and fills.
+    """
+    import contextlib
+    import io
+    import numpy as np
+    from event_backtester import EventBacktester, FillModel
+    from risk_manager import RealTimeRiskController
+
+    class EveryNth:
+        def __init__(self):
+            self.n = 0
+
+        def generate_signals(self, tick):
+            self.n += 1
+            if self.n % 1000 == 0:
+                return (tick.symbol, "buy" if self.n % 2000 else "sell", tick.price)
+            return None
+
+        def position_sizing(self, signal):
+            return 0.001
+
+        def execute_trade(self, size, signal):
+            self.execution.place_order(signal[0], signal[1], size, signal[2])
+
+    rng = np.random.default_rng(0)
+    ts = np.arange(n_ticks, dtype=np.int64) * 1000
+    prices = 100 + rng.standard_normal(n_ticks).cumsum() * 0.01
+    symbol_ids = rng.integers(0, n_symbols, n_ticks)
+    symbols = [f"SYM{i}" for i in range(n_symbols)]
+    risk = RealTimeRiskController(max_exposure=1e12, max_drawdown=100.0)
+    backtester = EventBacktester(EveryNth(), risk, initial_cash=1e6, fill_model=FillModel(latency_ns=5000))
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = backtester.run(ts, prices, np.ones(n_ticks), symbol_ids, symbols)
+    return {"events_per_sec": result["events_per_sec"], "events": result["events"], "fills": len(result["fills"])}
+
+
+def bench_execution_scheduler(n_parents: int = 5000, slices: int = 10, duration: float = 2.0) -> dict:
+    """Runs many concurrent TWAP parents and reports child-order lateness.
+
+    Args:
+        n_parents (int): Concurrent parent orders.
+        slices (int): Child orders per parent.
+        duration (float): Seconds per parent.
+
+    Returns:
+        dict: Child orders, wall time and lateness percentiles in milliseconds.
+    """
+    import asyncio
+    from execution_scheduler import ExecutionScheduler
+
+    async def run():
+        scheduler = ExecutionScheduler(lambda symbol, side, quantity: True, seed=0)
+        await scheduler.start()
+        start = time.perf_counter()
+        ids = [scheduler.submit_twap(f"SYM{i}", "buy", 1.0, duration, slices, randomize=0.5)
+               for i in range(n_parents)]
+        await asyncio.gather(*(scheduler.wait(order_id) for order_id in ids))
+        elapsed = time.perf_counter() - start
+        await scheduler.stop()
+        return scheduler.jitter_stats(), elapsed
+
+    stats, elapsed = asyncio.run(run())
+    return {"children": stats["count"], "elapsed_s": elapsed, "p50_ms": stats["p50_ms"],
+            "p99_ms": stats["p99_ms"], "max_ms": stats["max_ms"]}
+
+
+def bench_order_routing(n_venues: int = 10, n_levels: int = 50, n_orders: int = 100000) -> dict:
+    """Measures routing and split latency on a cached table.
+
+    Args:
+        n_venues (int): Venues per symbol.
+        n_levels (int): Book levels per side and venue.
+        n_orders (int): Orders routed.
+
+    Returns:
+        dict: Microseconds per route and per split.
+    """
+    import numpy as np
+    from order_router import RoutingTable, VenueBook
+    rng = np.random.default_rng(0)
+    table = RoutingTable()
+    books = []
+    for v in range(n_venues):
+        spread = np.cumsum(rng.uniform(0.01, 0.05, n_levels))
+        bids = list(zip((100 - spread).tolist(), rng.uniform(0.1, 2.0, n_levels).tolist()))
+        asks = list(zip((100 + spread).tolist(), rng.uniform(0.1, 2.0, n_levels).tolist()))
+        books.append(VenueBook(f"V{v}", float(rng.uniform(0.0002, 0.001)), 0.001, bids, asks))
+    table.update("BTCUSD", books)
+    sizes = rng.uniform(0.01, 20.0, n_orders).tolist()
+
+    start = time.perf_counter()
+    for size in sizes:
+        table.route("BTCUSD", "buy", size)
+    route_us = (time.perf_counter() - start) / n_orders * 1e6
+    start = time.perf_counter()
+    for size in sizes:
+        table.split("BTCUSD", "buy", size)
+    split_us = (time.perf_counter() - start) / n_orders * 1e6
+    return {"route_us": route_us, "split_us": split_us}
+
+
+def bench_position_book(n_symbols: int = 5000, n_fills: int = 500000) -> dict:
+    """Measures sustained fill throughput of the risk controller's position book.
+
+    Each fill is booked and risk-evaluated; a reader thread takes snapshots
+    concurrently. Compares with summing every position per check, as the
+    controller used to.
+
+    Args:
+        n_symbols (int): Symbols traded.
+        n_fills (int): Fills booked.
+
+    Returns:
+        dict: Fills per second, snapshots taken, and microseconds per exposure read before and after.
+    """
+    import threading
+    import numpy as np
+    from risk_manager import RealTimeRiskController
+    rng = np.random.default_rng(0)
+    symbols = [f"SYM{i}" for i in range(n_symbols)]
+    picks = rng.integers(0, n_symbols, n_fills).tolist()
+    quantities = rng.integers(-5, 6, n_fills).astype(float).tolist()
+    prices = rng.uniform(90, 110, n_fills).tolist()
+    controller = RealTimeRiskController(max_exposure=1e15, max_drawdown=100.0)
+    controller.initial_equity = controller.account_equity = 1e6
+    done = threading.Event()
+    snapshots = [0]
+
+    def reader():
+        while not done.is_set():
+            controller.book.snapshot()
+            snapshots[0] += 1
+
+    thread = threading.Thread(target=reader)
+    thread.start()
+    start = time.perf_counter()
+    for i, quantity, price in zip(picks, quantities, prices):
+        controller.update_position(symbols[i], quantity, price)
+    elapsed = time.perf_counter() - start
+    done.set()
+    thread.join()
+
+    reads = 1000
+    start = time.perf_counter()
+    for _ in range(reads):
+        controller.calculate_exposure()
+    running_us = (time.perf_counter() - start) / reads * 1e6
+    positions = {symbol: dict(controller.positions[symbol]) for symbol in symbols}
+    start = time.perf_counter()
+    for _ in range(reads):
+        sum(pos["value"] for pos in positions.values())
+    summed_us = (time.perf_counter() - start) / reads * 1e6
+    return {"fills_per_sec": n_fills / elapsed, "snapshots": snapshots[0], "exposure_us": running_us,
+            "summed_exposure_us": summed_us}
+
+
+def bench_pretrade_risk(n_symbols: int = 1000, n_checks: int = 500000) -> dict:
+    """Measures pre-trade check latency with every limit enabled.
+
+    Args:
+        n_symbols (int): Symbols with positions and last ticks.
+        n_checks (int): Orders checked.
+
+    Returns:
+        dict: Microseconds per check, histogram percentiles and the acceptance rate.
+    """
+    import numpy as np
+    from pretrade_risk import PreTradeRiskEngine
+    rng = np.random.default_rng(0)
+    symbols = [f"SYM{i}" for i in range(n_symbols)]
+    engine = PreTradeRiskEngine(max_quantity=50, max_symbol_notional=5000, max_gross_notional=1e7, collar_bps=50,
+                                max_rate=1e6)
+    for symbol in symbols:
+        engine.on_tick(symbol, 100.0)
+        engine.book.fill(symbol, float(rng.integers(-20, 21)), 100.0)
+    picks = [symbols[i] for i in rng.integers(0, n_symbols, n_checks).tolist()]
+    sides = ["buy" if b else "sell" for b in rng.integers(0, 2, n_checks).tolist()]
+    quantities = rng.uniform(0.1, 60, n_checks).tolist()
+    prices = (100 + rng.normal(0, 0.3, n_checks)).tolist()
+    check = engine.check
+    start = time.perf_counter()
+    accepted = 0
+    for symbol, side, quantity, price in zip(picks, sides, quantities, prices):
+        accepted += check(symbol, side, quantity, price) == 0
+    elapsed = time.perf_counter() - start
+    histogram = engine.latency_histogram()
+    return {"check_us": elapsed / n_checks * 1e6, "p50_ns": histogram["p50_ns"], "p99_ns": histogram["p99_ns"],
+            "p999_ns": histogram["p999_ns"], "accept_rate": accepted / n_checks}
+
+
+def report(name: str, results: dict) -> None:
+    """Prints benchmark results."""
+    print(f"{name}:")
+    for key, value in results.items():
+        print(f"  {key}: {value:,.2f}")
+
+
+if __name__ == "__main__":
+    report("Tick writer", bench_tick_writer())
+    report("Tick decoding", bench_decode())
+    report("Tick buffer", bench_tick_buffer())
+    report("SMA signal", bench_sma_signal())
+    report("Panel signals", bench_panel_signals())
+    report("Backtest", bench_backtest())
+    report("Walk-forward", bench_walk_forward())
+    report("Indicator cache", bench_indicator_cache())
+    report("Event backtester", bench_event_backtester())
+    report("Execution scheduler", bench_execution_scheduler())
+    report("Order routing", bench_order_routing())
+    report("Position book", bench_position_book())
+    report("Pre-trade risk", bench_pretrade_risk())
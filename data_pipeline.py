@@ -1,47 +1,28 @@
 import websocket  
-import json  
-import sqlite3  
-from typing import Dict, Any, List
+from typing import Dict, Any, List  
+from storage import get\_storage, now\_ns  
+from tick\_writer import TickWriter  
+from fast\_decode import loads
 
 class MarketDataCollector:  
     """Handles market data collection, storage, and retrieval."""
 
     def \_\_init\_\_(self, db\_path: str \= "market\_data.db"):  
         self.db\_path \= db\_path  
+        self.storage \= get\_storage(db\_path)  
         self.\_initialize\_database()
 
     def \_initialize\_database(self):  
         """Initializes the SQLite database for data storage."""  
-        connection \= sqlite3.connect(self.db\_path)  
-        cursor \= connection.cursor()  
-        cursor.execute('''CREATE TABLE IF NOT EXISTS market\_data (  
-            id INTEGER PRIMARY KEY,  
-            exchange TEXT,  
-            symbol TEXT,  
-            timestamp DATETIME DEFAULT CURRENT\_TIMESTAMP,  
-            price REAL,  
-            volume REAL  
-        )''')  
-        connection.commit()  
-        connection.close()
+        self.storage.initialize(\["market\_data"\])
 
     def store\_data(self, exchange: str, symbol: str, price: float, volume: float):  
         """Stores market data into the database."""  
-        connection \= sqlite3.connect(self.db\_path)  
-        cursor \= connection.cursor()  
-        cursor.execute('''INSERT INTO market\_data (exchange, symbol, price, volume)   
-                          VALUES (?, ?, ?, ?)''', (exchange, symbol, price, volume))  
-        connection.commit()  
-        connection.close()
+        self.storage.save("market\_data", (symbol, now\_ns(), exchange, price, volume))
 
     def fetch\_historical\_data(self, symbol: str, limit: int \= 100\) \-\> List\[Dict\[str, Any\]\]:  
         """Fetches historical data for a given symbol."""  
-        connection \= sqlite3.connect(self.db\_path)  
-        cursor \= connection.cursor()  
-        cursor.execute('''SELECT timestamp, price, volume FROM market\_data  
-                          WHERE symbol \= ? ORDER BY timestamp DESC LIMIT ?''', (symbol, limit))  
-        rows \= cursor.fetchall()  
-        connection.close()  
+        rows \= self.storage.fetch\_latest("market\_data", symbol, limit, ("ts", "price", "volume"))  
         return \[{"timestamp": row\[0\], "price": row\[1\], "volume": row\[2\]} for row in rows\]
 
     def normalize\_data(self, data: List\[Dict\[str, Any\]\]) \-\> List\[Dict\[str, Any\]\]:  
@@ -53,19 +34,32 @@ class MarketDataCollector:
             "volume": round(item\["volume"\], 4\)  
         } for item in data\]
 
-    def stream\_data(self, exchange\_url: str, symbol: str):  
-        """Streams real-time data using websockets."""  
+    def stream\_data(self, exchange\_url: str, symbol: str, bar\_builder=None):  
+        """Streams real-time data using websockets.
+
+        Ticks are queued to a background \`TickWriter\` so the socket callback  
+        never waits on a database commit. If a \`BarBuilder\` is given, each  
+        tick also updates its OHLCV bars, and finalized bars go through the  
+        same writer.  
+        """  
+        writer \= TickWriter(self.storage).start()  
+        if bar\_builder is not None and bar\_builder.writer is None:  
+            bar\_builder.writer \= writer
+
         def on\_message(ws, message):  
-            data \= json.loads(message)  
-            self.store\_data(  
-                exchange="example\_exchange",  
-                symbol=symbol,  
-                price=data\["price"\],  
-                volume=data\["volume"\]  
-            )
+            data \= loads(message)  
+            ts \= now\_ns()  
+            writer.submit("market\_data", (symbol, ts, "example\_exchange", data\["price"\], data\["volume"\]))  
+            if bar\_builder is not None:  
+                bar\_builder.on\_tick(symbol, ts, data\["price"\], data\["volume"\])
 
         ws \= websocket.WebSocketApp(exchange\_url, on\_message=on\_message)  
-        ws.run\_forever()
+        try:  
+            ws.run\_forever()  
+        finally:  
+            writer.close()  
+            if bar\_builder is not None and bar\_builder.writer is writer:  
+                bar\_builder.writer \= None
 
 \# Unit tests  
 import unittest  
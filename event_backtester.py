@@ -0,0 +1,324 @@
+import heapq
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from fast_decode import TickRecord
+
+ORDER = 0  # Order arrives at the simulated venue
+TIMER = 1  # Callback scheduled by the strategy
+
+SIMULATED_VENUE = "Backtest"
+
+
+class SimulatedClock:
+    """Backtest clock; it only moves when the event loop advances it."""
+
+    def __init__(self, start_ns: int = 0):
+        self.now_ns = start_ns
+
+    def time(self) -> float:
+        """Returns the simulated time in seconds, like `time.time`."""
+        return self.now_ns / 1e9
+
+
+class FillModel:
+    """Market order fills at the last traded price plus slippage, charged a proportional fee.
+
+    Args:
+        fee_rate (float): Fee as a fraction of notional, e.g. 0.001 for 10 bps.
+        slippage_bps (float): Price concession against the order side, in basis points.
+        latency_ns (int): Delay between sending an order and its arrival at the venue.
+    """
+
+    def __init__(self, fee_rate: float = 0.001, slippage_bps: float = 1.0, latency_ns: int = 0):
+        self.fee_rate = fee_rate
+        self.slippage_bps = slippage_bps
+        self.latency_ns = latency_ns
+
+    def fill_price(self, side: str, last_price: float, quantity: float) -> float:
+        """Returns the execution price for a market order."""
+        slip = last_price * self.slippage_bps / 1e4
+        return last_price + slip if side == "buy" else last_price - slip
+
+    def fee(self, price: float, quantity: float) -> float:
+        """Returns the fee charged for a fill."""
+        return abs(price * quantity) * self.fee_rate
+
+
+class SimulatedMarketData:
+    """Market data view for `OrderExecution` backed by the replayed ticks."""
+
+    def __init__(self, fill_model: FillModel):
+        self.last_prices: Dict[str, float] = {}
+        self._venue = [{"name": SIMULATED_VENUE, "fee": fill_model.fee_rate, "slippage": fill_model.slippage_bps / 1e4}]
+
+    def get_current_price(self, symbol: str) -> Optional[float]:
+        return self.last_prices.get(symbol)
+
+    def get_available_exchanges(self, symbol: str) -> List[Dict[str, Any]]:
+        return self._venue
+
+
+class SimulatedBroker:
+    """Order sink for `OrderExecution` that schedules fills on the event queue."""
+
+    def __init__(self, backtester: "EventBacktester"):
+        self.backtester = backtester
+
+    def submit_order(self, symbol: str, side: str, quantity: float, price: float) -> None:
+        bt = self.backtester
+        bt.schedule(bt.clock.now_ns + bt.fill_model.latency_ns, ORDER, (symbol, side, quantity, price))
+
+
+class EventBacktester:
+    """Event-driven backtest that replays ticks through the live strategy, execution and risk code.
+
+    Each tick is passed as a `TickRecord` to `strategy.generate_signals`;
+    a truthy signal is sized with `strategy.position_sizing` and handed to
+    `strategy.execute_trade`, which places orders through
+    `strategy.execution` (an `OrderExecution` wired to the risk manager and
+    a simulated broker). Accepted orders arrive at the venue after the fill
+    model's latency and fill at the last price of the symbol at that time.
+    Fills update cash, positions and the risk manager (`update_position`,
+    `account_equity`), and are passed to `strategy.on_fill` if defined.
+    When the risk manager unwinds positions after a breach (its `on_unwind`
+    hook), the closing trades fill immediately at the last price through the
+    fill model, so cash and positions match the risk book.
+
+    Ticks are already in time order, so they stream straight from arrays;
+    only scheduled events (order arrivals and timers) go through the heap,
+    which is drained up to each tick's timestamp before the tick is
+    delivered.
+
+    Args:
+        strategy: A `BaseStrategy`.
+        risk_manager: Risk manager with `validate_order` and `update_position`,
+            e.g. `RealTimeRiskController`.
+        initial_cash (float): Starting cash.
+        fill_model (FillModel, optional): Fees, slippage and latency.
+    """
+
+    def __init__(self, strategy: Any, risk_manager: Any, initial_cash: float = 10000.0,
+                 fill_model: Optional[FillModel] = None):
+        from strategy_executor import OrderExecution
+        self.strategy = strategy
+        self.risk_manager = risk_manager
+        self.fill_model = fill_model or FillModel()
+        self.clock = SimulatedClock()
+        self.market_data = SimulatedMarketData(self.fill_model)
+        self.broker = SimulatedBroker(self)
+        self.execution = OrderExecution(self.market_data, risk_manager, broker=self.broker)
+        strategy.execution = self.execution
+        strategy.clock = self.clock
+        self.initial_cash = initial_cash
+        self.cash = initial_cash
+        self.positions: Dict[str, float] = {}
+        self.fees = 0.0
+        self.fills: List[Tuple[int, str, str, float, float, float]] = []
+        self._queue: List[Tuple[int, int, int, Any]] = []
+        self._seq = 0
+        self._unwinds: List[Tuple[int, str, str, float, float, float]] = []
+        self.risk_unwinds = 0
+        if hasattr(risk_manager, "on_unwind"):
+            risk_manager.on_unwind = self._unwind
+        risk_manager.initial_equity = risk_manager.account_equity = initial_cash
+
+    def schedule(self, time_ns: int, kind: int, payload: Any) -> None:
+        """Adds an event; events at the same time run in the order they were scheduled."""
+        self._seq += 1
+        heapq.heappush(self._queue, (time_ns, self._seq, kind, payload))
+
+    def call_at(self, time_ns: int, callback: Callable[[], None]) -> None:
+        """Runs `callback` at a simulated time (e.g. for strategy timers)."""
+        self.schedule(time_ns, TIMER, callback)
+
+    def equity(self) -> float:
+        """Cash plus positions marked at the last traded prices."""
+        last = self.market_data.last_prices
+        return self.cash + sum(quantity * last[symbol] for symbol, quantity in self.positions.items())
+
+    def _book(self, symbol: str, side: str, quantity: float, price: float) -> Tuple[int, str, str, float, float, float]:
+        fee = self.fill_model.fee(price, quantity)
+        signed = quantity if side == "buy" else -quantity
+        self.cash -= signed * price + fee
+        self.fees += fee
+        self.positions[symbol] = self.positions.get(symbol, 0.0) + signed
+        fill = (self.clock.now_ns, symbol, side, quantity, price, fee)
+        self.fills.append(fill)
+        return fill
+
+    def _unwind(self, symbol: str, signed_quantity: float) -> None:
+        """Fills a risk unwind immediately; the risk book has already closed the position."""
+        side = "buy" if signed_quantity > 0 else "sell"
+        quantity = abs(signed_quantity)
+        price = self.fill_model.fill_price(side, self.market_data.last_prices[symbol], quantity)
+        self._unwinds.append(self._book(symbol, side, quantity, price))
+        self.risk_unwinds += 1
+
+    def _dispatch(self, kind: int, payload: Any) -> None:
+        if kind == TIMER:
+            payload()
+            return
+        symbol, side, quantity, _ = payload
+        last_price = self.market_data.last_prices.get(symbol)
+        if last_price is None:
+            logging.warning(f"No price for {symbol}; order dropped.")
+            return
+        price = self.fill_model.fill_price(side, last_price, quantity)
+        fill = self._book(symbol, side, quantity, price)
+        self.risk_manager.account_equity = self.equity()
+        self.risk_manager.update_position(symbol, quantity if side == "buy" else -quantity, price)
+        on_fill = getattr(self.strategy, "on_fill", None)
+        if on_fill is not None:
+            on_fill(fill)
+            for unwind in self._unwinds:
+                on_fill(unwind)
+        self._unwinds.clear()
+
+    def _drain(self, until_ns: int) -> int:
+        queue = self._queue
+        events = 0
+        while queue and queue[0][0] <= until_ns:
+            time_ns, _, kind, payload = heapq.heappop(queue)
+            self.clock.now_ns = time_ns
+            self._dispatch(kind, payload)
+            events += 1
+        return events
+
+    def run(self, timestamps: Sequence[int], prices: Sequence[float], volumes: Sequence[float],
+            symbol_ids: Sequence[int], symbols: Sequence[str]) -> Dict[str, Any]:
+        """Replays ticks given as parallel arrays in time order.
+
+        Args:
+            timestamps (Sequence[int]): Epoch nanoseconds, non-decreasing.
+            prices (Sequence[float]): Trade prices.
+            volumes (Sequence[float]): Trade volumes.
+            symbol_ids (Sequence[int]): Index into `symbols` per tick.
+            symbols (Sequence[str]): Symbol names.
+
+        Returns:
+            Dict[str, Any]: Fills (including risk unwinds), final equity, PnL,
+                fees, positions, number of risk unwind fills, event count and throughput.
+        """
+        strategy = self.strategy
+        generate, size, execute = strategy.generate_signals, strategy.position_sizing, strategy.execute_trade
+        last_prices = self.market_data.last_prices
+        clock = self.clock
+        queue = self._queue
+        events = 0
+        start = time.perf_counter()
+        names = np.asarray(symbols, dtype=object)[np.asarray(symbol_ids, dtype=np.intp)].tolist()
+        for ts, price, volume, symbol in zip(np.asarray(timestamps).tolist(), np.asarray(prices).tolist(),
+                                             np.asarray(volumes).tolist(), names):
+            if queue and queue[0][0] <= ts:
+                events += self._drain(ts)
+            clock.now_ns = ts
+            last_prices[symbol] = price
+            signal = generate(TickRecord(ts, price, volume, symbol))
+            if signal:
+                execute(size(signal), signal)
+        events += len(timestamps) + self._drain(2 ** 63 - 1)
+        elapsed = time.perf_counter() - start
+        self.risk_manager.account_equity = equity = self.equity()
+        return {
+            "fills": pd.DataFrame(self.fills, columns=["ts", "symbol", "side", "quantity", "price", "fee"]),
+            "final_equity": equity,
+            "pnl": equity - self.initial_cash,
+            "fees": self.fees,
+            "positions": dict(self.positions),
+            "risk_unwinds": self.risk_unwinds,
+            "events": events,
+            "events_per_sec": events / elapsed if elapsed > 0 else float("inf"),
+        }
+
+    def run_store(self, reader: Any, start_ns: Optional[int] = None, end_ns: Optional[int] = None) -> Dict[str, Any]:
+        """Replays a time range from a `tick_store.TickStoreReader` without copying it."""
+        ticks = reader.time_slice(start_ns, end_ns)
+        return self.run(ticks["ts"], ticks["price"], ticks["volume"], ticks["symbol_id"], reader.symbols)
+
+    def run_frame(self, ticks: pd.DataFrame) -> Dict[str, Any]:
+        """Replays a DataFrame with timestamp (epoch ns), price, volume and symbol columns."""
+        codes, symbols = pd.factorize(ticks["symbol"])
+        return self.run(ticks["timestamp"].to_numpy(), ticks["price"].to_numpy(), ticks["volume"].to_numpy(),
+                        codes, list(symbols))
+
+
+# Unit tests
+class _Crossing:
+    """Buys 1 unit when price crosses above 100 and sells it when it crosses back.
+
+    Duck-types the `BaseStrategy` methods the backtester calls.
+    """
+
+    def __init__(self):
+        self.above = False
+        self.fills = []
+
+    def generate_signals(self, market_data):
+        above = market_data["price"] > 100
+        if above != self.above:
+            self.above = above
+            return {"symbol": market_data["symbol"], "side": "buy" if above else "sell", "price": market_data["price"]}
+        return None
+
+    def position_sizing(self, signal):
+        return 1.0
+
+    def execute_trade(self, position_size, signal):
+        self.execution.place_order(signal["symbol"], signal["side"], position_size, signal["price"])
+
+    def on_fill(self, fill):
+        self.fills.append(fill)
+
+
+def test_fills_fees_and_risk():
+    """Test that orders go through risk, fill after latency with slippage and fees, and update the book."""
+    from risk_manager import RealTimeRiskController
+    strategy = _Crossing()
+    risk = RealTimeRiskController(max_exposure=1000.0, max_drawdown=50.0)
+    backtester = EventBacktester(strategy, risk, initial_cash=1000.0,
+                                 fill_model=FillModel(fee_rate=0.01, slippage_bps=100, latency_ns=5))
+    prices = [99.0, 101.0, 102.0, 98.0, 97.0]
+    result = backtester.run([0, 10, 12, 20, 30], prices, [1.0] * 5, [0] * 5, ["BTCUSD"])
+    fills = result["fills"]
+    # Buy arrives at t=15 after the 102 tick; sell arrives at t=25 after the 98 tick
+    assert fills["ts"].tolist() == [15, 25] and fills["side"].tolist() == ["buy", "sell"], "Fill timing incorrect."
+    assert np.allclose(fills["price"], [102 * 1.01, 98 * 0.99]), "Slippage not applied."
+    assert np.allclose(result["fees"], 0.01 * (102 * 1.01 + 98 * 0.99)), "Fees not charged."
+    assert np.isclose(result["pnl"], 98 * 0.99 - 102 * 1.01 - result["fees"]), "PnL incorrect."
+    assert risk.positions["BTCUSD"]["quantity"] == 0.0 and len(strategy.fills) == 2, "Risk book or callback missed fills."
+
+
+def test_orders_rejected_by_risk_are_not_filled():
+    """Test that orders over the exposure limit never reach the broker."""
+    from risk_manager import RealTimeRiskController
+    strategy = _Crossing()
+    risk = RealTimeRiskController(max_exposure=50.0, max_drawdown=50.0)
+    result = EventBacktester(strategy, risk).run([0, 1], [99.0, 101.0], [1.0] * 2, [0] * 2, ["BTCUSD"])
+    assert len(result["fills"]) == 0, "Rejected order was filled."
+
+
+def test_risk_unwind_is_filled():
+    """Test that a fill breaching max_exposure unwinds the backtester's positions, not just the risk book."""
+    from risk_manager import RealTimeRiskController
+    strategy = _Crossing()
+    risk = RealTimeRiskController(max_exposure=103.0, max_drawdown=50.0)
+    backtester = EventBacktester(strategy, risk, initial_cash=1000.0,
+                                 fill_model=FillModel(fee_rate=0.0, slippage_bps=100, latency_ns=5))
+    # The buy passes pre-trade at 101 but fills at 102 * 1.01 = 103.02, over the gross limit
+    result = backtester.run([0, 10, 12], [99.0, 101.0, 102.0], [1.0] * 3, [0] * 3, ["BTCUSD"])
+    assert result["risk_unwinds"] == 1 and result["fills"]["side"].tolist() == ["buy", "sell"], "Unwind not filled."
+    assert result["positions"]["BTCUSD"] == 0.0 and risk.positions["BTCUSD"]["quantity"] == 0.0, "Books disagree."
+    assert np.isclose(result["pnl"], 102 * 0.99 - 102 * 1.01), "Unwind not in PnL."
+    assert len(strategy.fills) == 2, "Unwind fill not reported to the strategy."
+
+
+if __name__ == "__main__":
+    test_fills_fees_and_risk()
+    test_orders_rejected_by_risk_are_not_filled()
+    test_risk_unwind_is_filled()
+    print("All tests passed.")
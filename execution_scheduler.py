@@ -0,0 +1,359 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import random
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# send(symbol, side, quantity) -> True if the child order was accepted
+SendOrder = Callable[[str, str, float], bool]
+
+ACTIVE, DONE, CANCELLED = "active", "done", "cancelled"
+
+
+class ParentOrder:
+    """A TWAP or VWAP parent order and the state of its child slices."""
+
+    def __init__(self, order_id: str, algo: str, symbol: str, side: str, quantity: float, weights: np.ndarray,
+                 start: float, end: float, randomize: float, size_jitter: float):
+        self.order_id = order_id
+        self.algo = algo
+        self.symbol = symbol
+        self.side = side
+        self.quantity = quantity
+        self.weights = weights
+        self.start = start
+        self.end = end
+        self.randomize = randomize
+        self.size_jitter = size_jitter
+        self.sent = 0.0
+        self.rejected = 0.0
+        self.children = 0
+        self.remaining_slices = len(weights)
+        self.version = 0  # Bumped by amend; heap entries of older versions are skipped
+        self.state = ACTIVE
+        self.finished: Optional[asyncio.Future] = None
+
+    def status(self) -> Dict[str, Any]:
+        return {"order_id": self.order_id, "algo": self.algo, "symbol": self.symbol, "side": self.side,
+                "quantity": self.quantity, "sent": self.sent, "rejected": self.rejected,
+                "children": self.children, "remaining_slices": self.remaining_slices, "state": self.state}
+
+
+class ExecutionScheduler:
+    """Runs many TWAP/VWAP parent orders concurrently on one asyncio loop.
+
+    Child slices of every parent share one heap ordered by due time, served
+    by a single dispatcher task, so thousands of parents cost one timer
+    rather than one sleeping thread each. Slice times can be randomized
+    within their interval and slice sizes jittered, to make the schedule
+    harder to detect. Lateness of each dispatch against its due time is
+    recorded and summarized by `jitter_stats`.
+
+    `orders` holds active parents only; finished ones move to a history of
+    the last `keep_finished`, which `status` and `wait` still answer from.
+
+    Args:
+        send (Callable): Sends a child order as send(symbol, side, quantity)
+            and returns whether it was accepted, e.g. a wrapper around
+            `OrderExecution.place_order`.
+        seed (int, optional): Seed for randomization.
+        keep_finished (int): Finished parents kept for `status` and `wait`.
+    """
+
+    def __init__(self, send: SendOrder, seed: Optional[int] = None, keep_finished: int = 1000):
+        self.send = send
+        self.keep_finished = keep_finished
+        self.orders: Dict[str, ParentOrder] = {}
+        self.finished: "OrderedDict[str, ParentOrder]" = OrderedDict()
+        self._heap: List[Tuple[float, int, str, int, float]] = []
+        self._seq = itertools.count()
+        self._ids = itertools.count(1)
+        self._rng = random.Random(seed)
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._lateness: List[float] = []
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    async def start(self) -> None:
+        """Starts the dispatcher on the running loop."""
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._dispatch())
+
+    async def stop(self) -> None:
+        """Stops the dispatcher; unsent slices stay unsent."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def submit_twap(self, symbol: str, side: str, quantity: float, duration: float, slices: int = 10,
+                    randomize: float = 0.0, size_jitter: float = 0.0) -> str:
+        """Schedules equal slices over `duration` seconds.
+
+        Args:
+            symbol (str): Trading pair symbol.
+            side (str): "buy" or "sell".
+            quantity (float): Total quantity.
+            duration (float): Seconds from now until the last slice.
+            slices (int): Number of child orders.
+            randomize (float): Fraction of the slice interval by which each
+                child may be sent early, 0 to 1.
+            size_jitter (float): Fraction by which each child's size may vary,
+                0 to 1; sizes are rescaled to add up to `quantity`.
+
+        Returns:
+            str: Parent order id.
+        """
+        return self._submit("twap", symbol, side, quantity, duration, np.full(slices, 1.0 / slices),
+                            randomize, size_jitter)
+
+    def submit_vwap(self, symbol: str, side: str, quantity: float, duration: float,
+                    volume_profile: Sequence[float], randomize: float = 0.0, size_jitter: float = 0.0) -> str:
+        """Schedules slices sized by a volume profile, one per profile bucket, over `duration` seconds.
+
+        Args:
+            volume_profile (Sequence[float]): Expected volume per bucket.
+
+        Returns:
+            str: Parent order id.
+        """
+        profile = np.asarray(volume_profile, dtype=float)
+        return self._submit("vwap", symbol, side, quantity, duration, profile / profile.sum(), randomize, size_jitter)
+
+    def _submit(self, algo: str, symbol: str, side: str, quantity: float, duration: float, weights: np.ndarray,
+                randomize: float, size_jitter: float) -> str:
+        if self._task is None:
+            raise RuntimeError("Scheduler is not running; await start() first.")
+        now = asyncio.get_running_loop().time()
+        order = ParentOrder(f"{algo}-{next(self._ids)}", algo, symbol, side, quantity, weights, now, now + duration,
+                            randomize, size_jitter)
+        order.finished = asyncio.get_running_loop().create_future()
+        self.orders[order.order_id] = order
+        self._schedule(order)
+        return order.order_id
+
+    def _schedule(self, order: ParentOrder) -> None:
+        """Pushes the remaining slices of `order`, spread from its start to its end."""
+        n = order.remaining_slices
+        remaining = order.quantity - order.sent - order.rejected
+        weights = order.weights[-n:] / order.weights[-n:].sum()
+        interval = (order.end - order.start) / n
+        sizes = remaining * weights
+        if order.size_jitter:
+            jitter = min(order.size_jitter, 1.0)
+            sizes *= [1 + self._rng.uniform(-jitter, jitter) for _ in range(n)]
+            sizes *= remaining / sizes.sum()  # Rescale so the children add up to the parent exactly
+        for i in range(n):
+            offset = (i + 1) * interval
+            if order.randomize:
+                offset += self._rng.uniform(-order.randomize, 0.0) * interval
+            heapq.heappush(self._heap, (order.start + offset, next(self._seq), order.order_id, order.version,
+                                        float(sizes[i])))
+        self._wake.set()
+
+    def cancel(self, order_id: str) -> bool:
+        """Cancels the unsent slices of a parent order.
+
+        Returns:
+            bool: False if the order is unknown or already finished.
+        """
+        order = self.orders.get(order_id)
+        if order is None or order.state != ACTIVE:
+            return False
+        self._finish(order, CANCELLED)
+        return True
+
+    def amend(self, order_id: str, quantity: Optional[float] = None, duration: Optional[float] = None) -> bool:
+        """Changes the total quantity and/or the remaining duration of an active parent order.
+
+        The unsent quantity is rescheduled over the same number of remaining
+        slices, from now until the new end time.
+
+        Args:
+            order_id (str): Parent order id.
+            quantity (float, optional): New total quantity, including what was already sent.
+            duration (float, optional): New number of seconds from now until the last slice.
+
+        Returns:
+            bool: False if the order is unknown or already finished.
+        """
+        order = self.orders.get(order_id)
+        if order is None or order.state != ACTIVE:
+            return False
+        now = asyncio.get_running_loop().time()
+        order.version += 1
+        if quantity is not None:
+            order.quantity = quantity
+        if duration is not None:
+            order.end = now + duration
+        order.start = now
+        if order.quantity - order.sent - order.rejected <= 0 or order.remaining_slices == 0:
+            self._finish(order, DONE)
+        else:
+            self._schedule(order)
+        return True
+
+    def _order(self, order_id: str) -> ParentOrder:
+        order = self.orders.get(order_id)
+        return order if order is not None else self.finished[order_id]
+
+    def status(self, order_id: str) -> Dict[str, Any]:
+        """Returns progress of an active or recently finished parent order."""
+        return self._order(order_id).status()
+
+    async def wait(self, order_id: str) -> Dict[str, Any]:
+        """Waits until a parent order is done or cancelled and returns its status."""
+        order = self._order(order_id)
+        await asyncio.shield(order.finished)
+        return order.status()
+
+    def jitter_stats(self) -> Dict[str, float]:
+        """Returns dispatch lateness statistics in milliseconds."""
+        if not self._lateness:
+            return {"count": 0, "mean_ms": 0.0, "p50_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+        late = np.asarray(self._lateness) * 1e3
+        return {"count": len(late), "mean_ms": float(late.mean()), "p50_ms": float(np.percentile(late, 50)),
+                "p99_ms": float(np.percentile(late, 99)), "max_ms": float(late.max())}
+
+    def _finish(self, order: ParentOrder, state: str) -> None:
+        order.state = state
+        order.version += 1
+        if not order.finished.done():
+            order.finished.set_result(state)
+        if self.orders.pop(order.order_id, None) is not None:
+            self.finished[order.order_id] = order
+            while len(self.finished) > self.keep_finished:
+                self.finished.popitem(last=False)
+
+    async def _dispatch(self) -> None:
+        loop = asyncio.get_running_loop()
+        heap = self._heap
+        while True:
+            if not heap:
+                self._wake.clear()
+                await self._wake.wait()
+                continue
+            delay = heap[0][0] - loop.time()
+            if delay > 0:
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            now = loop.time()
+            while heap and heap[0][0] <= now:
+                due, _, order_id, version, size = heapq.heappop(heap)
+                order = self.orders.get(order_id)
+                if order is None or version != order.version:
+                    continue  # Finished, cancelled or amended
+                self._lateness.append(now - due)
+                order.remaining_slices -= 1
+                order.children += 1
+                try:
+                    accepted = self.send(order.symbol, order.side, size)
+                except Exception as e:
+                    logging.error(f"Child order of {order_id} failed: {e}")
+                    accepted = False
+                if accepted:
+                    order.sent += size
+                else:
+                    order.rejected += size
+                if order.remaining_slices == 0:
+                    self._finish(order, DONE)
+            await asyncio.sleep(0)  # Let other tasks run between bursts
+
+
+# Unit tests
+def test_concurrent_twap_and_vwap():
+    """Test many parents in parallel, exact totals with jitter, VWAP weights and lateness stats."""
+    sent = []
+
+    async def scenario():
+        scheduler = ExecutionScheduler(lambda symbol, side, quantity: sent.append((symbol, quantity)) or True, seed=1)
+        await scheduler.start()
+        ids = [scheduler.submit_twap(f"S{i}", "buy", 10.0, 0.2, slices=5, randomize=0.5, size_jitter=0.2)
+               for i in range(1000)]
+        vwap = scheduler.submit_vwap("V", "sell", 6.0, 0.2, [1, 2, 3])
+        start = asyncio.get_running_loop().time()
+        statuses = await asyncio.gather(*(scheduler.wait(order_id) for order_id in ids + [vwap]))
+        elapsed = asyncio.get_running_loop().time() - start
+        await scheduler.stop()
+        return scheduler, statuses, elapsed
+
+    scheduler, statuses, elapsed = asyncio.run(scenario())
+    assert elapsed < 1.0, "Parent orders did not run concurrently."
+    assert all(s["state"] == DONE and s["children"] in (5, 3) for s in statuses), "Slices missing."
+    assert all(abs(s["sent"] - s["quantity"]) < 1e-9 for s in statuses), "Jittered sizes do not sum to the parent."
+    assert [q for symbol, q in sent if symbol == "V"] == [1.0, 2.0, 3.0], "VWAP slices not sized by profile."
+    assert scheduler.jitter_stats()["count"] == 5003, "Lateness not recorded per child."
+
+
+def test_size_jitter_never_overfills():
+    """Test that heavily jittered slices still add up to each parent's quantity."""
+    sizes = {}
+
+    async def scenario():
+        scheduler = ExecutionScheduler(lambda symbol, side, quantity: sizes.setdefault(symbol, []).append(quantity)
+                                       or True, seed=7)
+        await scheduler.start()
+        ids = [scheduler.submit_twap(f"S{i}", "buy", 10.0, 0.05, slices=20, size_jitter=0.5) for i in range(200)]
+        await asyncio.gather(*(scheduler.wait(order_id) for order_id in ids))
+        await scheduler.stop()
+
+    asyncio.run(scenario())
+    assert all(np.isclose(sum(children), 10.0) for children in sizes.values()), "Parent over- or underfilled."
+    assert all(min(children) > 0 for children in sizes.values()), "Non-positive child size."
+    assert np.std(sizes["S0"]) > 0.05, "Sizes not jittered."
+
+
+def test_cancel_and_amend():
+    """Test that cancel stops slices and amend reschedules the unsent quantity."""
+    sent = []
+
+    async def scenario():
+        scheduler = ExecutionScheduler(lambda symbol, side, quantity: sent.append((symbol, quantity)) or True)
+        await scheduler.start()
+        cancelled = scheduler.submit_twap("C", "buy", 10.0, 0.6, slices=3)
+        amended = scheduler.submit_twap("A", "buy", 10.0, 0.3, slices=2)
+        await asyncio.sleep(0.25)  # Past the first slice of both
+        assert scheduler.cancel(cancelled) and not scheduler.cancel(cancelled)
+        assert scheduler.amend(amended, quantity=20.0, duration=0.05)
+        result = await scheduler.wait(amended)
+        await scheduler.stop()
+        return scheduler.status(cancelled), result
+
+    cancelled, amended = asyncio.run(scenario())
+    assert cancelled["state"] == CANCELLED and cancelled["children"] == 1, "Cancel did not stop the slices."
+    assert [q for symbol, q in sent if symbol == "A"] == [5.0, 15.0], "Amend did not reschedule the remainder."
+    assert amended["sent"] == 20.0 and amended["state"] == DONE, "Amended order incomplete."
+
+
+def test_finished_orders_pruned():
+    """Test that finished parents leave `orders` and only the last `keep_finished` are kept."""
+    async def scenario():
+        scheduler = ExecutionScheduler(lambda symbol, side, quantity: True, keep_finished=2)
+        await scheduler.start()
+        ids = [scheduler.submit_twap("A", "buy", 1.0, 0.01, slices=2) for _ in range(5)]
+        await asyncio.gather(*(scheduler.wait(order_id) for order_id in ids))
+        await scheduler.stop()
+        return scheduler, ids
+
+    scheduler, ids = asyncio.run(scenario())
+    assert not scheduler.orders and list(scheduler.finished) == ids[-2:], "Finished parents not pruned."
+    assert scheduler.status(ids[-1])["state"] == DONE, "Recent finished parent not queryable."
+
+
+if __name__ == "__main__":
+    test_concurrent_twap_and_vwap()
+    test_size_jitter_never_overfills()
+    test_cancel_and_amend()
+    test_finished_orders_pruned()
+    print("All tests passed.")
@@ -0,0 +1,153 @@
+import json
+import time
+from typing import Any, Callable, Dict, List, Optional, Union
+
+try:
+    import msgspec
+except ImportError:  # Optional fast path
+    msgspec = None
+
+try:
+    import orjson
+except ImportError:  # Optional fast path
+    orjson = None
+
+Raw = Union[str, bytes]
+
+# Fastest available generic JSON parser, for payloads that are not trades.
+loads: Callable[[Raw], Any] = orjson.loads if orjson is not None else json.loads
+
+
+class TickRecord:
+    """Compact trade tick: timestamp, price, volume and symbol.
+
+    Uses `__slots__` instead of a per-tick dict. Item access (`tick["price"]`,
+    `tick.get("volume")`) is kept so handlers written for the normalized
+    dicts of `MarketDataProcessor.normalize_data` keep working.
+    """
+
+    __slots__ = ("timestamp", "price", "volume", "symbol")
+
+    def __init__(self, timestamp: Any, price: float, volume: float, symbol: str):
+        self.timestamp = timestamp
+        self.price = price
+        self.volume = volume
+        self.symbol = symbol
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key, default)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"timestamp": self.timestamp, "price": self.price, "volume": self.volume, "symbol": self.symbol}
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, TickRecord):
+            other = other.as_dict()
+        return self.as_dict() == other
+
+    def __repr__(self) -> str:
+        return f"TickRecord({self.as_dict()})"
+
+
+def _from_mapping(data: Dict[str, Any]) -> TickRecord:
+    volume = data.get("v")
+    if volume is None:
+        volume = data.get("q", 0)
+    return TickRecord(data.get("T", time.time()), float(data["p"]), float(volume), data.get("s", "UNKNOWN"))
+
+
+class TickDecoder:
+    """Decodes raw websocket frames straight into `TickRecord`s.
+
+    Accepts a single trade object, an array of trades (batched frames) or a
+    combined-stream envelope (`{"stream": ..., "data": ...}`). Frames without
+    a price, such as subscription acknowledgements, yield no ticks.
+
+    The backend is msgspec when installed (typed decoding with no
+    intermediate dict), otherwise orjson, otherwise the stdlib `json` module.
+    """
+
+    def __init__(self, backend: Optional[str] = None):
+        available = [name for name, module in (("msgspec", msgspec), ("orjson", orjson)) if module is not None]
+        backend = backend or (available[0] if available else "json")
+        if backend not in available + ["json"]:
+            raise ValueError(f"JSON backend not available: {backend}")
+        self.backend = backend
+        self._loads = {"orjson": loads, "json": json.loads}.get(backend, loads)
+        if backend == "msgspec":
+            self._typed = msgspec.json.Decoder(Union[_TradeMessage, List[_TradeMessage]], strict=False)
+
+    def decode(self, raw: Raw) -> List[TickRecord]:
+        """Decodes one frame.
+
+        Args:
+            raw (Union[str, bytes]): Frame as received from the websocket.
+
+        Returns:
+            List[TickRecord]: Trades in the frame, in order.
+
+        Raises:
+            ValueError: If the frame is not valid JSON.
+        """
+        if self.backend == "msgspec":
+            try:
+                decoded = self._typed.decode(raw)
+            except msgspec.ValidationError:
+                pass  # Envelopes and control frames take the generic path
+            else:
+                trades = decoded if isinstance(decoded, list) else [decoded]
+                return [TickRecord(t.T if t.T is not None else time.time(), t.p, t.v if t.v is not None else t.q,
+                                   t.s) for t in trades]
+        data = self._loads(raw)
+        if isinstance(data, dict) and "data" in data and "p" not in data:
+            data = data["data"]
+        if isinstance(data, list):
+            return [_from_mapping(item) for item in data if isinstance(item, dict) and "p" in item]
+        if isinstance(data, dict) and "p" in data:
+            return [_from_mapping(data)]
+        return []
+
+
+if msgspec is not None:
+    class _TradeMessage(msgspec.Struct):
+        p: float
+        s: str = "UNKNOWN"
+        T: Optional[Union[int, float]] = None
+        v: Optional[float] = None
+        q: float = 0.0
+
+
+# Unit tests
+def test_decode_formats():
+    """Test single, batched, enveloped and control frames on every backend."""
+    backends = ["json"] + [name for name, module in (("orjson", orjson), ("msgspec", msgspec)) if module]
+    for backend in backends:
+        decoder = TickDecoder(backend)
+        single = decoder.decode('{"T": 1640995200, "p": "45000", "v": "1.5", "s": "BTCUSD"}')
+        assert single == [{"timestamp": 1640995200, "price": 45000.0, "volume": 1.5, "symbol": "BTCUSD"}], \
+            f"{backend}: single trade decoded incorrectly."
+        batch = decoder.decode(b'[{"T": 1, "p": "1", "q": "2", "s": "A"}, {"T": 2, "p": "3", "q": "4", "s": "B"}]')
+        assert [(t.symbol, t.price, t.volume) for t in batch] == [("A", 1.0, 2.0), ("B", 3.0, 4.0)], \
+            f"{backend}: batched frame decoded incorrectly."
+        envelope = decoder.decode('{"stream": "btcusdt@trade", "data": {"T": 5, "p": "9", "q": "1", "s": "BTCUSDT"}}')
+        assert envelope[0]["price"] == 9.0, f"{backend}: envelope not unwrapped."
+        assert decoder.decode('{"result": null, "id": 1}') == [], f"{backend}: control frame produced a tick."
+
+
+def test_tick_record_is_compact():
+    """Test that ticks carry no per-instance dict."""
+    tick = TickRecord(1, 2.0, 3.0, "BTCUSD")
+    assert not hasattr(tick, "__dict__"), "TickRecord allocates a __dict__."
+    assert tick.get("volume") == 3.0 and tick.get("missing", 0) == 0, "Mapping access broken."
+
+
+if __name__ == "__main__":
+    test_decode_formats()
+    test_tick_record_is_compact()
+    print("All tests passed.")
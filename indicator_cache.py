@@ -0,0 +1,182 @@
+import hashlib
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+import numpy as np
+
+DEFAULT_BUDGET_BYTES = 256 * 1024 * 1024
+
+
+def fingerprint(values: Any) -> str:
+    """Returns a content hash of an array (or Series/DataFrame values) with its dtype and shape."""
+    values = np.ascontiguousarray(getattr(values, "values", values))
+    digest = hashlib.sha1(values.data, usedforsecurity=False)
+    digest.update(f"{values.dtype.str}{values.shape}".encode())
+    return digest.hexdigest()
+
+
+def _sizeof(value: Any) -> int:
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(_sizeof(v) for v in value.values())
+    if isinstance(value, (tuple, list)):
+        return sys.getsizeof(value) + sum(_sizeof(v) for v in value)
+    nbytes = getattr(value, "nbytes", None)
+    return int(nbytes) if nbytes is not None else sys.getsizeof(value)
+
+
+def _freeze(value: Any) -> Any:
+    """Makes cached arrays read-only so a caller cannot corrupt later hits."""
+    if isinstance(value, np.ndarray):
+        value.setflags(write=False)
+    elif isinstance(value, tuple):
+        for item in value:
+            _freeze(item)
+    return value
+
+
+class IndicatorCache:
+    """Thread-safe LRU cache of indicator results under a memory budget.
+
+    Entries are keyed by (data key, indicator name, parameters). The data key
+    is either supplied by the caller, e.g. (symbol, start, end) for a stored
+    range, or a content fingerprint of the input array. Least recently used
+    entries are evicted once the cached results exceed `budget_bytes`;
+    results larger than the whole budget are returned but not stored.
+
+    Args:
+        budget_bytes (int): Maximum total size of cached results.
+    """
+
+    def __init__(self, budget_bytes: int = DEFAULT_BUDGET_BYTES):
+        self.budget_bytes = budget_bytes
+        self._entries: "OrderedDict[Hashable, Tuple[Any, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_compute(self, name: str, params: Tuple[Any, ...], data: Any, compute: Callable[[], Any],
+                       data_key: Optional[Hashable] = None) -> Any:
+        """Returns a cached indicator result, computing and storing it on a miss.
+
+        Args:
+            name (str): Indicator name, e.g. "rolling_mean".
+            params (Tuple[Any, ...]): Indicator parameters.
+            data (Any): Input array; fingerprinted when `data_key` is not given.
+            compute (Callable[[], Any]): Computes the result on a miss.
+            data_key (Hashable, optional): Caller identity of the data, such as
+                (symbol, start, end), to skip fingerprinting.
+
+        Returns:
+            Any: The result. Cached arrays are read-only.
+        """
+        key = (data_key if data_key is not None else fingerprint(data), name, params)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+        value = _freeze(compute())
+        size = _sizeof(value)
+        if size <= self.budget_bytes:
+            with self._lock:
+                if key not in self._entries:
+                    self._entries[key] = (value, size)
+                    self.bytes += size
+                    while self.bytes > self.budget_bytes:
+                        _, (_, evicted) = self._entries.popitem(last=False)
+                        self.bytes -= evicted
+                        self.evictions += 1
+        return value
+
+    def clear(self) -> None:
+        """Drops every entry; counters are kept."""
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self) -> Dict[str, float]:
+        """Returns hit/miss counters, hit rate, evictions and memory use."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / lookups if lookups else 0.0,
+                    "evictions": self.evictions, "entries": len(self._entries), "bytes": self.bytes}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+_default_cache = IndicatorCache()
+
+
+def get_cache() -> IndicatorCache:
+    """Returns the process-wide indicator cache."""
+    return _default_cache
+
+
+def rolling_mean(values: Any, window: int, cache: Optional[IndicatorCache] = None,
+                 data_key: Optional[Hashable] = None) -> np.ndarray:
+    """Cached trailing mean of a 1-D array or Series, NaN until the window is full.
+
+    Args:
+        values (Any): Prices as an array or Series.
+        window (int): Window length.
+        cache (IndicatorCache, optional): Cache to use. Defaults to the process-wide one.
+        data_key (Hashable, optional): Caller identity of the data.
+
+    Returns:
+        np.ndarray: Read-only means, same length as `values`.
+    """
+    array = np.asarray(getattr(values, "values", values), dtype=np.float64)
+
+    def compute():
+        import pandas as pd
+        return pd.Series(array).rolling(window=window).mean().to_numpy()
+
+    cache = cache if cache is not None else _default_cache
+    return cache.get_or_compute("rolling_mean", (window,), array, compute, data_key)
+
+
+# Unit tests
+def test_hits_misses_and_keys():
+    """Test that identical inputs hit, different data or params miss, and results are read-only."""
+    cache = IndicatorCache()
+    prices = np.arange(100, dtype=float)
+    first = rolling_mean(prices, 20, cache)
+    again = rolling_mean(prices.copy(), 20, cache)
+    assert first is again, "Identical data did not hit."
+    rolling_mean(prices, 50, cache)
+    rolling_mean(prices + 1, 20, cache)
+    rolling_mean(prices, 20, cache, data_key=("BTCUSDT", 0, 100))
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 4, "Unexpected hit/miss counts."
+    assert np.isnan(first[18]) and first[19] == 9.5, "Rolling mean incorrect."
+    assert not first.flags.writeable, "Cached array is writeable."
+
+
+def test_lru_eviction_under_budget():
+    """Test that least recently used entries are evicted to stay within the budget."""
+    cache = IndicatorCache(budget_bytes=3 * 800)
+    arrays = [np.full(100, float(i)) for i in range(4)]
+    for i in range(3):
+        cache.get_or_compute("copy", (), arrays[i], arrays[i].copy)
+    cache.get_or_compute("copy", (), arrays[0], arrays[0].copy)  # Refresh entry 0
+    cache.get_or_compute("copy", (), arrays[3], arrays[3].copy)  # Evicts entry 1
+    assert cache.bytes <= cache.budget_bytes and cache.evictions == 1, "Budget not enforced."
+    cache.get_or_compute("copy", (), arrays[0], arrays[0].copy)
+    cache.get_or_compute("copy", (), arrays[1], arrays[1].copy)
+    assert cache.stats()["hits"] == 2 and cache.stats()["misses"] == 5, "Wrong entry evicted."
+    cache.get_or_compute("big", (), arrays[0], lambda: np.zeros(1000))
+    assert cache.stats()["entries"] == 3, "Oversized result was stored."
+
+
+if __name__ == "__main__":
+    test_hits_misses_and_keys()
+    test_lru_eviction_under_budget()
+    print("All tests passed.")
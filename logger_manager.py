@@ -9,7 +9,9 @@ from flask import Flask, render\_template, request, jsonify
 import threading  
 import smtplib  
 from email.mime.text import MIMEText  
-from email.mime.multipart import MIMEMultipart
+from email.mime.multipart import MIMEMultipart  
+from price\_client import get\_client  
+from storage import get\_storage
 
 \# Configure logging  
 logging.basicConfig(level=logging.INFO, format='%(asctime)s \- %(levelname)s \- %(message)s', filename='trading\_bot.log')
@@ -28,38 +30,7 @@ app \= Flask(\_\_name\_\_)
 \# Initialize database  
 def initialize\_database():  
     """Create the database and tables if not already present."""  
-    conn \= sqlite3.connect(DB\_NAME)  
-    cursor \= conn.cursor()  
-    \# Table for price data  
-    cursor.execute("""  
-        CREATE TABLE IF NOT EXISTS price\_data (  
-            id INTEGER PRIMARY KEY AUTOINCREMENT,  
-            timestamp TEXT NOT NULL,  
-            price REAL NOT NULL  
-        )  
-    """)  
-    \# Table for trading signals  
-    cursor.execute("""  
-        CREATE TABLE IF NOT EXISTS trading\_signals (  
-            id INTEGER PRIMARY KEY AUTOINCREMENT,  
-            timestamp TEXT NOT NULL,  
-            signal TEXT NOT NULL  
-        )  
-    """)  
-    \# Table for positions  
-    cursor.execute("""  
-        CREATE TABLE IF NOT EXISTS positions (  
-            id INTEGER PRIMARY KEY AUTOINCREMENT,  
-            timestamp TEXT NOT NULL,  
-            symbol TEXT NOT NULL,  
-            entry\_price REAL NOT NULL,  
-            position\_size REAL NOT NULL,  
-            stop\_loss REAL NOT NULL,  
-            status TEXT NOT NULL  
-        )  
-    """)  
-    conn.commit()  
-    conn.close()
+    get\_storage(DB\_NAME).initialize(\["price\_data", "trading\_signals", "positions"\])
 
 \# Error handling and recovery  
 class ErrorHandler:  
@@ -102,22 +73,16 @@ class ErrorHandler:
 @app.route('/')  
 def dashboard():  
     """Render the dashboard with real-time data."""  
-    conn \= sqlite3.connect(DB\_NAME)  
-    cursor \= conn.cursor()
+    storage \= get\_storage(DB\_NAME)
 
     \# Fetch active positions  
-    cursor.execute("SELECT \* FROM positions WHERE status \= 'open'")  
-    active\_positions \= cursor.fetchall()
+    active\_positions \= storage.query("SELECT \* FROM positions WHERE status \= 'open'")
 
     \# Fetch recent trading signals  
-    cursor.execute("SELECT \* FROM trading\_signals ORDER BY timestamp DESC LIMIT 10")  
-    recent\_signals \= cursor.fetchall()
+    recent\_signals \= storage.query("SELECT \* FROM trading\_signals ORDER BY timestamp DESC LIMIT 10")
 
     \# Fetch latest price data  
-    cursor.execute("SELECT \* FROM price\_data ORDER BY timestamp DESC LIMIT 1")  
-    latest\_price \= cursor.fetchone()
-
-    conn.close()
+    latest\_price \= storage.query\_one("SELECT \* FROM price\_data WHERE symbol \= ? ORDER BY ts DESC LIMIT 1", (SYMBOL,))
 
     return render\_template('dashboard.html',   
                            active\_positions=active\_positions,  
@@ -153,11 +118,7 @@ def health():
 def fetch\_price():  
     """Fetch the current price of BTC/USDT from Binance."""  
     try:  
-        response \= requests.get(API\_URL, params={"symbol": SYMBOL})  
-        response.raise\_for\_status()  
-        data \= response.json()  
-        price \= float(data\["price"\])  
-        return price  
+        return get\_client(API\_URL).fetch\_price(SYMBOL)  
     except requests.exceptions.RequestException as e:  
         ErrorHandler.log\_error(f"Error fetching price data: {e}")  
         ErrorHandler.send\_notification("API Error", f"Error fetching price data: {e}")  
@@ -167,20 +128,10 @@ def fetch\_price():
 def save\_to\_database(table, data):  
     """Save data to the specified table in the local database."""  
     try:  
-        conn \= sqlite3.connect(DB\_NAME)  
-        cursor \= conn.cursor()  
-        if table \== "price\_data":  
-            cursor.execute("INSERT INTO price\_data (timestamp, price) VALUES (?, ?)", data)  
-        elif table \== "trading\_signals":  
-            cursor.execute("INSERT INTO trading\_signals (timestamp, signal) VALUES (?, ?)", data)  
-        elif table \== "positions":  
-            cursor.execute("INSERT INTO positions (timestamp, symbol, entry\_price, position\_size, stop\_loss, status) VALUES (?, ?, ?, ?, ?, ?)", data)  
-        conn.commit()  
+        get\_storage(DB\_NAME).save(table, data)  
     except sqlite3.Error as e:  
         ErrorHandler.log\_error(f"Error saving data to database: {e}")  
-        ErrorHandler.send\_notification("Database Error", f"Error saving data to database: {e}")  
-    finally:  
-        conn.close()
+        ErrorHandler.send\_notification("Database Error", f"Error saving data to database: {e}")
 
 \# Start Flask app  
 if \_\_name\_\_ \== "\_\_main\_\_":  
@@ -2,9 +2,11 @@ import time
 import logging
 import sqlite3
 from datetime import datetime, timedelta
-import requests
-import pandas as pd
 import unittest
+from price_client import get_client
+from storage import get_storage, now_ns, to_epoch_ns
+from streaming_indicators import MovingAverageCrossover
+from tick_writer import TickWriter
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -20,93 +22,54 @@ ACCOUNT_BALANCE = 10000  # Example account balance in USD
 # Database setup
 def initialize_database():
     """Create the database and tables if not already present."""
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    # Table for price data
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS price_data (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            timestamp TEXT NOT NULL,
-            price REAL NOT NULL
-        )
-    """)
-    # Table for trading signals
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS trading_signals (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            timestamp TEXT NOT NULL,
-            signal TEXT NOT NULL
-        )
-    """)
-    # Table for positions
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS positions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            timestamp TEXT NOT NULL,
-            symbol TEXT NOT NULL,
-            entry_price REAL NOT NULL,
-            position_size REAL NOT NULL,
-            stop_loss REAL NOT NULL,
-            status TEXT NOT NULL
-        )
-    """)
-    conn.commit()
-    conn.close()
+    get_storage(DB_NAME).initialize(["price_data", "trading_signals", "positions"])
 
 # Fetch price data
 def fetch_price():
     """Fetch the current price of BTC/USDT from Binance."""
-    try:
-        response = requests.get(API_URL, params={"symbol": SYMBOL})
-        response.raise_for_status()
-        data = response.json()
-        price = float(data["price"])
-        return price
-    except requests.exceptions.RequestException as e:
-        logging.error(f"Error fetching price data: {e}")
-        return None
+    return get_client(API_URL).get_price(SYMBOL)
 
 # Save to database
 def save_to_database(table, data):
     """Save data to the specified table in the local database."""
     try:
-        conn = sqlite3.connect(DB_NAME)
-        cursor = conn.cursor()
-        if table == "price_data":
-            cursor.execute("INSERT INTO price_data (timestamp, price) VALUES (?, ?)", data)
-        elif table == "trading_signals":
-            cursor.execute("INSERT INTO trading_signals (timestamp, signal) VALUES (?, ?)", data)
-        elif table == "positions":
-            cursor.execute("INSERT INTO positions (timestamp, symbol, entry_price, position_size, stop_loss, status) VALUES (?, ?, ?, ?, ?, ?)", data)
-        conn.commit()
+        get_storage(DB_NAME).save(table, data)
     except sqlite3.Error as e:
         logging.error(f"Error saving data to database: {e}")
-    finally:
-        conn.close()
+
+# Streaming moving averages and last signal, per symbol
+_ma_trackers = {}
+_last_signals = {}
+
+def get_ma_tracker(symbol=SYMBOL):
+    """Return the symbol's streaming 20/50 MA tracker, warming it up from the database once."""
+    tracker = _ma_trackers.get(symbol)
+    if tracker is None:
+        tracker = MovingAverageCrossover(20, 50)
+        try:
+            rows = get_storage(DB_NAME).fetch_latest("price_data", symbol, tracker.long.window)
+            tracker.warm_up(price for _, price in reversed(rows))
+        except sqlite3.Error as e:
+            logging.error(f"Error reading data from database: {e}")
+            return tracker
+        _ma_trackers[symbol] = tracker
+    return tracker
 
 # Calculate moving averages
 def calculate_moving_averages():
-    """Calculate 20-day and 50-day moving averages from the database."""
-    try:
-        conn = sqlite3.connect(DB_NAME)
-        cursor = conn.cursor()
-        cursor.execute("SELECT timestamp, price FROM price_data ORDER BY timestamp DESC LIMIT 50")
-        rows = cursor.fetchall()
-        conn.close()
-        if len(rows) < 50:
-            logging.warning("Not enough data for calculating moving averages.")
-            return None, None
-
-        # Convert to DataFrame for calculation
-        df = pd.DataFrame(rows, columns=["timestamp", "price"])
-        df["price"] = df["price"].astype(float)
-        df["20_MA"] = df["price"].rolling(window=20).mean()
-        df["50_MA"] = df["price"].rolling(window=50).mean()
-
-        return df.iloc[-1]["20_MA"], df.iloc[-1]["50_MA"]
-    except sqlite3.Error as e:
-        logging.error(f"Error reading data from database: {e}")
+    """Return the current 20-day and 50-day moving averages."""
+    ma_20, ma_50 = get_ma_tracker(SYMBOL).values()
+    if ma_20 is None or ma_50 is None:
+        logging.warning("Not enough data for calculating moving averages.")
         return None, None
+    return ma_20, ma_50
+
+def get_last_signal(symbol=SYMBOL):
+    """Return the last generated signal, reading it from the database only once."""
+    if symbol not in _last_signals:
+        row = get_storage(DB_NAME).query_one("SELECT signal FROM trading_signals ORDER BY timestamp DESC LIMIT 1")
+        _last_signals[symbol] = row[0] if row else None
+    return _last_signals[symbol]
 
 # Position sizing and risk management
 def calculate_position_size(entry_price, stop_loss):
@@ -123,24 +86,25 @@ def add_position(symbol, entry_price, stop_loss):
     return position_size
 
 # Generate trading signals and manage positions
-def generate_trading_signal():
-    """Generate buy/sell signals based on moving average crossover and manage positions."""
+def generate_trading_signal(price=None):
+    """Generate buy/sell signals based on moving average crossover and manage positions.
+
+    If `price` is given it is added to the streaming averages first, so the
+    signal is computed in constant time without reading the database.
+    """
+    if price is not None:
+        get_ma_tracker(SYMBOL).update(price)
     ma_20, ma_50 = calculate_moving_averages()
     if ma_20 is None or ma_50 is None:
         return
 
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    cursor.execute("SELECT signal FROM trading_signals ORDER BY timestamp DESC LIMIT 1")
-    last_signal = cursor.fetchone()
-    last_signal = last_signal[0] if last_signal else None
-    conn.close()
+    last_signal = get_last_signal(SYMBOL)
 
     signal = None
     if ma_20 > ma_50 and last_signal != "BUY":
         signal = "BUY"
         stop_loss = ma_50  # Example: Use 50-day MA as stop-loss
-        entry_price = fetch_price()
+        entry_price = price if price is not None else fetch_price()
         if entry_price:
             add_position(SYMBOL, entry_price, stop_loss)
         logging.info("Generated BUY signal.")
@@ -151,19 +115,25 @@ def generate_trading_signal():
     if signal:
         timestamp = datetime.utcnow().isoformat()
         save_to_database("trading_signals", (timestamp, signal))
+        _last_signals[SYMBOL] = signal
 
 # Main trading bot logic
 def run_trading_bot():
     """Run the trading bot to fetch and log price data."""
     initialize_database()
-    while True:
-        price = fetch_price()
-        if price is not None:
-            timestamp = datetime.utcnow().isoformat()
-            logging.info(f"Fetched price: {price} at {timestamp}")
-            save_to_database("price_data", (timestamp, price))
-            generate_trading_signal()
-        time.sleep(60 / RATE_LIMIT)
+    get_ma_tracker(SYMBOL)  # Warm up from history before new ticks arrive
+    writer = TickWriter(get_storage(DB_NAME)).start()
+    try:
+        while True:
+            price = fetch_price()
+            if price is not None:
+                timestamp = datetime.utcnow().isoformat()
+                logging.info(f"Fetched price: {price} at {timestamp}")
+                writer.submit("price_data", (SYMBOL, now_ns(), price))
+                generate_trading_signal(price)
+            time.sleep(60 / RATE_LIMIT)
+    finally:
+        writer.close()
 
 # Unit tests
 class TestTradingBot(unittest.TestCase):
@@ -173,10 +143,11 @@ class TestTradingBot(unittest.TestCase):
         self.cursor = self.conn.cursor()
         self.cursor.execute("""
             CREATE TABLE price_data (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp TEXT NOT NULL,
-                price REAL NOT NULL
-            )
+                symbol TEXT NOT NULL,
+                ts INTEGER NOT NULL,
+                price REAL NOT NULL,
+                PRIMARY KEY (symbol, ts)
+            ) WITHOUT ROWID
         """)
         self.cursor.execute("""
             CREATE TABLE trading_signals (
@@ -224,9 +195,9 @@ class TestTradingBot(unittest.TestCase):
         """Test generating trading signals and position management."""
         now = datetime.utcnow()
         for i in range(50):
-            timestamp = (now - timedelta(days=i)).isoformat()
+            ts = to_epoch_ns(now - timedelta(days=i))
             price = 50000 + (i if i < 25 else -i)  # Simulate a crossover
-            self.cursor.execute("INSERT INTO price_data (timestamp, price) VALUES (?, ?)", (timestamp, price))
+            self.cursor.execute("INSERT INTO price_data (symbol, ts, price) VALUES (?, ?, ?)", (SYMBOL, ts, price))
         self.conn.commit()
 
         ma_20, ma_50 = calculate_moving_averages()
@@ -2,12 +2,14 @@ import time
 import logging  
 import sqlite3  
 from datetime import datetime, timedelta  
-import requests  
 import pandas as pd  
 import numpy as np  
 import unittest  
-from textblob import TextBlob  
-import talib
+from price\_client import get\_client  
+from storage import get\_storage  
+from indicator\_cache import get\_cache  
+from streaming\_indicators import TechnicalIndicators  
+from textblob import TextBlob
 
 \# Configure logging  
 logging.basicConfig(level=logging.INFO, format='%(asctime)s \- %(levelname)s \- %(message)s')
@@ -23,85 +25,32 @@ ACCOUNT\_BALANCE \= 10000  \# Example account balance in USD
 \# Database setup  
 def initialize\_database():  
     """Create the database and tables if not already present."""  
-    conn \= sqlite3.connect(DB\_NAME)  
-    cursor \= conn.cursor()  
-    \# Table for price data  
-    cursor.execute("""  
-        CREATE TABLE IF NOT EXISTS price\_data (  
-            id INTEGER PRIMARY KEY AUTOINCREMENT,  
-            timestamp TEXT NOT NULL,  
-            price REAL NOT NULL  
-        )  
-    """)  
-    \# Table for trading signals  
-    cursor.execute("""  
-        CREATE TABLE IF NOT EXISTS trading\_signals (  
-            id INTEGER PRIMARY KEY AUTOINCREMENT,  
-            timestamp TEXT NOT NULL,  
-            signal TEXT NOT NULL  
-        )  
-    """)  
-    \# Table for positions  
-    cursor.execute("""  
-        CREATE TABLE IF NOT EXISTS positions (  
-            id INTEGER PRIMARY KEY AUTOINCREMENT,  
-            timestamp TEXT NOT NULL,  
-            symbol TEXT NOT NULL,  
-            entry\_price REAL NOT NULL,  
-            position\_size REAL NOT NULL,  
-            stop\_loss REAL NOT NULL,  
-            status TEXT NOT NULL  
-        )  
-    """)  
-    conn.commit()  
-    conn.close()
+    get\_storage(DB\_NAME).initialize(\["price\_data", "trading\_signals", "positions"\])
 
 \# Fetch price data  
 def fetch\_price():  
     """Fetch the current price of BTC/USDT from Binance."""  
-    try:  
-        response \= requests.get(API\_URL, params={"symbol": SYMBOL})  
-        response.raise\_for\_status()  
-        data \= response.json()  
-        price \= float(data\["price"\])  
-        return price  
-    except requests.exceptions.RequestException as e:  
-        logging.error(f"Error fetching price data: {e}")  
-        return None
+    return get\_client(API\_URL).get\_price(SYMBOL)
 
 \# Save to database  
 def save\_to\_database(table, data):  
     """Save data to the specified table in the local database."""  
     try:  
-        conn \= sqlite3.connect(DB\_NAME)  
-        cursor \= conn.cursor()  
-        if table \== "price\_data":  
-            cursor.execute("INSERT INTO price\_data (timestamp, price) VALUES (?, ?)", data)  
-        elif table \== "trading\_signals":  
-            cursor.execute("INSERT INTO trading\_signals (timestamp, signal) VALUES (?, ?)", data)  
-        elif table \== "positions":  
-            cursor.execute("INSERT INTO positions (timestamp, symbol, entry\_price, position\_size, stop\_loss, status) VALUES (?, ?, ?, ?, ?, ?)", data)  
-        conn.commit()  
+        get\_storage(DB\_NAME).save(table, data)  
     except sqlite3.Error as e:  
-        logging.error(f"Error saving data to database: {e}")  
-    finally:  
-        conn.close()
+        logging.error(f"Error saving data to database: {e}")
 
 \# Calculate moving averages  
 def calculate\_moving\_averages():  
     """Calculate 20-day and 50-day moving averages from the database."""  
     try:  
-        conn \= sqlite3.connect(DB\_NAME)  
-        cursor \= conn.cursor()  
-        cursor.execute("SELECT timestamp, price FROM price\_data ORDER BY timestamp DESC LIMIT 50")  
-        rows \= cursor.fetchall()  
-        conn.close()  
+        rows \= get\_storage(DB\_NAME).fetch\_latest("price\_data", SYMBOL, 50\)  
         if len(rows) \< 50:  
             logging.warning("Not enough data for calculating moving averages.")  
             return None, None
 
-        \# Convert to DataFrame for calculation  
-        df \= pd.DataFrame(rows, columns=\["timestamp", "price"\])  
+        \# Convert to DataFrame for calculation, oldest tick first  
+        df \= pd.DataFrame(rows\[::-1\], columns=\["ts", "price"\])  
         df\["price"\] \= df\["price"\].astype(float)  
         df\["20\_MA"\] \= df\["price"\].rolling(window=20).mean()  
         df\["50\_MA"\] \= df\["price"\].rolling(window=50).mean()
@@ -150,21 +99,39 @@ def calculate\_technical\_indicators(data):
     """Calculate RSI, MACD, and Bollinger Bands for the given price data."""  
     try:  
         prices \= np.array(data\["price"\], dtype=float)  
-        rsi \= talib.RSI(prices, timeperiod=14)  
-        macd, macdsignal, \_ \= talib.MACD(prices, fastperiod=12, slowperiod=26, signalperiod=9)  
-        upperband, middleband, lowerband \= talib.BBANDS(prices, timeperiod=20)
-
-        return {  
-            "RSI": rsi\[-1\],  
-            "MACD": macd\[-1\],  
-            "Signal": macdsignal\[-1\],  
-            "UpperBand": upperband\[-1\],  
-            "LowerBand": lowerband\[-1\]  
-        }  
+        indicators \= get\_cache().get\_or\_compute("technical\_indicators", (14, (12, 26, 9), 20), prices,  
+                                                lambda: TechnicalIndicators().warm\_up(prices.tolist()))  
+        return dict(indicators)  
     except Exception as e:  
         logging.error(f"Error calculating technical indicators: {e}")  
         return {}
 
+\# Streaming indicator state for integrate\_market\_analysis  
+\_live \= {"indicators": None, "last\_ts": None, "last\_price": None}
+
+def update\_technical\_indicators():  
+    """Feed prices stored since the last call into the streaming indicators.
+
+    The first call warms the indicators up from the latest 100 rows; later  
+    calls only read and process rows newer than the last one seen.
+
+    Returns:  
+        dict: Latest indicator values, or None if there is not enough data yet.  
+    """  
+    storage \= get\_storage(DB\_NAME)  
+    if \_live\["indicators"\] is None:  
+        rows \= storage.fetch\_latest("price\_data", SYMBOL, 100)\[::-1\]  
+        if len(rows) \< 100:  
+            return None  
+        \_live\["indicators"\] \= TechnicalIndicators()  
+    else:  
+        rows \= storage.fetch\_range("price\_data", SYMBOL, \_live\["last\_ts"\] \+ 1\)  
+    for ts, price in rows:  
+        \_live\["indicators"\].update(price)  
+    if rows:  
+        \_live\["last\_ts"\], \_live\["last\_price"\] \= rows\[-1\]  
+    return \_live\["indicators"\].values()
+
 def generate\_trading\_signal(sentiment, indicators):  
     """Generate trading signals based on sentiment and technical indicators."""  
     try:  
@@ -181,22 +148,16 @@ def generate\_trading\_signal(sentiment, indicators):
 \# Integration and backtesting  
 def integrate\_market\_analysis():  
     """Integrate market analysis into the trading workflow."""  
-    conn \= sqlite3.connect(DB\_NAME)  
-    cursor \= conn.cursor()  
-    cursor.execute("SELECT timestamp, price FROM price\_data ORDER BY timestamp DESC LIMIT 100")  
-    rows \= cursor.fetchall()  
-    conn.close()
+    indicators \= update\_technical\_indicators()
 
-    if len(rows) \< 100:  
+    if indicators is None:  
         logging.warning("Not enough data for market analysis.")  
         return
 
-    df \= pd.DataFrame(rows, columns=\["timestamp", "price"\])  
     sentiment \= fetch\_sentiment()  
-    indicators \= calculate\_technical\_indicators(df)  
     signal \= generate\_trading\_signal(sentiment, indicators)  
     if signal \!= "hold":  
-        execute\_trade(signal, df.iloc\[-1\]\["price"\], ACCOUNT\_BALANCE)  
+        execute\_trade(signal, \_live\["last\_price"\], ACCOUNT\_BALANCE)  
         save\_to\_database("trading\_signals", (datetime.utcnow().isoformat(), signal))
 
 \# Unit tests  
@@ -212,6 +173,17 @@ class TestMarketAnalysis(unittest.TestCase):
         self.assertIn("MACD", indicators)  
         self.assertIn("Signal", indicators)
 
+    def test\_incremental\_matches\_batch(self):  
+        """Test that feeding prices one at a time gives the batch result."""  
+        prices \= \[100 \+ 5 \* np.sin(i / 7\) \+ i \* 0.1 for i in range(150)\]  
+        tracker \= TechnicalIndicators()  
+        tracker.warm\_up(prices\[:100\])  
+        for price in prices\[100:\]:  
+            tracker.update(price)  
+        expected \= calculate\_technical\_indicators(pd.DataFrame({"price": prices}))  
+        for key, value in expected.items():  
+            self.assertAlmostEqual(tracker.values()\[key\], value)
+
     def test\_generate\_trading\_signal(self):  
         """Test trading signal generation."""  
         indicators \= {  
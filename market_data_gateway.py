@@ -0,0 +1,368 @@
+import asyncio
+import json
+import logging
+import random
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Sequence, Tuple, Union
+
+import websockets
+
+from fast_decode import TickDecoder, TickRecord
+from storage import event_time_ns
+
+OVERFLOW_POLICIES = ("drop_oldest", "block", "coalesce")
+
+Handler = Callable[[TickRecord], Union[None, Awaitable[None]]]
+
+
+def binance_subscribe(symbols: Sequence[str], request_id: int) -> str:
+    """Builds a Binance-style trade stream subscription message."""
+    return json.dumps({"method": "SUBSCRIBE", "params": [f"{s.lower()}@trade" for s in symbols], "id": request_id})
+
+
+def symbol_key(raw: Union[str, bytes]) -> str:
+    """Extracts the `"s"` field from a raw frame without decoding it.
+
+    Used as the coalescing key so the socket reader never parses JSON.
+    """
+    if isinstance(raw, bytes):
+        raw = raw.decode("utf-8", "replace")
+    start = raw.find('"s":"')
+    if start < 0:
+        return raw
+    start += 5
+    return raw[start:raw.find('"', start)]
+
+
+class FeedQueue:
+    """Bounded asyncio queue with a configurable overflow policy.
+
+    - "drop_oldest": a put on a full queue discards the oldest entry.
+    - "block": a put on a full queue waits for space (backpressure).
+    - "coalesce": a put on a full queue replaces the pending entry with the
+      same key, so consumers only see the latest value per symbol; if no
+      entry has that key the oldest is discarded.
+    """
+
+    def __init__(self, maxsize: int, policy: str = "drop_oldest"):
+        if policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {policy}")
+        self.maxsize = maxsize
+        self.policy = policy
+        self._entries: Deque[List[Any]] = deque()
+        self._by_key: Dict[Any, List[Any]] = {}
+        self._changed = asyncio.Condition()
+        self.dropped = 0
+        self.coalesced = 0
+
+    def qsize(self) -> int:
+        return len(self._entries)
+
+    def _pop_oldest(self) -> List[Any]:
+        entry = self._entries.popleft()
+        if self._by_key.get(entry[0]) is entry:
+            del self._by_key[entry[0]]
+        return entry
+
+    async def put(self, item: Any, key: Any = None) -> None:
+        """Adds an item, applying the overflow policy if the queue is full."""
+        async with self._changed:
+            if len(self._entries) >= self.maxsize:
+                if self.policy == "block":
+                    await self._changed.wait_for(lambda: len(self._entries) < self.maxsize)
+                elif self.policy == "coalesce" and key in self._by_key:
+                    self._by_key[key][1] = item
+                    self.coalesced += 1
+                    return
+                else:
+                    self._pop_oldest()
+                    self.dropped += 1
+            entry = [key, item]
+            self._entries.append(entry)
+            if self.policy == "coalesce":
+                self._by_key[key] = entry
+            self._changed.notify_all()
+
+    async def get(self) -> Any:
+        """Removes and returns the oldest item, waiting if the queue is empty."""
+        async with self._changed:
+            await self._changed.wait_for(lambda: self._entries)
+            entry = self._pop_oldest()
+            self._changed.notify_all()
+            return entry[1]
+
+
+class _Connection:
+    """One websocket carrying a group of symbol subscriptions."""
+
+    def __init__(self, uri: str, symbols: List[str], queue: FeedQueue):
+        self.uri = uri
+        self.symbols = symbols
+        self.queue = queue
+        self.connected = False
+        self.reconnects = 0
+        self.messages = 0
+
+
+class MarketDataGateway:
+    """Multiplexes many symbol subscriptions over a bounded set of websockets.
+
+    Each connection has a reader task that only receives frames and puts them
+    on a bounded `FeedQueue`, and a worker task that decodes them into
+    `TickRecord`s and dispatches them to the registered handlers. A slow handler therefore
+    backs up the queue, handled by the overflow policy, instead of stalling
+    the socket read loop. Dropped connections are re-established with
+    exponential backoff and every symbol is resubscribed.
+
+    Example:
+        gateway = MarketDataGateway(policy="coalesce")
+        gateway.subscribe("wss://stream.binance.com:9443/ws", ["BTCUSDT", "ETHUSDT"])
+        gateway.add_handler(processor.store_data)
+        await gateway.run()
+    """
+
+    def __init__(self, queue_size: int = 10000, policy: str = "drop_oldest",
+                 max_symbols_per_connection: int = 200,
+                 subscribe_message: Callable[[Sequence[str], int], str] = binance_subscribe,
+                 decoder: Optional[TickDecoder] = None,
+                 connect: Callable[[str], Any] = websockets.connect,
+                 reconnect_delay: float = 1.0, max_reconnect_delay: float = 30.0):
+        if policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {policy}")
+        self.queue_size = queue_size
+        self.policy = policy
+        self.max_symbols_per_connection = max_symbols_per_connection
+        self.subscribe_message = subscribe_message
+        self.decoder = decoder or TickDecoder()
+        self.connect = connect
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.handlers: List[Handler] = []
+        self.connections: List[_Connection] = []
+        self._subscriptions: Dict[str, List[str]] = {}
+        self._lag: Dict[Tuple[str, str], Dict[str, float]] = {}
+        self._tasks: List[asyncio.Task] = []
+        self._running = False
+        self._request_id = 0
+
+    def subscribe(self, uri: str, symbols: Sequence[str]) -> None:
+        """Adds symbols to the set streamed from an exchange endpoint.
+
+        Call before `run`.
+
+        Args:
+            uri (str): Websocket URI for the exchange.
+            symbols (Sequence[str]): Symbols to subscribe to.
+        """
+        existing = self._subscriptions.setdefault(uri, [])
+        existing.extend(symbol for symbol in symbols if symbol not in existing)
+
+    def add_handler(self, handler: Handler) -> None:
+        """Registers a sync or async callback receiving every decoded tick."""
+        self.handlers.append(handler)
+
+    async def run(self) -> None:
+        """Opens every connection and processes messages until `stop` is called."""
+        self._running = True
+        self.connections = []
+        for uri, symbols in self._subscriptions.items():
+            for i in range(0, len(symbols), self.max_symbols_per_connection):
+                group = symbols[i:i + self.max_symbols_per_connection]
+                self.connections.append(_Connection(uri, group, FeedQueue(self.queue_size, self.policy)))
+        for connection in self.connections:
+            self._tasks.append(asyncio.create_task(self._read(connection)))
+            self._tasks.append(asyncio.create_task(self._work(connection)))
+        try:
+            await asyncio.gather(*self._tasks)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self._tasks = []
+
+    async def stop(self) -> None:
+        """Cancels every reader and worker task."""
+        self._running = False
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _read(self, connection: _Connection) -> None:
+        delay = self.reconnect_delay
+        key_func = symbol_key if self.policy == "coalesce" else None
+        while self._running:
+            try:
+                async with self.connect(connection.uri) as websocket:
+                    self._request_id += 1
+                    await websocket.send(self.subscribe_message(connection.symbols, self._request_id))
+                    connection.connected = True
+                    delay = self.reconnect_delay
+                    logging.info(f"Subscribed to {len(connection.symbols)} symbols on {connection.uri}")
+                    async for message in websocket:
+                        connection.messages += 1
+                        key = key_func(message) if key_func else None
+                        await connection.queue.put((time.time_ns(), message), key)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.error(f"Connection to {connection.uri} lost: {e}")
+            connection.connected = False
+            if not self._running:
+                break
+            connection.reconnects += 1
+            await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+            delay = min(delay * 2, self.max_reconnect_delay)
+
+    async def _work(self, connection: _Connection) -> None:
+        while True:
+            received_ns, message = await connection.queue.get()
+            try:
+                ticks = self.decoder.decode(message)
+            except ValueError as e:
+                logging.error(f"Undecodable message from {connection.uri}: {e}")
+                continue
+            for tick in ticks:
+                self._record_lag(connection.uri, tick, received_ns)
+                for handler in self.handlers:
+                    try:
+                        result = handler(tick)
+                        if asyncio.iscoroutine(result):
+                            await result
+                    except Exception as e:
+                        logging.error(f"Market data handler failed: {e}")
+
+    def _record_lag(self, uri: str, tick: TickRecord, received_ns: int) -> None:
+        now = time.time_ns()
+        stats = self._lag.get((uri, tick.symbol))
+        if stats is None:
+            stats = self._lag[(uri, tick.symbol)] = {
+                "messages": 0, "exchange_lag_ms": 0.0, "max_exchange_lag_ms": 0.0,
+                "queue_delay_ms": 0.0, "max_queue_delay_ms": 0.0}
+        stats["messages"] += 1
+        queue_delay = (now - received_ns) / 1e6
+        stats["queue_delay_ms"] = queue_delay
+        stats["max_queue_delay_ms"] = max(stats["max_queue_delay_ms"], queue_delay)
+        event_ns = event_time_ns(tick.timestamp)
+        if event_ns is not None:
+            exchange_lag = (received_ns - event_ns) / 1e6
+            stats["exchange_lag_ms"] = exchange_lag
+            stats["max_exchange_lag_ms"] = max(stats["max_exchange_lag_ms"], exchange_lag)
+
+    def get_lag(self) -> Dict[Tuple[str, str], Dict[str, float]]:
+        """Returns per-feed lag statistics.
+
+        `exchange_lag_ms` is receive time minus the exchange event time and
+        `queue_delay_ms` is the time a frame waited between the socket and
+        the handlers, both for the latest message of each (uri, symbol).
+
+        Returns:
+            Dict[Tuple[str, str], Dict[str, float]]: Statistics keyed by (uri, symbol).
+        """
+        return {feed: dict(stats) for feed, stats in self._lag.items()}
+
+    def get_status(self) -> List[Dict[str, Any]]:
+        """Returns connection state, queue depth and drop counts per connection."""
+        return [{
+            "uri": c.uri,
+            "symbols": len(c.symbols),
+            "connected": c.connected,
+            "reconnects": c.reconnects,
+            "messages": c.messages,
+            "queue_depth": c.queue.qsize(),
+            "dropped": c.queue.dropped,
+            "coalesced": c.queue.coalesced,
+        } for c in self.connections]
+
+
+# Unit tests
+def test_overflow_policies():
+    """Test drop-oldest, coalesce and block behavior on a full queue."""
+    async def scenario():
+        queue = FeedQueue(2, "drop_oldest")
+        for i in range(3):
+            await queue.put(i)
+        assert [await queue.get(), await queue.get()] == [1, 2], "Oldest item not dropped."
+        assert queue.dropped == 1, "Drop not counted."
+
+        queue = FeedQueue(2, "coalesce")
+        await queue.put("btc-1", "BTC")
+        await queue.put("eth-1", "ETH")
+        await queue.put("btc-2", "BTC")
+        assert [await queue.get(), await queue.get()] == ["btc-2", "eth-1"], "Update not coalesced in place."
+        assert queue.coalesced == 1, "Coalesce not counted."
+
+        queue = FeedQueue(1, "block")
+        await queue.put(1)
+        blocked = asyncio.create_task(queue.put(2))
+        await asyncio.sleep(0.01)
+        assert not blocked.done(), "Put did not block on a full queue."
+        assert await queue.get() == 1
+        await asyncio.wait_for(blocked, 1)
+        assert await queue.get() == 2, "Blocked put was lost."
+    asyncio.run(scenario())
+
+
+class _FakeSocket:
+    def __init__(self, frames, fail):
+        self.frames = frames
+        self.fail = fail
+        self.sent = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def send(self, message):
+        self.sent.append(message)
+
+    def __aiter__(self):
+        return self._frames()
+
+    async def _frames(self):
+        for frame in self.frames:
+            yield frame
+        if self.fail:
+            raise ConnectionError("connection reset")
+        await asyncio.sleep(3600)
+
+
+def test_reconnect_resubscribes_and_reports_lag():
+    """Test that a dropped connection is resubscribed and ticks reach handlers."""
+    sockets = []
+
+    def connect(uri):
+        frame = json.dumps({"s": "BTCUSDT", "p": "100.5", "q": "2", "T": int(time.time() * 1000)})
+        sockets.append(_FakeSocket([frame, '{"result":null,"id":1}'], fail=not sockets))
+        return sockets[-1]
+
+    async def scenario():
+        gateway = MarketDataGateway(connect=connect, reconnect_delay=0.001, max_symbols_per_connection=2)
+        gateway.subscribe("wss://example", ["BTCUSDT", "ETHUSDT", "SOLUSDT"])
+        ticks = []
+        gateway.add_handler(ticks.append)
+        runner = asyncio.create_task(gateway.run())
+        for _ in range(200):
+            if len(ticks) >= 3:
+                break
+            await asyncio.sleep(0.01)
+        status = gateway.get_status()
+        await gateway.stop()
+        await runner
+        return gateway, ticks, status
+
+    gateway, ticks, status = asyncio.run(scenario())
+    assert len(status) == 2, "Symbols not split across connections."
+    assert sum(s["reconnects"] for s in status) >= 1, "Connection not re-established."
+    params = [json.loads(socket.sent[0])["params"] for socket in sockets]
+    assert params.count(["btcusdt@trade", "ethusdt@trade"]) >= 2, "Symbols not resubscribed after reconnect."
+    assert (ticks[0].symbol, ticks[0].price, ticks[0].volume) == ("BTCUSDT", 100.5, 2.0), "Tick not decoded."
+    lag = gateway.get_lag()[("wss://example", "BTCUSDT")]
+    assert lag["messages"] >= 3 and lag["exchange_lag_ms"] >= 0, "Lag not reported."
+
+
+if __name__ == "__main__":
+    test_overflow_policies()
+    test_reconnect_resubscribes_and_reports_lag()
+    print("All tests passed.")
@@ -2,26 +2,42 @@ import asyncio
 
 import websockets
 
-import json
-
 import time
 
-from collections import deque
-
-from typing import Dict, Any
+from typing import Dict, Any, Callable, List
 
 import threading
 
+from fast\_decode import TickDecoder
+
+from tick\_ring\_buffer import TickRingBuffer
+
 class MarketDataProcessor:
 
     """Processes and stores real-time market data efficiently."""
 
     def \_\_init\_\_(self, buffer\_size: int \= 10000):
 
-        self.data\_buffer \= deque(maxlen=buffer\_size)
+        self.data\_buffer \= TickRingBuffer(buffer\_size)
 
         self.lock \= threading.Lock()
 
+        self.listeners: List\[Callable\[\[Dict\[str, Any\]\], None\]\] \= \[\]
+
+        self.decoder \= TickDecoder()
+
+    def add\_listener(self, listener: Callable\[\[Dict\[str, Any\]\], None\]):
+
+        """Registers a callback invoked with every stored tick, e.g. \`BarBuilder.on\_market\_data\`.
+
+        Args:
+
+            listener (Callable): Function taking one normalized tick.
+
+        """
+
+        self.listeners.append(listener)
+
     async def connect\_to\_exchange(self, uri: str):
 
         """Establishes a websocket connection to an exchange.
@@ -38,10 +54,46 @@ class MarketDataProcessor:
 
             await self.\_handle\_messages(websocket)
 
+    async def run\_gateway(self, subscriptions: Dict\[str, List\[str\]\], \*\*options):
+
+        """Streams many symbols and exchanges through a \`MarketDataGateway\`.
+
+        Socket reads are decoupled from \`store\_data\` by bounded queues, and
+
+        dropped connections are reconnected and resubscribed.
+
+        Args:
+
+            subscriptions (Dict\[str, List\[str\]\]): Symbols to stream per websocket URI.
+
+            \*\*options: \`MarketDataGateway\` options, e.g. policy="coalesce".
+
+        """
+
+        from market\_data\_gateway import MarketDataGateway
+
+        gateway \= MarketDataGateway(\*\*options)
+
+        for uri, symbols in subscriptions.items():
+
+            gateway.subscribe(uri, symbols)
+
+        gateway.add\_handler(self.store\_data)
+
+        self.gateway \= gateway
+
+        await gateway.run()
+
     async def \_handle\_messages(self, websocket):
 
         """Handles incoming messages from the websocket.
 
+        Frames are decoded straight into \`TickRecord\`s, which support the
+
+        same item access as the dicts built by \`normalize\_data\`. A frame
+
+        carrying an array of trades is decoded in one call.
+
         Args:
 
             websocket: Active websocket connection.
@@ -50,11 +102,9 @@ class MarketDataProcessor:
 
         async for message in websocket:
 
-            data \= json.loads(message)
-
-            normalized\_data \= self.normalize\_data(data)
+            for tick in self.decoder.decode(message):
 
-            self.store\_data(normalized\_data)
+                self.store\_data(tick)
 
     def normalize\_data(self, data: Dict\[str, Any\]) \-\> Dict\[str, Any\]:
 
@@ -88,6 +138,8 @@ class MarketDataProcessor:
 
         """Stores data in the buffer with thread safety.
 
+        The lock only serializes producers; readers use lock-free snapshots.
+
         Args:
 
             data (Dict\[str, Any\]): Normalized data to store.
@@ -96,21 +148,41 @@ class MarketDataProcessor:
 
         with self.lock:
 
-            self.data\_buffer.append(data)
+            self.data\_buffer.append(data\["timestamp"\], data\["price"\], data\["volume"\], data\["symbol"\])
+
+        for listener in self.listeners:
+
+            listener(data)
 
     def get\_buffer\_snapshot(self):
 
         """Returns a snapshot of the current buffer.
 
+        Does not block \`store\_data\`; see \`TickRingBuffer.snapshot\`.
+
         Returns:
 
             list: A list containing buffered data.
 
         """
 
-        with self.lock:
+        return self.data\_buffer.to\_records()
+
+    def get\_window(self, n: int \= None) \-\> Dict\[str, Any\]:
+
+        """Returns the newest ticks as zero-copy NumPy views.
+
+        Args:
+
+            n (int, optional): Number of ticks. Defaults to the whole buffer.
+
+        Returns:
 
-            return list(self.data\_buffer)
+            Dict\[str, Any\]: "timestamp", "price", "volume" and "symbol\_id" arrays.
+
+        """
+
+        return self.data\_buffer.window(n)
 
 \# Unit tests
 
@@ -160,6 +232,22 @@ def test\_buffer\_overflow():
 
     assert buffer\[0\]\["price"\] \== 2, "Oldest data not discarded."
 
+def test\_listener():
+
+    """Test that listeners receive stored ticks."""
+
+    processor \= MarketDataProcessor()
+
+    received \= \[\]
+
+    processor.add\_listener(received.append)
+
+    data \= {"timestamp": 1640995200, "price": 45000.0, "volume": 1.5, "symbol": "BTCUSD"}
+
+    processor.store\_data(data)
+
+    assert received \== \[data\], "Listener not called."
+
 if \_\_name\_\_ \== "\_\_main\_\_":
 
     test\_normalize\_data()
@@ -168,5 +256,7 @@ if \_\_name\_\_ \== "\_\_main\_\_":
 
     test\_buffer\_overflow()
 
+    test\_listener()
+
     print("All tests passed.")
 
@@ -0,0 +1,315 @@
+import asyncio
+import bisect
+import logging
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+Level = Tuple[float, float]  # (price, quantity)
+
+
+class VenueBook:
+    """Cached fee schedule and order-book depth of one venue for one symbol.
+
+    Depth is stored as cumulative quantity and notional per side, so the
+    average price of any size is a bisect and a few arithmetic operations.
+
+    Args:
+        venue (str): Venue name.
+        fee (float): Taker fee as a fraction of notional.
+        slippage (float): Fallback slippage fraction, used when there is no depth
+            and for size beyond the cached depth.
+        bids (Sequence[Level]): Bid levels, best first.
+        asks (Sequence[Level]): Ask levels, best first.
+    """
+
+    def __init__(self, venue: str, fee: float, slippage: float = 0.0, bids: Sequence[Level] = (),
+                 asks: Sequence[Level] = ()):
+        self.venue = venue
+        self.fee = fee
+        self.slippage = slippage
+        self.bids = [tuple(level) for level in bids]
+        self.asks = [tuple(level) for level in asks]
+        self.mid = (self.bids[0][0] + self.asks[0][0]) / 2 if self.bids and self.asks else None
+        self._depth = {"sell": self._cumulate(self.bids), "buy": self._cumulate(self.asks)}
+
+    @staticmethod
+    def _cumulate(levels: List[Level]) -> Tuple[List[float], List[float], List[float]]:
+        quantities = np.cumsum([q for _, q in levels]).tolist()
+        notionals = np.cumsum([p * q for p, q in levels]).tolist()
+        return [p for p, _ in levels], quantities, notionals
+
+    def average_price(self, side: str, quantity: float) -> Optional[float]:
+        """Average execution price of a market order walking the cached depth, before fees.
+
+        Size beyond the cached depth is priced at the worst level plus the
+        fallback slippage.
+
+        Returns:
+            float: The average price, or None if the side has no depth.
+        """
+        prices, quantities, notionals = self._depth[side]
+        if not prices or quantity <= 0:
+            return None
+        i = bisect.bisect_left(quantities, quantity)
+        if i < len(prices):
+            filled_before = quantities[i - 1] if i else 0.0
+            notional = (notionals[i - 1] if i else 0.0) + (quantity - filled_before) * prices[i]
+        else:
+            worst = prices[-1] * (1 + self.slippage if side == "buy" else 1 - self.slippage)
+            notional = notionals[-1] + (quantity - quantities[-1]) * worst
+        return notional / quantity
+
+    def effective_price(self, side: str, quantity: float, reference: float) -> float:
+        """Fee-adjusted average price: what a buy pays or a sell receives per unit.
+
+        Args:
+            side (str): "buy" or "sell".
+            quantity (float): Order size.
+            reference (float): Price assumed for a venue without depth, before
+                its fallback slippage.
+
+        Returns:
+            float: Average price times (1 + fee) for buys, (1 - fee) for sells.
+        """
+        average = self.average_price(side, quantity)
+        if average is None:
+            average = reference * (1 + self.slippage if side == "buy" else 1 - self.slippage)
+        return average * (1 + self.fee) if side == "buy" else average * (1 - self.fee)
+
+    def cost(self, side: str, quantity: float) -> float:
+        """Expected cost of a market order as a fraction of this venue's mid: fee plus size-dependent slippage.
+
+        Args:
+            side (str): "buy" or "sell".
+            quantity (float): Order size.
+
+        Returns:
+            float: Fee plus slippage; the static `fee + slippage` when there is no depth.
+        """
+        average = self.average_price(side, quantity)
+        if average is None or self.mid is None:
+            return self.fee + self.slippage
+        slip = (average - self.mid) / self.mid if side == "buy" else (self.mid - average) / self.mid
+        return self.fee + slip
+
+
+class SymbolRoutes:
+    """Immutable routing data of one symbol: venue books and a fee-adjusted ladder per side across venues."""
+
+    def __init__(self, books: Sequence[VenueBook]):
+        self.books = tuple(books)
+        mids = [book.mid for book in books if book.mid is not None]
+        self.reference = sum(mids) / len(mids) if mids else 1.0  # Price for venues without depth
+        self.ladders = {"buy": self._ladder(books, "buy"), "sell": self._ladder(books, "sell")}
+
+    @staticmethod
+    def _ladder(books: Sequence[VenueBook], side: str) -> List[Tuple[float, float, str]]:
+        if side == "buy":
+            levels = [(p * (1 + b.fee), q, b.venue) for b in books for p, q in b.asks]
+            return sorted(levels)
+        levels = [(p * (1 - b.fee), q, b.venue) for b in books for p, q in b.bids]
+        return sorted(levels, reverse=True)
+
+
+class RoutingTable:
+    """Per-symbol smart order routing from cached fees and depth.
+
+    Routing reads only in-memory data: `route` picks the venue with the
+    best fee-adjusted average price for the whole order given its size, and
+    `split` walks a merged, fee-adjusted ladder of every venue's levels.
+    Updates build a new `SymbolRoutes` and swap it in with a single
+    assignment, so readers never lock or see a half-updated symbol.
+    `refresh`/`run` repopulate the table from a market data source in the
+    background; symbols routed before they are in the table are queued with
+    `request` and loaded by the next `run` cycle.
+
+    Args:
+        market_data: Source with `get_available_exchanges(symbol)` returning
+            dicts with "name", "fee" and "slippage", optionally "bids" and
+            "asks" as [price, quantity] levels. If it also has
+            `get_order_book(symbol, venue)` returning {"bids": ..., "asks": ...},
+            depth is fetched from there.
+        default_venue (str, optional): Venue returned for symbols not yet in the table.
+    """
+
+    def __init__(self, market_data: Any = None, default_venue: Optional[str] = None):
+        self.market_data = market_data
+        self.default_venue = default_venue
+        self.pending: set = set()
+        self.routes: Dict[str, SymbolRoutes] = {}
+        self.updated_at: Dict[str, float] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    async def start(self, symbols: Sequence[str] = (), interval: float = 1.0) -> None:
+        """Starts `run` as a task on the running loop."""
+        self._task = asyncio.create_task(self.run(symbols, interval))
+
+    async def stop(self) -> None:
+        """Stops the refresh task; the table keeps its last data."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def update(self, symbol: str, books: Sequence[VenueBook]) -> None:
+        """Replaces the routing data of a symbol."""
+        self.routes[symbol] = SymbolRoutes(books)
+        self.updated_at[symbol] = time.time()
+
+    def update_venue(self, symbol: str, book: VenueBook) -> None:
+        """Replaces one venue's book, e.g. from a depth stream, keeping the others."""
+        current = self.routes.get(symbol)
+        books = [b for b in current.books if b.venue != book.venue] if current else []
+        self.update(symbol, books + [book])
+
+    def route(self, symbol: str, side: str, quantity: float) -> Optional[str]:
+        """Returns the venue with the best fee-adjusted average price for the whole order.
+
+        Returns:
+            str: The venue, or None if the symbol is not in the table.
+        """
+        routes = self.routes.get(symbol)
+        if routes is None or not routes.books:
+            return None
+        reference = routes.reference
+        if side == "buy":
+            return min(routes.books, key=lambda book: book.effective_price(side, quantity, reference)).venue
+        return max(routes.books, key=lambda book: book.effective_price(side, quantity, reference)).venue
+
+    def request(self, symbol: str) -> None:
+        """Queues a symbol for the next background refresh; does no I/O."""
+        self.pending.add(symbol)
+
+    def split(self, symbol: str, side: str, quantity: float) -> List[Tuple[str, float]]:
+        """Splits an order across venues by filling the cheapest fee-adjusted levels first.
+
+        Size beyond the combined cached depth goes to the venue `route`
+        picks for it.
+
+        Returns:
+            List[Tuple[str, float]]: (venue, quantity) per venue, largest first.
+        """
+        routes = self.routes.get(symbol)
+        if routes is None or not routes.books:
+            return []
+        allocation: Dict[str, float] = {}
+        remaining = quantity
+        for _, level_quantity, venue in routes.ladders[side]:
+            take = min(level_quantity, remaining)
+            allocation[venue] = allocation.get(venue, 0.0) + take
+            remaining -= take
+            if remaining <= 0:
+                break
+        if remaining > 0:
+            venue = self.route(symbol, side, remaining)
+            allocation[venue] = allocation.get(venue, 0.0) + remaining
+        return sorted(allocation.items(), key=lambda item: -item[1])
+
+    def _books_for(self, symbol: str) -> List[VenueBook]:
+        books = []
+        get_order_book = getattr(self.market_data, "get_order_book", None)
+        for exchange in self.market_data.get_available_exchanges(symbol):
+            depth = get_order_book(symbol, exchange["name"]) if get_order_book else exchange
+            books.append(VenueBook(exchange["name"], exchange["fee"], exchange.get("slippage", 0.0),
+                                   depth.get("bids", ()), depth.get("asks", ())))
+        return books
+
+    def load(self, symbol: str) -> None:
+        """Fetches and installs one symbol synchronously."""
+        self.update(symbol, self._books_for(symbol))
+
+    async def refresh(self, symbols: Sequence[str]) -> None:
+        """Fetches fees and depth for `symbols` in worker threads and installs them."""
+        loop = asyncio.get_running_loop()
+        results = await asyncio.gather(*(loop.run_in_executor(None, self._books_for, symbol) for symbol in symbols),
+                                       return_exceptions=True)
+        for symbol, books in zip(symbols, results):
+            if isinstance(books, Exception):
+                logging.warning(f"Routing refresh for {symbol} failed: {books}")
+            else:
+                self.update(symbol, books)
+
+    async def run(self, symbols: Sequence[str] = (), interval: float = 1.0) -> None:
+        """Refreshes `symbols` and any requested symbols every `interval` seconds until cancelled."""
+        while True:
+            requested, self.pending = self.pending, set()
+            await self.refresh(sorted(set(symbols) | requested))
+            await asyncio.sleep(interval)
+
+
+# Unit tests
+class _Venues:
+    """Two venues: A is cheaper on fees, B has the deeper book."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def get_available_exchanges(self, symbol):
+        self.calls += 1
+        return [{"name": "A", "fee": 0.0005, "slippage": 0.01, "bids": [[99.9, 1.0]], "asks": [[100.1, 1.0]]},
+                {"name": "B", "fee": 0.001, "slippage": 0.01, "bids": [[99.9, 10.0]],
+                 "asks": [[100.1, 5.0], [100.2, 5.0]]}]
+
+
+def test_size_dependent_route_and_split():
+    """Test that small orders go to the lower fee, large ones to depth, and splits take the cheapest levels."""
+    source = _Venues()
+    table = RoutingTable(source)
+    asyncio.run(table.refresh(["BTCUSD"]))
+    assert table.route("BTCUSD", "buy", 0.5) == "A", "Small order not sent to the cheapest venue."
+    assert table.route("BTCUSD", "buy", 5.0) == "B", "Large order ignored depth."
+    assert table.split("BTCUSD", "buy", 7.0) == [("B", 6.0), ("A", 1.0)], "Split incorrect."
+    assert table.split("BTCUSD", "sell", 12.0) == [("B", 10.0), ("A", 2.0)], "Overflow not routed."
+    book = table.routes["BTCUSD"].books[1]
+    assert np.isclose(book.cost("buy", 10.0), 0.001 + (100.15 - 100.0) / 100.0), "Depth slippage incorrect."
+    assert source.calls == 1 and table.route("ETHUSD", "buy", 1.0) is None, "Routing performed I/O."
+
+
+def test_ranks_by_price_not_own_spread():
+    """Test that a venue with a wider spread but a lower ask wins a buy, as in `split`."""
+    table = RoutingTable()
+    table.update("BTCUSD", [VenueBook("A", 0.001, bids=[(99.0, 5.0)], asks=[(101.0, 5.0)]),
+                            VenueBook("B", 0.001, bids=[(101.4, 5.0)], asks=[(101.5, 5.0)])])
+    assert table.route("BTCUSD", "buy", 1.0) == "A", "Buy not routed to the lowest price."
+    assert table.split("BTCUSD", "buy", 1.0) == [("A", 1.0)], "Route and split disagree."
+    assert table.route("BTCUSD", "sell", 1.0) == "B", "Sell not routed to the highest price."
+
+
+def test_requested_symbols_loaded_by_run():
+    """Test that a symbol queued with `request` is fetched by the background loop, not on the order path."""
+    source = _Venues()
+    table = RoutingTable(source, default_venue="A")
+    table.request("ETHUSD")
+    assert source.calls == 0 and table.route("ETHUSD", "buy", 1.0) is None, "Request performed I/O."
+
+    async def one_cycle():
+        await table.start(interval=60.0)
+        while "ETHUSD" not in table.routes:
+            await asyncio.sleep(0.001)
+        await table.stop()
+
+    asyncio.run(asyncio.wait_for(one_cycle(), 5.0))
+    assert table.route("ETHUSD", "buy", 0.5) == "A" and not table.pending, "Requested symbol not refreshed."
+
+
+def test_static_fallback_and_venue_update():
+    """Test fee plus slippage routing without depth and replacing one venue's book."""
+    table = RoutingTable()
+    table.update("BTCUSD", [VenueBook("A", 0.001, 0.002), VenueBook("B", 0.002, 0.002)])
+    assert table.route("BTCUSD", "buy", 1.0) == "A", "Static costs not compared."
+    table.update_venue("BTCUSD", VenueBook("B", 0.0, 0.001))
+    assert table.route("BTCUSD", "buy", 1.0) == "B" and len(table.routes["BTCUSD"].books) == 2, "Update failed."
+
+
+if __name__ == "__main__":
+    test_size_dependent_route_and_split()
+    test_ranks_by_price_not_own_spread()
+    test_requested_symbols_loaded_by_run()
+    test_static_fallback_and_venue_update()
+    print("All tests passed.")
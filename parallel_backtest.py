@@ -0,0 +1,219 @@
+import logging
+import math
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# progress(done, total, best_performance) -> True to abort the search
+ProgressCallback = Callable[[int, int, float], Optional[bool]]
+
+INDEX_FILE = "__index__.npy"
+
+
+def score_strategy(data: pd.DataFrame, strategy_func: Callable, params: Dict[str, Any]) -> float:
+    """Scores one parameter set: the sum of close-to-close returns weighted by the previous signal.
+
+    Args:
+        data (pd.DataFrame): Historical data with a 'close' column.
+        strategy_func (Callable): Strategy returning a signal Series for `data`.
+        params (Dict[str, Any]): Keyword arguments for `strategy_func`.
+
+    Returns:
+        float: Total strategy return.
+    """
+    signals = strategy_func(data, **params)
+    returns = data['close'].pct_change() * signals.shift(1)
+    return returns.sum()
+
+
+class SharedFrame:
+    """Read-only DataFrame shared with worker processes through memory-mapped files.
+
+    Each numeric or datetime column (and the index) is written once as a
+    `.npy` file; workers open them with `mmap_mode='r'`, so the operating
+    system shares the pages instead of every task pickling the frame. Other
+    columns travel in the descriptor, which is sent once per worker.
+    """
+
+    def __init__(self, data: pd.DataFrame, directory: Optional[str] = None):
+        self.directory = tempfile.mkdtemp(prefix="shared_frame_", dir=directory)
+        columns = []
+        inline = {}
+        for i, column in enumerate(data.columns):
+            values = data[column].to_numpy()
+            if values.dtype.kind in "biufcmM":
+                filename = f"{i}.npy"
+                np.save(os.path.join(self.directory, filename), values)
+                columns.append((column, filename))
+            else:
+                inline[column] = values
+        index = data.index.to_numpy()
+        if index.dtype.kind in "biufcmM":
+            np.save(os.path.join(self.directory, INDEX_FILE), index)
+            index = None
+        self.descriptor = {"directory": self.directory, "columns": columns, "inline": inline,
+                           "order": list(data.columns), "index": index}
+
+    def close(self) -> None:
+        """Deletes the mapped files."""
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def __enter__(self) -> "SharedFrame":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def attach_frame(descriptor: Dict[str, Any]) -> pd.DataFrame:
+    """Rebuilds a DataFrame from a `SharedFrame` descriptor over the mapped files."""
+    directory = descriptor["directory"]
+    values = dict(descriptor["inline"])
+    for column, filename in descriptor["columns"]:
+        values[column] = np.load(os.path.join(directory, filename), mmap_mode="r")
+    index = descriptor["index"]
+    if index is None:
+        index = np.load(os.path.join(directory, INDEX_FILE), mmap_mode="r")
+    return pd.DataFrame({column: values[column] for column in descriptor["order"]}, index=index, copy=False)
+
+
+_worker: Dict[str, Any] = {}
+
+
+def _init_worker(descriptor: Dict[str, Any], strategy_func: Callable) -> None:
+    _worker["data"] = attach_frame(descriptor)
+    _worker["strategy"] = strategy_func
+
+
+def _run_trial(trial: Tuple[int, Dict[str, Any]]) -> Tuple[int, Dict[str, Any], float, Optional[str]]:
+    index, params = trial
+    try:
+        return index, params, float(score_strategy(_worker["data"], _worker["strategy"], params)), None
+    except Exception as e:
+        return index, params, math.nan, f"{type(e).__name__}: {e}"
+
+
+def _summarize(rows: List[Tuple[int, Dict[str, Any], float, Optional[str]]], total: int,
+               aborted: bool, elapsed: float) -> Dict[str, Any]:
+    rows = sorted(rows)
+    table = pd.DataFrame([dict(params, trial=index, performance=performance, error=error)
+                          for index, params, performance, error in rows])
+    best_params, best_performance = None, -np.inf
+    for _, params, performance, _ in rows:
+        if performance > best_performance:
+            best_params, best_performance = params, performance
+    return {"params": best_params, "performance": best_performance, "results": table,
+            "completed": len(rows), "total": total, "aborted": aborted, "elapsed_s": elapsed}
+
+
+def grid_search(data: pd.DataFrame, strategy_func: Callable, param_sets: Iterable[Dict[str, Any]],
+                processes: Optional[int] = None, chunksize: Optional[int] = None,
+                progress: Optional[ProgressCallback] = None, target: Optional[float] = None,
+                mp_context: Optional[str] = None) -> Dict[str, Any]:
+    """Evaluates parameter sets on a process pool.
+
+    The data is shared through a `SharedFrame`, so tasks carry only their
+    parameters. Results stream back as they finish; after each one,
+    `progress` is called and the search stops early if it returns True or
+    if `target` has been reached.
+
+    Args:
+        data (pd.DataFrame): Historical data with a 'close' column.
+        strategy_func (Callable): Picklable (module-level) strategy function.
+        param_sets (Iterable[Dict[str, Any]]): Parameter sets to evaluate.
+        processes (int, optional): Worker count. Defaults to the CPU count.
+        chunksize (int, optional): Trials per task. Defaults to a size that
+            gives each worker about 16 tasks.
+        progress (Callable, optional): Called as progress(done, total, best).
+        target (float, optional): Stop once a performance reaches this value.
+        mp_context (str, optional): Multiprocessing start method.
+
+    Returns:
+        Dict[str, Any]: Best "params" and "performance", the "results" table
+            (one row per completed trial, in grid order, with any "error"),
+            and "completed", "total", "aborted" and "elapsed_s".
+    """
+    trials = list(enumerate(param_sets))
+    total = len(trials)
+    processes = processes or os.cpu_count() or 1
+    if chunksize is None:
+        chunksize = max(1, total // (processes * 16))
+    context = multiprocessing.get_context(mp_context)
+    rows = []
+    best = -np.inf
+    aborted = False
+    start = time.perf_counter()
+    with SharedFrame(data) as shared:
+        pool = context.Pool(processes, initializer=_init_worker, initargs=(shared.descriptor, strategy_func))
+        try:
+            for row in pool.imap_unordered(_run_trial, trials, chunksize=chunksize):
+                rows.append(row)
+                if row[3] is not None:
+                    logging.warning(f"Trial {row[1]} failed: {row[3]}")
+                elif row[2] > best:
+                    best = row[2]
+                stop = progress(len(rows), total, best) if progress else False
+                if stop or (target is not None and best >= target):
+                    aborted = len(rows) < total
+                    break
+        finally:
+            pool.terminate()
+            pool.join()
+    if aborted:
+        logging.info(f"Grid search stopped after {len(rows)} of {total} trials.")
+    return _summarize(rows, total, aborted, time.perf_counter() - start)
+
+
+# Unit tests
+def _threshold_strategy(data, fast, slow):
+    """Long when the fast mean is above the slow mean."""
+    close = data['close']
+    if fast >= slow:
+        raise ValueError("fast must be below slow")
+    return (close.rolling(fast).mean() > close.rolling(slow).mean()).astype(float)
+
+
+def _test_data(n=500):
+    rng = np.random.default_rng(3)
+    close = 100 + rng.standard_normal(n).cumsum()
+    return pd.DataFrame({"timestamp": pd.date_range("2023-01-01", periods=n, freq="h"), "close": close,
+                         "venue": ["test"] * n})
+
+
+def test_matches_serial_evaluation():
+    """Test that the parallel table and argmax match serial scoring, with errors recorded."""
+    data = _test_data()
+    grid = [{"fast": f, "slow": s} for f in (5, 10, 20) for s in (10, 30, 50)]
+    result = grid_search(data, _threshold_strategy, grid, processes=2)
+    expected = [score_strategy(data, _threshold_strategy, p) if p["fast"] < p["slow"] else math.nan for p in grid]
+    table = result["results"]
+    assert table["trial"].tolist() == list(range(len(grid))), "Result table incomplete or out of order."
+    assert np.allclose(table["performance"], expected, equal_nan=True), "Parallel scores differ."
+    assert table["error"].notna().tolist() == [p["fast"] >= p["slow"] for p in grid], "Failed trials not recorded."
+    assert result["performance"] == np.nanmax(expected), "Wrong best performance."
+    assert result["params"] == grid[int(np.nanargmax(expected))], "Wrong best params."
+
+
+def test_early_abort_and_shared_frame():
+    """Test that a progress callback stops the search and that the shared frame round-trips."""
+    data = _test_data()
+    with SharedFrame(data) as shared:
+        assert attach_frame(shared.descriptor).equals(data), "Shared frame differs from the original."
+    calls = []
+    grid = [{"fast": f, "slow": 100} for f in range(2, 60)]
+    result = grid_search(data, _threshold_strategy, grid, processes=2, chunksize=1,
+                         progress=lambda done, total, best: calls.append(done) or done >= 5)
+    assert result["aborted"] and result["completed"] < len(grid), "Search was not aborted."
+    assert calls[:5] == [1, 2, 3, 4, 5], "Progress not reported per trial."
+
+
+if __name__ == "__main__":
+    test_matches_serial_evaluation()
+    test_early_abort_and_shared_frame()
+    print("All tests passed.")
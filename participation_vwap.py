@@ -0,0 +1,318 @@
+import asyncio
+import itertools
+import logging
+import math
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+SECONDS_PER_DAY = 86400
+
+# send(symbol, side, quantity, price) -> True if the child order was accepted, e.g. `OrderExecution.place_order`
+SendOrder = Callable[[str, str, float, float], bool]
+
+ACTIVE, DONE, EXPIRED, CANCELLED = "active", "done", "expired", "cancelled"
+
+
+class VolumeProfile:
+    """Historical intraday volume profile: the share of daily volume traded in each time-of-day bucket.
+
+    Args:
+        shares (Sequence[float]): Volume per bucket over one day, normalized on construction.
+    """
+
+    def __init__(self, shares: Sequence[float]):
+        shares = np.asarray(shares, dtype=float)
+        self.shares = shares / shares.sum() if shares.sum() > 0 else np.full(len(shares), 1.0 / len(shares))
+        self.bucket_s = SECONDS_PER_DAY / len(self.shares)
+        self._cumulative = np.concatenate(([0.0], np.cumsum(self.shares)))
+
+    @classmethod
+    def from_ticks(cls, timestamps_ns: np.ndarray, volumes: np.ndarray, bucket_s: int = 300) -> "VolumeProfile":
+        """Builds a profile from historical trades or bars by averaging volume per time-of-day bucket.
+
+        Args:
+            timestamps_ns (np.ndarray): Epoch-nanosecond timestamps.
+            volumes (np.ndarray): Volumes.
+            bucket_s (int): Bucket width in seconds; must divide a day.
+
+        Returns:
+            VolumeProfile: The profile.
+        """
+        seconds = np.asarray(timestamps_ns, dtype=np.int64) // 1_000_000_000
+        buckets = (seconds % SECONDS_PER_DAY) // bucket_s
+        return cls(np.bincount(buckets, weights=np.asarray(volumes, dtype=float),
+                               minlength=SECONDS_PER_DAY // bucket_s))
+
+    @classmethod
+    def flat(cls, bucket_s: int = 300) -> "VolumeProfile":
+        """Uniform profile, equivalent to TWAP."""
+        return cls(np.ones(SECONDS_PER_DAY // bucket_s))
+
+    def _share_until(self, t: float) -> float:
+        days, offset = divmod(t, SECONDS_PER_DAY)
+        bucket, partial = divmod(offset, self.bucket_s)
+        bucket = int(bucket)
+        return days + self._cumulative[bucket] + self.shares[bucket % len(self.shares)] * partial / self.bucket_s
+
+    def share(self, start: float, end: float) -> float:
+        """Expected share of daily volume traded between two epoch times in seconds."""
+        return self._share_until(end) - self._share_until(start)
+
+
+class ParticipationOrder:
+    """A parent order that trades a fixed fraction of market volume, with benchmark accounting."""
+
+    def __init__(self, order_id: str, symbol: str, side: str, quantity: float, rate: float, start: float,
+                 end: float, bucket_s: float, min_child: float, profile: VolumeProfile):
+        self.order_id = order_id
+        self.symbol = symbol
+        self.side = side
+        self.quantity = quantity
+        self.rate = rate
+        self.start = start
+        self.end = end
+        self.bucket_s = bucket_s
+        self.min_child = min_child
+        self.profile = profile
+        self.state = ACTIVE
+        self.market_volume = 0.0
+        self.market_notional = 0.0
+        self.last_trade = start
+        self.buckets: Dict[int, List[float]] = {}  # bucket start -> [market volume, our volume]
+        self.sent = 0.0
+        self.sent_notional = 0.0
+        self.children = 0
+        self.fallback_children = 0
+
+    def bucket(self, now: float) -> List[float]:
+        key = int(now // self.bucket_s * self.bucket_s)
+        entry = self.buckets.get(key)
+        if entry is None:
+            entry = self.buckets[key] = [0.0, 0.0]
+        return entry
+
+    def report(self) -> Dict[str, Any]:
+        """Returns fill progress, participation and slippage against the realized market VWAP."""
+        avg_price = self.sent_notional / self.sent if self.sent else np.nan
+        market_vwap = self.market_notional / self.market_volume if self.market_volume else np.nan
+        sign = 1.0 if self.side == "buy" else -1.0
+        return {"order_id": self.order_id, "symbol": self.symbol, "side": self.side, "quantity": self.quantity,
+                "sent": self.sent, "state": self.state, "children": self.children,
+                "fallback_children": self.fallback_children, "avg_price": avg_price, "market_vwap": market_vwap,
+                "market_volume": self.market_volume,
+                "participation": self.sent / self.market_volume if self.market_volume else 0.0,
+                "slippage_bps": sign * (avg_price - market_vwap) / market_vwap * 1e4,
+                "buckets": {start: tuple(volumes) for start, volumes in sorted(self.buckets.items())}}
+
+
+class ParticipationVWAP:
+    """Releases child orders as a target share of the live trade volume.
+
+    Register `on_market_data` with `MarketDataProcessor.add_listener`. Every
+    trade in a symbol with active parent orders adds to the parents' realized
+    market volume, notional and time-bucket totals; a child order is released
+    whenever `rate` times the market volume since the parent started exceeds
+    what has been sent by at least `min_child`. Children are priced at the
+    trade that released them, which is also what the slippage report uses.
+
+    If a symbol's stream goes quiet for `stale_after` seconds, `poll`
+    (run periodically, e.g. by `run`) falls back to the historical
+    `VolumeProfile`, topping the parent up to the share of its quantity the
+    profile expects to have traded by now.
+
+    Args:
+        send (Callable): Sends a child order as send(symbol, side, quantity, price).
+        profile (VolumeProfile, optional): Fallback intraday profile. Defaults to flat.
+        stale_after (float): Seconds without trades before the fallback applies.
+        clock (Callable[[], float]): Epoch seconds; injectable for tests and backtests.
+    """
+
+    def __init__(self, send: SendOrder, profile: Optional[VolumeProfile] = None, stale_after: float = 30.0,
+                 clock: Callable[[], float] = time.time):
+        self.send = send
+        self.profile = profile or VolumeProfile.flat()
+        self.stale_after = stale_after
+        self.clock = clock
+        self.orders: Dict[str, ParticipationOrder] = {}
+        self._active: Dict[str, List[ParticipationOrder]] = {}
+        self._last_price: Dict[str, float] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def submit(self, symbol: str, side: str, quantity: float, rate: float, duration: float,
+               bucket_s: float = 60.0, min_child: float = 0.0, profile: Optional[VolumeProfile] = None) -> str:
+        """Starts a participation parent order.
+
+        Args:
+            symbol (str): Trading pair symbol.
+            side (str): "buy" or "sell".
+            quantity (float): Total quantity.
+            rate (float): Target fraction of market volume, e.g. 0.1 for 10%.
+            duration (float): Seconds until the order expires unfilled.
+            bucket_s (float): Width of the reported volume buckets in seconds.
+            min_child (float): Smallest child order to release.
+            profile (VolumeProfile, optional): Fallback profile for this order. Defaults to the engine's.
+
+        Returns:
+            str: Parent order id.
+        """
+        now = self.clock()
+        order = ParticipationOrder(f"pov-{next(self._ids)}", symbol, side, quantity, rate, now, now + duration,
+                                   bucket_s, min_child, profile or self.profile)
+        with self._lock:
+            self.orders[order.order_id] = order
+            self._active.setdefault(symbol, []).append(order)
+        return order.order_id
+
+    def cancel(self, order_id: str) -> bool:
+        """Stops releasing children for a parent order."""
+        with self._lock:
+            order = self.orders.get(order_id)
+            if order is None or order.state != ACTIVE:
+                return False
+            self._close(order, CANCELLED)
+            return True
+
+    def report(self, order_id: str) -> Dict[str, Any]:
+        """Returns the progress and slippage report of a parent order."""
+        with self._lock:
+            return self.orders[order_id].report()
+
+    def on_market_data(self, data: Dict[str, Any]) -> None:
+        """Listener for `MarketDataProcessor`: books a trade and releases children it allows."""
+        symbol = data["symbol"]
+        price = data["price"]
+        self._last_price[symbol] = price
+        orders = self._active.get(symbol)
+        if not orders:
+            return
+        volume = data["volume"]
+        now = self.clock()
+        with self._lock:
+            for order in list(orders):
+                if now >= order.end:
+                    self._close(order, EXPIRED)
+                    continue
+                order.market_volume += volume
+                order.market_notional += volume * price
+                order.last_trade = now
+                order.bucket(now)[0] += volume
+                self._release(order, order.rate * order.market_volume, price, now, fallback=False)
+
+    def poll(self) -> None:
+        """Expires finished parents and applies the profile fallback to symbols with a stale stream."""
+        now = self.clock()
+        with self._lock:
+            for orders in list(self._active.values()):
+                for order in list(orders):
+                    if now >= order.end:
+                        self._close(order, EXPIRED)
+                    elif now - order.last_trade >= self.stale_after and order.symbol in self._last_price:
+                        window = order.profile.share(order.start, order.end)
+                        if window > 0:
+                            expected = order.profile.share(order.start, now) / window
+                        else:  # The profile has no volume in this window: fall back to a flat schedule
+                            expected = (now - order.start) / (order.end - order.start)
+                        self._release(order, order.quantity * expected, self._last_price[order.symbol], now,
+                                      fallback=True)
+
+    async def run(self, interval: float = 1.0) -> None:
+        """Calls `poll` every `interval` seconds until cancelled."""
+        while True:
+            await asyncio.sleep(interval)
+            self.poll()
+
+    def _release(self, order: ParticipationOrder, target: float, price: float, now: float, fallback: bool) -> None:
+        size = min(target, order.quantity) - order.sent
+        if not math.isfinite(size) or size <= 0 or (size < order.min_child and target < order.quantity):
+            return
+        try:
+            accepted = self.send(order.symbol, order.side, size, price)
+        except Exception as e:
+            logging.error(f"Child order of {order.order_id} failed: {e}")
+            accepted = False
+        if not accepted:
+            return
+        order.sent += size
+        order.sent_notional += size * price
+        order.children += 1
+        order.fallback_children += fallback
+        order.bucket(now)[1] += size
+        if order.sent >= order.quantity:
+            self._close(order, DONE)
+
+    def _close(self, order: ParticipationOrder, state: str) -> None:
+        order.state = state
+        self._active[order.symbol].remove(order)
+
+
+# Unit tests
+class _Clock:
+    def __init__(self, now=1_700_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def _recorder(sent):
+    return lambda symbol, side, quantity, price: sent.append((symbol, quantity, price)) or True
+
+
+def test_participation_and_slippage():
+    """Test that children follow the target rate and slippage is measured against the realized VWAP."""
+    sent, clock = [], _Clock()
+    engine = ParticipationVWAP(_recorder(sent), clock=clock)
+    order_id = engine.submit("BTCUSD", "buy", 5.0, rate=0.1, duration=600, min_child=0.5)
+    for price, volume in [(100.0, 2.0), (101.0, 4.0), (102.0, 10.0), (103.0, 30.0), (104.0, 30.0)]:
+        clock.now += 30
+        engine.on_market_data({"timestamp": clock.now, "price": price, "volume": volume, "symbol": "BTCUSD"})
+    engine.on_market_data({"timestamp": clock.now, "price": 1.0, "volume": 1e6, "symbol": "ETHUSD"})
+    assert np.allclose([q for _, q, _ in sent], [0.6, 1.0, 3.0, 0.4]), "Children do not track 10% of volume."
+    report = engine.report(order_id)
+    assert report["state"] == DONE and report["sent"] == 5.0, "Parent not completed."
+    market_vwap = (200 + 404 + 1020 + 3090 + 3120) / 76
+    assert np.isclose(report["market_vwap"], market_vwap), "Benchmark VWAP incorrect."
+    avg_price = (0.6 * 101 + 102 + 3 * 103 + 0.4 * 104) / 5
+    assert np.isclose(report["slippage_bps"], (avg_price - market_vwap) / market_vwap * 1e4), "Slippage incorrect."
+    assert sum(v[0] for v in report["buckets"].values()) == 76.0, "Bucket volumes incorrect."
+
+
+def test_profile_fallback_when_stream_stalls():
+    """Test that a quiet stream falls back to the historical profile and orders expire."""
+    sent, clock = [], _Clock(1_700_006_400.0)  # Midnight UTC
+    profile = VolumeProfile.from_ticks(np.array([0, 3600, 3600]) * 1_000_000_000, np.ones(3), bucket_s=3600)
+    assert np.isclose(profile.share(clock.now, clock.now + 7200), 1.0), "Profile share incorrect."
+    engine = ParticipationVWAP(_recorder(sent), profile=profile, stale_after=60, clock=clock)
+    order_id = engine.submit("BTCUSD", "sell", 9.0, rate=0.05, duration=7200)
+    engine.on_market_data({"timestamp": clock.now, "price": 100.0, "volume": 1.0, "symbol": "BTCUSD"})
+    clock.now += 1800  # Half of the first hour, which holds a third of the volume
+    engine.poll()
+    assert np.isclose(sent[-1][1], 9.0 / 6 - 0.05), "Fallback did not top up to the profile."
+    clock.now += 7200
+    engine.poll()
+    report = engine.report(order_id)
+    assert report["state"] == EXPIRED and report["fallback_children"] == 1, "Order did not expire."
+
+
+def test_fallback_with_empty_profile_window():
+    """Test that a profile without volume over the order window falls back to a flat schedule, never NaN."""
+    sent, clock = [], _Clock(1_700_006_400.0)  # Midnight UTC
+    profile = VolumeProfile.from_ticks(np.array([12 * 3600]) * 1_000_000_000, np.ones(1), bucket_s=3600)
+    engine = ParticipationVWAP(_recorder(sent), profile=profile, stale_after=60, clock=clock)
+    engine.submit("BTCUSD", "buy", 4.0, rate=0.1, duration=3600)
+    engine.on_market_data({"timestamp": clock.now, "price": 100.0, "volume": 1.0, "symbol": "BTCUSD"})
+    clock.now += 1800
+    engine.poll()
+    assert all(np.isfinite(q) for _, q, _ in sent), "Non-finite child order sent."
+    assert np.isclose(sum(q for _, q, _ in sent), 2.0), "Flat fallback not applied."
+
+
+if __name__ == "__main__":
+    test_participation_and_slippage()
+    test_profile_fallback_when_stream_stalls()
+    test_fallback_with_empty_profile_window()
+    print("All tests passed.")
@@ -0,0 +1,296 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+ALLOCATIONS = ("equal", "equal_active", "inverse_volatility")
+
+# /dev/shm is RAM-backed on Linux, so mapped files there are plain shared memory
+SHARED_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+
+def align_prices(frames: Dict[str, Union[pd.DataFrame, pd.Series]], column: str = "close",
+                 time_column: Optional[str] = "timestamp") -> Tuple[np.ndarray, List[str], np.ndarray]:
+    """Aligns per-symbol price series on the union of their timestamps.
+
+    Prices are forward-filled after each symbol's first observation and NaN
+    before it.
+
+    Args:
+        frames (Dict[str, DataFrame or Series]): Price history per symbol.
+        column (str): Price column of the frames.
+        time_column (str, optional): Timestamp column; the index is used if absent.
+
+    Returns:
+        Tuple[np.ndarray, List[str], np.ndarray]: Timestamps, symbols, and a
+            (symbols, time) float64 price matrix.
+    """
+    series = {}
+    for symbol, frame in frames.items():
+        if isinstance(frame, pd.DataFrame):
+            frame = frame.set_index(time_column)[column] if time_column in frame.columns else frame[column]
+        series[symbol] = frame[~frame.index.duplicated(keep="last")]
+    panel = pd.DataFrame(series).sort_index().ffill()
+    return panel.index.to_numpy(), list(panel.columns), np.ascontiguousarray(panel.to_numpy(dtype=np.float64).T)
+
+
+class SharedMatrix:
+    """2-D float64 array in a memory-mapped file that worker processes open without copying.
+
+    Args:
+        shape (Tuple[int, int]): Matrix shape.
+        values (np.ndarray, optional): Initial contents; zeros otherwise.
+        directory (str, optional): Where to place the file. Defaults to /dev/shm when available.
+    """
+
+    def __init__(self, shape: Tuple[int, int], values: Optional[np.ndarray] = None,
+                 directory: Optional[str] = SHARED_DIR):
+        self.directory = tempfile.mkdtemp(prefix="shared_matrix_", dir=directory)
+        self.path = os.path.join(self.directory, "matrix.npy")
+        self.array = np.lib.format.open_memmap(self.path, mode="w+", dtype=np.float64, shape=shape)
+        if values is not None:
+            self.array[:] = values
+            self.array.flush()
+
+    def close(self) -> None:
+        """Releases the mapping and deletes the file."""
+        self.array = None
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def __enter__(self) -> "SharedMatrix":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def asset_returns(prices: np.ndarray) -> np.ndarray:
+    """Simple returns per step; 0 where either price is missing."""
+    returns = np.zeros_like(prices)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns[:, 1:] = prices[:, 1:] / prices[:, :-1] - 1
+    returns[~np.isfinite(returns)] = 0.0
+    return returns
+
+
+def symbol_positions(strategy_func: Callable, prices: np.ndarray, timestamps: np.ndarray,
+                     params: Dict[str, Any]) -> np.ndarray:
+    """Runs a `HistoricalDataSimulator` strategy on one symbol's row.
+
+    Returns:
+        np.ndarray: Position per step in [-1, 1]; 0 while the symbol has no price.
+    """
+    valid = ~np.isnan(prices)
+    positions = np.zeros(len(prices))
+    if valid.any():
+        first = int(np.argmax(valid))
+        data = pd.DataFrame({"close": prices[first:]}, index=timestamps[first:])
+        signals = np.asarray(strategy_func(data, **params), dtype=np.float64)
+        positions[first:] = np.clip(np.nan_to_num(signals), -1.0, 1.0)
+    return positions
+
+
+_worker: Dict[str, Any] = {}
+
+
+def _init_worker(price_path: str, position_path: str, timestamps: np.ndarray, strategy_func: Callable,
+                 params: Dict[str, Any]) -> None:
+    _worker["prices"] = np.load(price_path, mmap_mode="r")
+    _worker["positions"] = np.load(position_path, mmap_mode="r+")
+    _worker["timestamps"] = timestamps
+    _worker["strategy"] = strategy_func
+    _worker["params"] = params
+
+
+def _run_rows(rows: Tuple[int, int]) -> Tuple[int, int]:
+    prices, positions = _worker["prices"], _worker["positions"]
+    for i in range(*rows):
+        positions[i] = symbol_positions(_worker["strategy"], prices[i], _worker["timestamps"], _worker["params"])
+    positions.flush()
+    return rows
+
+
+def allocate(positions: np.ndarray, returns: np.ndarray, rule: str = "equal", max_weight: float = 1.0,
+             max_gross: float = 1.0, vol_lookback: int = 20) -> np.ndarray:
+    """Turns per-symbol positions into portfolio weights.
+
+    Rules:
+        "equal": each symbol gets 1/N of capital, whether it is active or not.
+        "equal_active": capital is split equally across symbols with a position.
+        "inverse_volatility": active symbols are weighted by 1 / trailing volatility.
+
+    Weights are then capped at `max_weight` per symbol and scaled down so
+    gross exposure never exceeds `max_gross`.
+
+    Args:
+        positions (np.ndarray): (symbols, time) positions in [-1, 1].
+        returns (np.ndarray): (symbols, time) asset returns, for volatility.
+        rule (str): One of `ALLOCATIONS`.
+        max_weight (float): Maximum absolute weight per symbol.
+        max_gross (float): Maximum sum of absolute weights.
+        vol_lookback (int): Steps of trailing volatility for "inverse_volatility".
+
+    Returns:
+        np.ndarray: (symbols, time) weights as fractions of equity.
+    """
+    if rule == "equal":
+        weights = positions / positions.shape[0]
+    elif rule == "equal_active":
+        active = np.count_nonzero(positions, axis=0)
+        weights = positions / np.maximum(active, 1)
+    elif rule == "inverse_volatility":
+        vol = pd.DataFrame(returns.T).rolling(vol_lookback, min_periods=2).std().to_numpy().T
+        inverse = np.divide(1.0, vol, out=np.zeros_like(vol), where=vol > 0)
+        raw = positions * inverse
+        weights = raw / np.maximum(np.abs(raw).sum(axis=0), 1e-12)
+    else:
+        raise ValueError(f"Unknown allocation rule: {rule}")
+    weights = np.clip(weights, -max_weight, max_weight)
+    gross = np.abs(weights).sum(axis=0)
+    return weights * np.where(gross > max_gross, max_gross / np.maximum(gross, 1e-12), 1.0)
+
+
+def portfolio_backtest(prices: np.ndarray, timestamps: np.ndarray, symbols: Sequence[str], strategy_func: Callable,
+                       params: Optional[Dict[str, Any]] = None, allocation: str = "equal",
+                       initial_capital: float = 100000.0, fee_rate: float = 0.0, max_weight: float = 1.0,
+                       max_gross: float = 1.0, processes: int = 1, chunk_rows: Optional[int] = None,
+                       shared_prices: Optional[SharedMatrix] = None,
+                       mp_context: Optional[str] = None) -> Dict[str, Any]:
+    """Runs one strategy over every symbol of a price matrix and aggregates a portfolio.
+
+    The matrix is placed once in a `SharedMatrix`; workers read their rows
+    from it and write positions into a second shared matrix, so neither
+    prices nor results are pickled per symbol. Weights from `allocate`
+    decided at step t earn the returns of step t + 1, and turnover pays
+    `fee_rate`.
+
+    Args:
+        prices (np.ndarray): (symbols, time) prices, NaN before a symbol starts trading.
+        timestamps (np.ndarray): Timestamps of the columns.
+        symbols (Sequence[str]): Symbols of the rows.
+        strategy_func (Callable): Picklable strategy taking a DataFrame with a
+            'close' column, returning positions in [-1, 1].
+        params (Dict[str, Any], optional): Strategy parameters.
+        allocation (str): Allocation rule, see `allocate`.
+        initial_capital (float): Starting equity.
+        fee_rate (float): Cost per unit of turnover (fraction of traded notional).
+        max_weight (float): Maximum absolute weight per symbol.
+        max_gross (float): Maximum gross exposure as a fraction of equity.
+        processes (int): Worker processes; 1 runs in this process.
+        chunk_rows (int, optional): Symbols per task. Defaults to about 4 tasks per worker.
+        shared_prices (SharedMatrix, optional): `prices` already in shared
+            memory, reused instead of copying the matrix for this run.
+        mp_context (str, optional): Multiprocessing start method.
+
+    Returns:
+        Dict[str, Any]: "equity", "returns", "gross_exposure", "net_exposure" and
+            "drawdown" Series, "max_drawdown", "total_return", "sharpe", and
+            per-symbol "contributions".
+    """
+    params = params or {}
+    n_symbols, n_steps = prices.shape
+    returns = asset_returns(prices)
+    if processes <= 1:
+        positions = np.vstack([symbol_positions(strategy_func, row, timestamps, params) for row in prices]) \
+            if n_symbols else np.zeros((0, n_steps))
+    else:
+        chunk_rows = chunk_rows or max(1, n_symbols // (processes * 4))
+        tasks = [(start, min(start + chunk_rows, n_symbols)) for start in range(0, n_symbols, chunk_rows)]
+        context = multiprocessing.get_context(mp_context)
+        owned = shared_prices is None
+        if owned:
+            shared_prices = SharedMatrix(prices.shape, prices)
+        try:
+            with SharedMatrix(prices.shape) as shared_positions:
+                with context.Pool(processes, initializer=_init_worker,
+                                  initargs=(shared_prices.path, shared_positions.path, timestamps, strategy_func,
+                                            params)) as pool:
+                    for _ in pool.imap_unordered(_run_rows, tasks):
+                        pass
+                positions = np.array(shared_positions.array)
+        finally:
+            if owned:
+                shared_prices.close()
+
+    weights = allocate(positions, returns, allocation, max_weight, max_gross)
+    held = np.zeros_like(weights)
+    held[:, 1:] = weights[:, :-1]
+    turnover = np.abs(np.diff(weights, axis=1, prepend=0.0)).sum(axis=0)
+    contributions = held * returns
+    portfolio_returns = contributions.sum(axis=0) - fee_rate * turnover
+    equity = initial_capital * np.cumprod(1 + portfolio_returns)
+    drawdown = equity / np.maximum.accumulate(equity) - 1
+    index = pd.Index(timestamps)
+    std = portfolio_returns.std()
+    return {
+        "equity": pd.Series(equity, index=index),
+        "returns": pd.Series(portfolio_returns, index=index),
+        "gross_exposure": pd.Series(np.abs(weights).sum(axis=0) * equity, index=index),
+        "net_exposure": pd.Series(weights.sum(axis=0) * equity, index=index),
+        "drawdown": pd.Series(drawdown, index=index),
+        "max_drawdown": drawdown.min() if n_steps else 0.0,
+        "total_return": equity[-1] / initial_capital - 1 if n_steps else 0.0,
+        "sharpe": portfolio_returns.mean() / std if std > 0 else 0.0,
+        "contributions": pd.Series(contributions.sum(axis=1), index=list(symbols)),
+    }
+
+
+# Unit tests
+def _trend(data, window):
+    """Long when close is above its trailing mean."""
+    close = data["close"]
+    return (close > close.rolling(window).mean()).astype(float)
+
+
+def _test_matrix(n_symbols=6, n_steps=300):
+    rng = np.random.default_rng(5)
+    prices = 100 * np.exp(rng.standard_normal((n_symbols, n_steps)).cumsum(axis=1) * 0.01)
+    prices[0, :50] = np.nan  # Listed later
+    return prices, pd.date_range("2023-01-01", periods=n_steps, freq="h").to_numpy(), [f"S{i}" for i in range(n_symbols)]
+
+
+def test_parallel_matches_serial_and_accounting():
+    """Test that worker processes give the serial result and that equity adds up per symbol."""
+    prices, timestamps, symbols = _test_matrix()
+    serial = portfolio_backtest(prices, timestamps, symbols, _trend, {"window": 20}, allocation="equal")
+    parallel = portfolio_backtest(prices, timestamps, symbols, _trend, {"window": 20}, allocation="equal",
+                                  processes=2, chunk_rows=2)
+    assert np.allclose(serial["equity"], parallel["equity"]), "Parallel equity differs."
+    compounded = (1 + serial["returns"]).prod() - 1
+    assert np.isclose(serial["total_return"], compounded), "Equity does not compound returns."
+    assert np.isclose(serial["returns"].sum(), serial["contributions"].sum()), "Contributions do not add up."
+    assert serial["contributions"]["S0"] != 0 and serial["max_drawdown"] <= 0, "Late listing or drawdown wrong."
+
+
+def test_allocation_rules():
+    """Test equal, equal-active and inverse-volatility weights with caps."""
+    positions = np.array([[1.0, 1.0], [0.0, 1.0], [-1.0, 1.0], [0.0, 0.0]])
+    returns = np.zeros((4, 2))
+    assert np.allclose(allocate(positions, returns, "equal")[:, 0], [0.25, 0, -0.25, 0])
+    assert np.allclose(allocate(positions, returns, "equal_active")[:, 1], [1 / 3, 1 / 3, 1 / 3, 0])
+    capped = allocate(positions, returns, "equal_active", max_weight=0.2, max_gross=0.3)
+    assert np.isclose(np.abs(capped[:, 1]).sum(), 0.3) and np.abs(capped).max() <= 0.2, "Caps not applied."
+    rng = np.random.default_rng(0)
+    returns = rng.standard_normal((2, 200)) * np.array([[0.01], [0.03]])
+    weights = allocate(np.ones((2, 200)), returns, "inverse_volatility")
+    assert weights[0, -1] > 2 * weights[1, -1] and np.isclose(weights[:, -1].sum(), 1.0), "Inverse volatility wrong."
+
+
+def test_align_prices():
+    """Test union alignment with forward fill and missing history."""
+    a = pd.DataFrame({"timestamp": [1, 2, 3], "close": [10.0, 11.0, 12.0]})
+    b = pd.DataFrame({"timestamp": [2, 4], "close": [5.0, 6.0]})
+    timestamps, symbols, matrix = align_prices({"A": a, "B": b})
+    assert timestamps.tolist() == [1, 2, 3, 4] and symbols == ["A", "B"]
+    assert np.allclose(matrix, [[10, 11, 12, 12], [np.nan, 5, 5, 6]], equal_nan=True), "Alignment incorrect."
+
+
+if __name__ == "__main__":
+    test_parallel_matches_serial_and_accounting()
+    test_allocation_rules()
+    test_align_prices()
+    print("All tests passed.")
@@ -0,0 +1,211 @@
+import threading
+import time
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, List
+
+import numpy as np
+
+
+class PositionBook:
+    """Per-symbol positions with running exposure and PnL totals.
+
+    Each fill or mark updates one symbol and adjusts the totals by the
+    difference, so net/gross exposure and realized/unrealized PnL are O(1)
+    reads and O(1) updates regardless of the number of symbols. Cost basis
+    is the average entry price; reducing a position realizes PnL against it.
+
+    Writers are serialized by `lock`. Readers never take it: the totals are
+    published as one tuple swapped in after each update, and `snapshot`
+    uses a sequence counter (odd while a write is in progress) and retries
+    its copy if a write overlapped it.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.index: Dict[str, int] = {}
+        self.symbols: List[str] = []
+        self.quantity: List[float] = []
+        self.avg_price: List[float] = []
+        self.last_price: List[float] = []
+        self.realized: List[float] = []
+        self._net = self._gross = self._cost = self._realized = 0.0
+        self._sequence = 0
+        self.totals = (0.0, 0.0, 0.0, 0.0)  # net exposure, gross exposure, realized PnL, unrealized PnL
+
+    def _slot(self, symbol: str) -> int:
+        i = self.index.get(symbol)
+        if i is None:
+            i = self.index[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+            self.quantity.append(0.0)
+            self.avg_price.append(0.0)
+            self.last_price.append(0.0)
+            self.realized.append(0.0)
+        return i
+
+    def _publish(self) -> None:
+        self.totals = (self._net, self._gross, self._realized, self._net - self._cost)
+
+    def fill(self, symbol: str, quantity: float, price: float) -> None:
+        """Books a fill.
+
+        Args:
+            symbol (str): The trading symbol.
+            quantity (float): Signed quantity, positive for buys.
+            price (float): Fill price, also used as the symbol's mark.
+        """
+        with self.lock:
+            self._sequence += 1
+            i = self._slot(symbol)
+            old_q, old_avg, old_value = self.quantity[i], self.avg_price[i], self.quantity[i] * self.last_price[i]
+            new_q = old_q + quantity
+            if old_q * quantity < 0:  # Reducing or flipping realizes PnL on the closed part
+                closed = min(abs(quantity), abs(old_q)) * (1.0 if old_q > 0 else -1.0)
+                pnl = closed * (price - old_avg)
+                self.realized[i] += pnl
+                self._realized += pnl
+            if new_q == 0:
+                new_avg = 0.0
+            elif old_q == 0 or old_q * new_q < 0:
+                new_avg = price
+            elif old_q * quantity > 0:
+                new_avg = (old_q * old_avg + quantity * price) / new_q
+            else:
+                new_avg = old_avg
+            new_value = new_q * price
+            self.quantity[i], self.avg_price[i], self.last_price[i] = new_q, new_avg, price
+            self._cost += new_q * new_avg - old_q * old_avg
+            self._net += new_value - old_value
+            self._gross += abs(new_value) - abs(old_value)
+            self._publish()
+            self._sequence += 1
+
+    def mark(self, symbol: str, price: float) -> None:
+        """Revalues a symbol at a new market price."""
+        with self.lock:
+            i = self.index.get(symbol)
+            if i is None:
+                return
+            self._sequence += 1
+            q = self.quantity[i]
+            old_value, new_value = q * self.last_price[i], q * price
+            self.last_price[i] = price
+            self._net += new_value - old_value
+            self._gross += abs(new_value) - abs(old_value)
+            self._publish()
+            self._sequence += 1
+
+    def flatten(self, symbol: str = None) -> None:
+        """Closes one or every position at its last price, realizing the PnL."""
+        for name in [symbol] if symbol is not None else list(self.symbols):
+            i = self.index.get(name)
+            if i is not None and self.quantity[i]:
+                self.fill(name, -self.quantity[i], self.last_price[i])
+
+    def reconcile(self) -> None:
+        """Recomputes the running totals from the per-symbol state, clearing floating-point drift."""
+        with self.lock:
+            self._sequence += 1
+            q, last, avg = np.array(self.quantity), np.array(self.last_price), np.array(self.avg_price)
+            self._net, self._gross = float(q @ last), float(np.abs(q * last).sum())
+            self._cost, self._realized = float(q @ avg), float(np.sum(self.realized))
+            self._publish()
+            self._sequence += 1
+
+    @property
+    def net_exposure(self) -> float:
+        return self.totals[0]
+
+    @property
+    def gross_exposure(self) -> float:
+        return self.totals[1]
+
+    @property
+    def realized_pnl(self) -> float:
+        return self.totals[2]
+
+    @property
+    def unrealized_pnl(self) -> float:
+        return self.totals[3]
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Returns a consistent copy of every position and the totals without blocking writers.
+
+        Returns:
+            Dict[str, Any]: "symbols" and per-symbol "quantity", "avg_price",
+                "last_price" and "realized" arrays, plus the four totals.
+        """
+        while True:
+            before = self._sequence
+            if before % 2:
+                time.sleep(0)  # A write is in progress; let it finish
+                continue
+            n = len(self.symbols)
+            copy = {"symbols": self.symbols[:n], "quantity": np.array(self.quantity[:n]),
+                    "avg_price": np.array(self.avg_price[:n]), "last_price": np.array(self.last_price[:n]),
+                    "realized": np.array(self.realized[:n]), "totals": self.totals}
+            if self._sequence == before:
+                break
+        copy["net_exposure"], copy["gross_exposure"], copy["realized_pnl"], copy["unrealized_pnl"] = copy.pop("totals")
+        return copy
+
+
+class PositionsView(Mapping):
+    """Read-only dict view of a `PositionBook`: symbol -> {"quantity", "value", "avg_price", "realized_pnl"}."""
+
+    def __init__(self, book: PositionBook):
+        self.book = book
+
+    def __getitem__(self, symbol: str) -> Dict[str, float]:
+        book = self.book
+        i = book.index[symbol]
+        quantity = book.quantity[i]
+        return {"quantity": quantity, "value": quantity * book.last_price[i], "avg_price": book.avg_price[i],
+                "realized_pnl": book.realized[i]}
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self.book.symbols))
+
+    def __len__(self) -> int:
+        return len(self.book.symbols)
+
+
+# Unit tests
+def test_running_totals_match_recompute():
+    """Test that O(1) totals equal a full recompute after random fills and marks."""
+    rng = np.random.default_rng(3)
+    book = PositionBook()
+    symbols = [f"SYM{i}" for i in range(50)]
+    for _ in range(5000):
+        symbol = symbols[rng.integers(50)]
+        if rng.random() < 0.7:
+            book.fill(symbol, float(rng.integers(-5, 6)), float(rng.uniform(90, 110)))
+        else:
+            book.mark(symbol, float(rng.uniform(90, 110)))
+    running = book.totals
+    book.reconcile()
+    assert np.allclose(running, book.totals), "Running totals drifted from the positions."
+    snap = book.snapshot()
+    assert np.isclose(snap["net_exposure"], snap["quantity"] @ snap["last_price"]), "Snapshot inconsistent."
+
+
+def test_realized_pnl_and_view():
+    """Test average cost, realized PnL on reduce and flip, and the dict view."""
+    book = PositionBook()
+    book.fill("BTCUSD", 2.0, 100.0)
+    book.fill("BTCUSD", 2.0, 110.0)
+    book.fill("BTCUSD", -3.0, 120.0)  # Realizes 3 * (120 - 105)
+    book.fill("BTCUSD", -2.0, 100.0)  # Realizes 1 * (100 - 105) and opens a short at 100
+    view = PositionsView(book)
+    assert view["BTCUSD"]["quantity"] == -1.0 and view["BTCUSD"]["avg_price"] == 100.0, "Flip not booked."
+    assert book.realized_pnl == 40.0 and book.net_exposure == -100.0, "Realized PnL incorrect."
+    book.mark("BTCUSD", 90.0)
+    assert book.unrealized_pnl == 10.0 and book.gross_exposure == 90.0, "Mark not applied."
+    book.flatten()
+    assert sum(p["quantity"] for p in view.values()) == 0.0 and book.realized_pnl == 50.0, "Flatten failed."
+
+
+if __name__ == "__main__":
+    test_running_totals_match_recompute()
+    test_realized_pnl_and_view()
+    print("All tests passed.")
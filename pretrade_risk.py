@@ -0,0 +1,286 @@
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from position_book import PositionBook
+
+INF = float("inf")
+
+# Check results; 0 accepts the order.
+ACCEPTED, KILLED, BAD_ORDER, NO_PRICE, MAX_QUANTITY, PRICE_COLLAR, SYMBOL_NOTIONAL, GROSS_NOTIONAL, THROTTLED = range(9)
+REASONS = ["accepted", "kill_switch", "bad_order", "no_price", "max_quantity", "price_collar", "symbol_notional",
+           "gross_notional", "throttled"]
+
+
+class PreTradeRiskEngine:
+    """Pre-trade risk checks on flat per-symbol arrays.
+
+    Limits are compiled into one list per field, indexed by a symbol id
+    assigned on first use, so a check is a dict lookup plus a handful of
+    list reads and comparisons. The checks are, in order: kill switch, order
+    sanity, max order quantity, price collar against the last tick,
+    per-symbol notional, global gross notional, and a per-symbol token
+    bucket order-rate throttle. Positions and gross exposure are read from
+    a `PositionBook` in O(1).
+
+    Check latency is recorded in a power-of-two nanosecond histogram.
+
+    Args:
+        book (PositionBook, optional): Positions to check against. A new one is used if omitted.
+        max_quantity (float): Default max quantity per order.
+        max_symbol_notional (float): Default max absolute position notional per symbol after the order.
+        max_gross_notional (float): Max gross notional across symbols after the order.
+        collar_bps (float): Default max distance of the order price from the last tick, in bps.
+        max_rate (float): Default orders per second per symbol.
+        burst (float): Default orders allowed at once before throttling; defaults to `max_rate`.
+        clock (Callable[[], float]): Monotonic seconds, for the throttle.
+    """
+
+    def __init__(self, book: Optional[PositionBook] = None, max_quantity: float = INF,
+                 max_symbol_notional: float = INF, max_gross_notional: float = INF, collar_bps: float = INF,
+                 max_rate: float = INF, burst: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        self.book = book if book is not None else PositionBook()
+        self.defaults = {"max_quantity": max_quantity, "max_symbol_notional": max_symbol_notional,
+                         "collar": collar_bps / 1e4, "max_rate": max_rate,
+                         "burst": burst if burst is not None else max(max_rate, 1.0)}
+        self.max_gross_notional = max_gross_notional
+        self.clock = clock
+        self.ids: Dict[str, int] = {}
+        self.max_quantity: List[float] = []
+        self.max_symbol_notional: List[float] = []
+        self.collar: List[float] = []
+        self.max_rate: List[float] = []
+        self.burst: List[float] = []
+        self.tokens: List[float] = []
+        self.refilled_at: List[float] = []
+        self.last_tick: List[float] = []
+        self.killed = False
+        self.kill_reason = ""
+        self.rejects = [0] * len(REASONS)
+        self.latency_ns = [0] * 64  # Bucket b counts checks taking [2**(b-1), 2**b) ns
+
+    def set_limits(self, symbol: str, **limits: float) -> None:
+        """Overrides limits for one symbol: max_quantity, max_symbol_notional, collar_bps, max_rate, burst."""
+        i = self._id(symbol)
+        if "collar_bps" in limits:
+            limits["collar"] = limits.pop("collar_bps") / 1e4
+        for field, value in limits.items():
+            getattr(self, field)[i] = value
+        if "burst" in limits:
+            self.tokens[i] = limits["burst"]
+
+    def _id(self, symbol: str) -> int:
+        i = self.ids.get(symbol)
+        if i is None:
+            i = self.ids[symbol] = len(self.max_quantity)
+            d = self.defaults
+            self.max_quantity.append(d["max_quantity"])
+            self.max_symbol_notional.append(d["max_symbol_notional"])
+            self.collar.append(d["collar"])
+            self.max_rate.append(d["max_rate"])
+            self.burst.append(d["burst"])
+            self.tokens.append(d["burst"])
+            self.refilled_at.append(self.clock())
+            self.last_tick.append(0.0)
+        return i
+
+    def on_tick(self, symbol: str, price: float) -> None:
+        """Records the last traded price used by the collar and for unpriced orders."""
+        self.last_tick[self._id(symbol)] = price
+
+    def on_market_data(self, data: Dict[str, Any]) -> None:
+        """Listener for `MarketDataProcessor`."""
+        self.on_tick(data["symbol"], data["price"])
+
+    def kill(self, reason: str = "manual") -> None:
+        """Rejects every order until `reset`."""
+        if not self.killed:
+            logging.warning(f"Pre-trade kill switch engaged: {reason}")
+        self.killed, self.kill_reason = True, reason
+
+    def reset(self) -> None:
+        """Releases the kill switch."""
+        self.killed, self.kill_reason = False, ""
+
+    def check(self, symbol: str, side: str, quantity: float, price: Optional[float] = None) -> int:
+        """Runs every pre-trade check on an order.
+
+        Args:
+            symbol (str): The trading symbol.
+            side (str): "buy" or "sell".
+            quantity (float): Order quantity.
+            price (float, optional): Order price. Defaults to the last tick.
+
+        Returns:
+            int: `ACCEPTED` (0) or the code of the first failed check; see `REASONS`.
+        """
+        start = time.perf_counter_ns()
+        result = self._check(symbol, side, quantity, price)
+        self._record(start, result)
+        return result
+
+    def check_quote(self, symbol: Optional[str], bid: float, ask: float) -> int:
+        """Runs the checks that apply to a price-only two-sided quote: kill switch, crossed quote and collar.
+
+        Args:
+            symbol (str, optional): The trading symbol. Without one, or before
+                its first tick, the collar is skipped; the symbol is never registered.
+            bid (float): Bid price.
+            ask (float): Ask price.
+
+        Returns:
+            int: `ACCEPTED` (0) or the code of the first failed check; see `REASONS`.
+        """
+        start = time.perf_counter_ns()
+        result = self._check_quote(symbol, bid, ask)
+        self._record(start, result)
+        return result
+
+    def _record(self, start: int, result: int) -> None:
+        elapsed = time.perf_counter_ns() - start
+        self.latency_ns[elapsed.bit_length()] += 1
+        if result:
+            self.rejects[result] += 1
+
+    def _check(self, symbol: str, side: str, quantity: float, price: Optional[float]) -> int:
+        if self.killed:
+            return KILLED
+        if quantity <= 0 or (side != "buy" and side != "sell"):
+            return BAD_ORDER
+        i = self.ids.get(symbol)
+        if i is None:
+            i = self._id(symbol)
+        book = self.book
+        b = book.index.get(symbol)
+        last = self.last_tick[i] or (book.last_price[b] if b is not None else 0.0)
+        if price is None:
+            price = last
+        if not price or price <= 0:
+            return NO_PRICE
+        if quantity > self.max_quantity[i]:
+            return MAX_QUANTITY
+        if last and abs(price - last) > self.collar[i] * last:
+            return PRICE_COLLAR
+        held = book.quantity[b] if b is not None else 0.0
+        new_notional = abs((held + quantity if side == "buy" else held - quantity) * price)
+        if new_notional > self.max_symbol_notional[i]:
+            return SYMBOL_NOTIONAL
+        old_notional = abs(held * book.last_price[b]) if b is not None else 0.0
+        if book.gross_exposure - old_notional + new_notional > self.max_gross_notional:
+            return GROSS_NOTIONAL
+        rate = self.max_rate[i]
+        if rate != INF:
+            now = self.clock()
+            tokens = min(self.burst[i], self.tokens[i] + (now - self.refilled_at[i]) * rate)
+            self.refilled_at[i] = now
+            if tokens < 1.0:
+                self.tokens[i] = tokens
+                return THROTTLED
+            self.tokens[i] = tokens - 1.0
+        return ACCEPTED
+
+    def _check_quote(self, symbol: Optional[str], bid: float, ask: float) -> int:
+        if self.killed:
+            return KILLED
+        if bid >= ask:
+            return BAD_ORDER
+        i = self.ids.get(symbol)
+        last = self.last_tick[i] if i is not None else 0.0
+        if last and max(abs(bid - last), abs(ask - last)) > self.collar[i] * last:
+            return PRICE_COLLAR
+        return ACCEPTED
+
+    def validate_order(self, symbol: str, side: str, quantity: float, price: Optional[float] = None) -> bool:
+        """Returns True if an order passes every check; the entry point used by `OrderExecution.place_order`."""
+        return self.check(symbol, side, quantity, price) == ACCEPTED
+
+    def check_limits(self, signal: Dict[str, Any]) -> bool:
+        """Checks a two-sided quote, the entry point used by the market maker's `execute_trade`.
+
+        Args:
+            signal (Dict[str, Any]): "bid_price" and "ask_price", optionally
+                "symbol" and "quantity" (the size quoted on each side). A quote
+                without both gets only the `check_quote` checks.
+
+        Returns:
+            bool: True if both sides pass and the quote is not crossed.
+        """
+        bid, ask = signal["bid_price"], signal["ask_price"]
+        symbol = signal.get("symbol")
+        quantity = signal.get("quantity", 0.0)
+        if not quantity or symbol is None or bid >= ask:
+            return self.check_quote(symbol, bid, ask) == ACCEPTED
+        return self.validate_order(symbol, "buy", quantity, bid) and self.validate_order(symbol, "sell", quantity, ask)
+
+    def latency_histogram(self) -> Dict[str, Any]:
+        """Returns check counts per latency bucket and approximate percentiles.
+
+        Returns:
+            Dict[str, Any]: "buckets" mapping each bucket's upper bound in ns
+                to its count, plus "count", "p50_ns", "p99_ns" and "p999_ns"
+                (bucket upper bounds).
+        """
+        total = sum(self.latency_ns)
+        buckets = {2 ** b: count for b, count in enumerate(self.latency_ns) if count}
+        result: Dict[str, Any] = {"count": total, "buckets": buckets}
+        for name, q in (("p50_ns", 0.5), ("p99_ns", 0.99), ("p999_ns", 0.999)):
+            seen, value = 0, 0
+            for upper, count in buckets.items():
+                seen += count
+                if seen >= q * total:
+                    value = upper
+                    break
+            result[name] = value
+        return result
+
+    def reject_counts(self) -> Dict[str, int]:
+        """Returns the number of rejections per reason."""
+        return {REASONS[code]: count for code, count in enumerate(self.rejects) if code and count}
+
+
+# Unit tests
+def test_each_check_rejects():
+    """Test every check in isolation and the reason codes."""
+    now = [0.0]
+    book = PositionBook()
+    engine = PreTradeRiskEngine(book, max_quantity=10, max_symbol_notional=1000, max_gross_notional=1500,
+                                collar_bps=100, max_rate=2, clock=lambda: now[0])
+    engine.on_tick("BTCUSD", 100.0)
+    engine.on_tick("ETHUSD", 100.0)
+    assert engine.check("BTCUSD", "buy", 1, 100.5) == ACCEPTED
+    assert engine.check("BTCUSD", "hold", 1) == BAD_ORDER and engine.check("XRPUSD", "buy", 1) == NO_PRICE
+    assert engine.check("BTCUSD", "buy", 11) == MAX_QUANTITY
+    assert engine.check("BTCUSD", "buy", 1, 102.0) == PRICE_COLLAR
+    book.fill("BTCUSD", 8.0, 100.0)
+    assert engine.check("BTCUSD", "buy", 3) == SYMBOL_NOTIONAL, "Symbol notional not projected."
+    assert engine.check("BTCUSD", "sell", 10) == ACCEPTED, "Reducing order rejected."
+    assert engine.check("ETHUSD", "buy", 8) == GROSS_NOTIONAL, "Gross notional not enforced."
+    assert engine.check("ETHUSD", "buy", 1) == ACCEPTED and engine.check("ETHUSD", "buy", 1) == ACCEPTED
+    assert engine.check("ETHUSD", "buy", 1) == THROTTLED, "Throttle not enforced."
+    now[0] += 0.5
+    assert engine.check("ETHUSD", "buy", 1) == ACCEPTED, "Throttle did not refill."
+    engine.kill("test")
+    assert not engine.validate_order("ETHUSD", "sell", 1) and engine.reject_counts()["kill_switch"] == 1
+    engine.reset()
+    assert engine.latency_histogram()["count"] == 13, "Latency not recorded per check."
+
+
+def test_quote_limits_and_symbol_overrides():
+    """Test market-maker quotes and per-symbol limits."""
+    engine = PreTradeRiskEngine(collar_bps=50)
+    engine.on_tick("BTCUSD", 100.0)
+    assert engine.check_limits({"bid_price": 99.8, "ask_price": 100.2}), "Valid quote rejected."
+    assert not engine.check_limits({"bid_price": 100.2, "ask_price": 99.8}), "Crossed quote accepted."
+    assert not engine.check_limits({"symbol": "BTCUSD", "bid_price": 99.0, "ask_price": 100.2}), "Collar skipped."
+    assert "" not in engine.ids and engine.latency_histogram()["count"] == 3, "Quote checks not recorded."
+    assert engine.reject_counts() == {"bad_order": 1, "price_collar": 1}, "Quote rejects not counted."
+    assert not engine.check_limits({"symbol": "BTCUSD", "bid_price": 99, "ask_price": 100.2, "quantity": 1})
+    engine.set_limits("BTCUSD", max_quantity=0.5)
+    assert not engine.check_limits({"symbol": "BTCUSD", "bid_price": 99.8, "ask_price": 100.2, "quantity": 1})
+    assert engine.check_limits({"symbol": "BTCUSD", "bid_price": 99.8, "ask_price": 100.2, "quantity": 0.5})
+
+
+if __name__ == "__main__":
+    test_each_check_rejects()
+    test_quote_limits_and_symbol_overrides()
+    print("All tests passed.")
@@ -0,0 +1,279 @@
+import json
+import logging
+import random
+import threading
+import time
+from typing import Callable, Dict, Optional, Sequence
+
+import requests
+from requests.adapters import HTTPAdapter
+
+TICKER_URL = "https://api.binance.com/api/v3/ticker/price"
+WEIGHT_LIMIT = 6000  # Request weight per minute allowed by the exchange
+SINGLE_WEIGHT = 2  # Weight of a one-symbol ticker request
+BATCH_WEIGHT = 4  # Weight of a multi-symbol or all-symbol ticker request
+RETRY_STATUSES = (418, 429, 500, 502, 503, 504)
+
+
+class TokenBucket:
+    """Thread-safe token bucket.
+
+    Holds up to `capacity` tokens and refills `refill_rate` tokens per
+    second; `acquire` blocks until enough tokens are available.
+    """
+
+    def __init__(self, capacity: float, refill_rate: float, clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.capacity = capacity
+        self.refill_rate = refill_rate
+        self.tokens = capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.refill_rate)
+        self._updated = now
+
+    def try_acquire(self, tokens: float = 1) -> bool:
+        """Takes tokens if available without waiting."""
+        with self._lock:
+            self._refill()
+            if self.tokens >= tokens:
+                self.tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens: float = 1) -> float:
+        """Takes tokens, waiting for the bucket to refill if needed.
+
+        Returns:
+            float: Seconds spent waiting.
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return waited
+                delay = (tokens - self.tokens) / self.refill_rate
+            self._sleep(delay)
+            waited += delay
+
+    def sync(self, used: float) -> None:
+        """Aligns the bucket with usage reported by the server."""
+        with self._lock:
+            self._refill()
+            self.tokens = min(self.tokens, self.capacity - used)
+
+
+class PriceClient:
+    """REST ticker client shared by every module that needs spot prices.
+
+    Requests go through one pooled `requests.Session` (keep-alive) and are
+    charged against a token bucket sized to the exchange weight budget. The
+    bucket is re-synced from the `X-MBX-USED-WEIGHT-1M` response header when
+    present. Connection errors, timeouts, 429/418 and 5xx responses are
+    retried with exponential backoff and full jitter, honoring
+    `Retry-After`.
+    """
+
+    def __init__(self, ticker_url: str = TICKER_URL, weight_limit: float = WEIGHT_LIMIT,
+                 timeout: float = 5.0, connect_timeout: float = 3.05, retries: int = 3,
+                 backoff: float = 0.5, max_backoff: float = 8.0, pool_size: int = 10,
+                 limiter: Optional[TokenBucket] = None):
+        self.ticker_url = ticker_url
+        self.timeout = (connect_timeout, timeout)
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.limiter = limiter or TokenBucket(weight_limit, weight_limit / 60.0)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.metrics = {"requests": 0, "retries": 0, "errors": 0, "throttled_s": 0.0}
+
+    def _get(self, params: Dict[str, str], weight: int):
+        attempt = 0
+        while True:
+            self.metrics["throttled_s"] += self.limiter.acquire(weight)
+            self.metrics["requests"] += 1
+            retry_after = None
+            try:
+                response = self.session.get(self.ticker_url, params=params, timeout=self.timeout)
+                used = response.headers.get("X-MBX-USED-WEIGHT-1M")
+                if used is not None:
+                    self.limiter.sync(float(used))
+                if response.status_code not in RETRY_STATUSES:
+                    response.raise_for_status()
+                    return response.json()
+                error = requests.exceptions.HTTPError(f"{response.status_code} from {self.ticker_url}",
+                                                      response=response)
+                retry_after = response.headers.get("Retry-After")
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                error = e
+            if attempt >= self.retries:
+                raise error
+            attempt += 1
+            self.metrics["retries"] += 1
+            delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+            if retry_after is not None:
+                delay = max(delay, float(retry_after))
+            logging.warning(f"Retrying price request in {delay:.2f}s after: {error}")
+            time.sleep(delay)
+
+    def fetch_price(self, symbol: str) -> float:
+        """Fetches the latest price of one symbol.
+
+        Args:
+            symbol (str): Exchange symbol, e.g. "BTCUSDT".
+
+        Returns:
+            float: The price.
+
+        Raises:
+            requests.exceptions.RequestException: If the request failed after retries.
+        """
+        return float(self._get({"symbol": symbol}, SINGLE_WEIGHT)["price"])
+
+    def get_price(self, symbol: str) -> Optional[float]:
+        """Like `fetch_price`, but logs failures and returns None."""
+        try:
+            return self.fetch_price(symbol)
+        except (requests.exceptions.RequestException, KeyError, ValueError) as e:
+            self.metrics["errors"] += 1
+            logging.error(f"Error fetching price data: {e}")
+            return None
+
+    def get_prices(self, symbols: Optional[Sequence[str]] = None) -> Dict[str, float]:
+        """Fetches the latest prices of many symbols in one request.
+
+        Args:
+            symbols (Sequence[str], optional): Exchange symbols. Defaults to
+                every symbol listed on the exchange.
+
+        Returns:
+            Dict[str, float]: Prices keyed by symbol; empty if the request failed.
+        """
+        params = {"symbols": json.dumps(list(symbols), separators=(",", ":"))} if symbols else {}
+        try:
+            return {item["symbol"]: float(item["price"]) for item in self._get(params, BATCH_WEIGHT)}
+        except (requests.exceptions.RequestException, KeyError, ValueError, TypeError) as e:
+            self.metrics["errors"] += 1
+            logging.error(f"Error fetching price data: {e}")
+            return {}
+
+    def close(self) -> None:
+        """Closes the pooled connections."""
+        self.session.close()
+
+
+_clients: Dict[str, PriceClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(ticker_url: str = TICKER_URL) -> PriceClient:
+    """Returns the process-wide client for a ticker endpoint.
+
+    Every caller shares the same session and weight budget.
+
+    Args:
+        ticker_url (str): Ticker price endpoint.
+
+    Returns:
+        PriceClient: Shared client.
+    """
+    with _clients_lock:
+        client = _clients.get(ticker_url)
+        if client is None:
+            client = _clients[ticker_url] = PriceClient(ticker_url)
+        return client
+
+
+# Unit tests
+def _stub_server(responses):
+    """Starts a local ticker server returning queued (status, headers, body) responses."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from urllib.parse import parse_qs, urlparse
+    seen = []
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            seen.append((parse_qs(urlparse(self.path).query), self.client_address[1]))
+            status, headers, body = responses.pop(0)
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}/api/v3/ticker/price", seen
+
+
+def test_single_and_batch_requests():
+    """Test single and batched tickers, keep-alive reuse and weight syncing."""
+    server, url, seen = _stub_server([
+        (200, {"X-MBX-USED-WEIGHT-1M": "100"}, {"symbol": "BTCUSDT", "price": "45000.10"}),
+        (200, {}, [{"symbol": "BTCUSDT", "price": "45000.10"}, {"symbol": "ETHUSDT", "price": "3000.5"}]),
+    ])
+    client = PriceClient(url, weight_limit=1000)
+    try:
+        assert client.get_price("BTCUSDT") == 45000.10, "Single price not parsed."
+        assert client.limiter.tokens <= 900, "Used weight header not applied."
+        prices = client.get_prices(["BTCUSDT", "ETHUSDT"])
+        assert prices == {"BTCUSDT": 45000.10, "ETHUSDT": 3000.5}, "Batch prices not parsed."
+        assert seen[1][0] == {"symbols": ['["BTCUSDT","ETHUSDT"]']}, "Batch request not sent as one call."
+        assert seen[0][1] == seen[1][1], "Connection not reused."
+    finally:
+        client.close()
+        server.shutdown()
+
+
+def test_retries_with_backoff():
+    """Test that 5xx and 429 responses are retried and a final failure returns None."""
+    server, url, seen = _stub_server([
+        (500, {}, {"msg": "error"}),
+        (429, {"Retry-After": "0"}, {"msg": "slow down"}),
+        (200, {}, {"symbol": "BTCUSDT", "price": "1.5"}),
+        (503, {}, {}), (503, {}, {}),
+    ])
+    client = PriceClient(url, retries=2, backoff=0.001)
+    try:
+        assert client.get_price("BTCUSDT") == 1.5, "Request not retried."
+        assert client.metrics["retries"] == 2, "Retries not counted."
+        client.retries = 1
+        assert client.get_price("BTCUSDT") is None, "Exhausted retries not reported."
+        assert len(seen) == 5, "Unexpected number of attempts."
+    finally:
+        client.close()
+        server.shutdown()
+
+
+def test_token_bucket_waits_for_refill():
+    """Test that the bucket enforces its refill rate."""
+    now = [0.0]
+    bucket = TokenBucket(10, 5, clock=lambda: now[0], sleep=lambda s: now.__setitem__(0, now[0] + s))
+    assert bucket.acquire(10) == 0.0, "Full bucket should not wait."
+    assert not bucket.try_acquire(1), "Empty bucket granted a token."
+    assert abs(bucket.acquire(5) - 1.0) < 1e-9, "Wait does not match the refill rate."
+
+
+if __name__ == "__main__":
+    test_single_and_batch_requests()
+    test_retries_with_backoff()
+    test_token_bucket_waits_for_refill()
+    print("All tests passed.")
@@ -1,120 +1,207 @@
-import threading  
-import time  
+import time
 from typing import Dict, Any
-
-class RealTimeRiskController:  
-    """Monitors positions and enforces real-time risk controls."""
-
-    def \_\_init\_\_(self, max\_exposure: float, max\_drawdown: float):  
-        self.positions \= {}  
-        self.lock \= threading.Lock()  
-        self.max\_exposure \= max\_exposure  
-        self.max\_drawdown \= max\_drawdown  
-        self.account\_equity \= 0.0  
-        self.initial\_equity \= 0.0
-
-    def update\_position(self, symbol: str, quantity: float, price: float):  
+from position_book import PositionBook, PositionsView
+from pretrade_risk import PreTradeRiskEngine
+
+class RealTimeRiskController:
+    """Monitors positions and enforces real-time risk controls.
+
+    Positions live in a `PositionBook`, which keeps exposure and PnL totals
+    up to date per fill, so risk checks are O(1) and readers never block
+    the fill path. `positions` is a read-only dict view of the book.
+    Order checks are delegated to a `PreTradeRiskEngine` over the same
+    book, with `max_exposure` as its gross notional limit; the post-trade
+    check in `_evaluate_risk` compares the same gross exposure, so an order
+    the pre-trade engine accepts cannot trigger an unwind. Pass the engine's
+    other limits (max_quantity, collar_bps, max_rate, ...) as keyword arguments.
+
+    When a limit is breached every position is closed in the book; set
+    `on_unwind` to a callable taking (symbol, signed quantity) to execute
+    those closing trades, e.g. through a broker or a backtester.
+    """
+
+    def __init__(self, max_exposure: float, max_drawdown: float, **pretrade_limits: Any):
+        self.book = PositionBook()
+        self.positions = PositionsView(self.book)
+        self.pretrade = PreTradeRiskEngine(self.book, max_gross_notional=max_exposure, **pretrade_limits)
+        self.last_prices = {}
+        self.max_exposure = max_exposure
+        self.max_drawdown = max_drawdown
+        self.account_equity = 0.0
+        self.initial_equity = 0.0
+        self.on_unwind = None
+
+    def update_position(self, symbol: str, quantity: float, price: float):
         """Updates the position for a given symbol.
 
-        Args:  
-            symbol (str): The trading symbol.  
-            quantity (float): The quantity of the position.  
-            price (float): The current price of the symbol.  
-        """  
-        with self.lock:  
-            if symbol not in self.positions:  
-                self.positions\[symbol\] \= {"quantity": 0.0, "value": 0.0}
-
-            position \= self.positions\[symbol\]  
-            position\["quantity"\] \+= quantity  
-            position\["value"\] \= position\["quantity"\] \* price  
-            self.\_evaluate\_risk()
-
-    def calculate\_exposure(self) \-\> float:  
+        Args:
+            symbol (str): The trading symbol.
+            quantity (float): The quantity of the position.
+            price (float): The current price of the symbol.
+        """
+        self.last_prices[symbol] = price
+        self.pretrade.on_tick(symbol, price)
+        self.book.fill(symbol, quantity, price)
+        self._evaluate_risk()
+
+    def mark_price(self, symbol: str, price: float):
+        """Revalues a position at the latest market price.
+
+        Args:
+            symbol (str): The trading symbol.
+            price (float): The current price of the symbol.
+        """
+        self.last_prices[symbol] = price
+        self.pretrade.on_tick(symbol, price)
+        self.book.mark(symbol, price)
+
+    def validate_order(self, symbol: str, side: str, quantity: float, price: float = None) -> bool:
+        """Runs the pre-trade checks on an order; see `PreTradeRiskEngine.check`.
+
+        Args:
+            symbol (str): The trading symbol.
+            side (str): "buy" or "sell".
+            quantity (float): Order quantity.
+            price (float, optional): Order price. Defaults to the last price seen for the symbol.
+
+        Returns:
+            bool: True if the order may be sent.
+        """
+        return self.pretrade.validate_order(symbol, side, quantity, price)
+
+    def check_limits(self, signal: Dict[str, Any]) -> bool:
+        """Checks a market maker's two-sided quote; see `PreTradeRiskEngine.check_limits`.
+
+        Args:
+            signal (Dict[str, Any]): Quote with "bid_price" and "ask_price".
+
+        Returns:
+            bool: True if the quote may be placed.
+        """
+        return self.pretrade.check_limits(signal)
+
+    def calculate_exposure(self) -> float:
         """Calculates total exposure based on current positions.
 
-        Returns:  
-            float: Total exposure value.  
-        """  
-        with self.lock:  
-            return sum(pos\["value"\] for pos in self.positions.values())
+        Returns:
+            float: Gross exposure, the sum of absolute position values, as limited by `max_exposure`.
+        """
+        return self.book.gross_exposure
 
-    def calculate\_drawdown(self) \-\> float:  
+    def calculate_drawdown(self) -> float:
         """Calculates the current drawdown as a percentage.
 
-        Returns:  
-            float: Current drawdown percentage.  
-        """  
-        with self.lock:  
-            return max(0.0, (self.initial\_equity \- self.account\_equity) / self.initial\_equity \* 100\)
-
-    def \_evaluate\_risk(self):  
-        """Evaluates current risk and enforces controls if necessary."""  
-        exposure \= self.calculate\_exposure()  
-        drawdown \= self.calculate\_drawdown()
-
-        if exposure \> self.max\_exposure:  
-            print("Exposure limit breached\! Initiating emergency unwinding.")  
-            self.\_unwind\_positions()
-
-        if drawdown \> self.max\_drawdown:  
-            print("Drawdown limit breached\! Initiating emergency unwinding.")  
-            self.\_unwind\_positions()
-
-    def \_unwind\_positions(self):  
-        """Unwinds all positions to reduce exposure."""  
-        with self.lock:  
-            for symbol in self.positions.keys():  
-                self.positions\[symbol\]\["quantity"\] \= 0.0  
-                self.positions\[symbol\]\["value"\] \= 0.0  
-            print("All positions unwound.")
-
-    def adjust\_trade(self, symbol: str, price: float, risk\_factor: float):  
+        Returns:
+            float: Current drawdown percentage.
+        """
+        return max(0.0, (self.initial_equity - self.account_equity) / self.initial_equity * 100)
+
+    def _evaluate_risk(self):
+        """Evaluates current risk and enforces controls if necessary."""
+        exposure = self.calculate_exposure()
+        drawdown = self.calculate_drawdown()
+
+        if exposure > self.max_exposure:
+            print("Exposure limit breached! Initiating emergency unwinding.")
+            self._unwind_positions()
+
+        if drawdown > self.max_drawdown:
+            print("Drawdown limit breached! Initiating emergency unwinding.")
+            self.pretrade.kill("drawdown limit")
+            self._unwind_positions()
+
+    def _unwind_positions(self):
+        """Unwinds all positions to reduce exposure, reporting each closing trade to `on_unwind`."""
+        for symbol in list(self.book.symbols):
+            quantity = self.positions[symbol]["quantity"]
+            if quantity:
+                self.book.flatten(symbol)
+                if self.on_unwind is not None:
+                    self.on_unwind(symbol, -quantity)
+        print("All positions unwound.")
+
+    def adjust_trade(self, symbol: str, price: float, risk_factor: float):
         """Adjusts trade size based on risk factor.
 
-        Args:  
-            symbol (str): The trading symbol.  
-            price (float): The current price of the symbol.  
-            risk\_factor (float): The risk adjustment factor.  
-        """  
-        with self.lock:  
-            position \= self.positions.get(symbol, {"quantity": 0.0})  
-            adjustment \= \-position\["quantity"\] \* risk\_factor  
-            print(f"Adjusting trade for {symbol} by {adjustment} units.")  
-            \# Logic to send adjustment order to the market goes here
-
-\# Unit tests  
-def test\_exposure\_limit():  
-    """Test exposure limit enforcement."""  
-    controller \= RealTimeRiskController(max\_exposure=10000.0, max\_drawdown=10.0)  
-    controller.initial\_equity \= 15000.0  
-    controller.account\_equity \= 15000.0
-
-    controller.update\_position("BTCUSD", 1.0, 11000.0)  
-    assert controller.calculate\_exposure() \<= 10000.0, "Exposure limit not enforced."
-
-def test\_drawdown\_limit():  
-    """Test drawdown limit enforcement."""  
-    controller \= RealTimeRiskController(max\_exposure=10000.0, max\_drawdown=10.0)  
-    controller.initial\_equity \= 15000.0  
-    controller.account\_equity \= 13000.0
-
-    controller.update\_position("BTCUSD", 1.0, 9000.0)  
-    assert controller.calculate\_drawdown() \<= 10.0, "Drawdown limit not enforced."
-
-def test\_position\_unwinding():  
-    """Test emergency position unwinding."""  
-    controller \= RealTimeRiskController(max\_exposure=10000.0, max\_drawdown=10.0)  
-    controller.initial\_equity \= 15000.0  
-    controller.account\_equity \= 13000.0
-
-    controller.update\_position("BTCUSD", 1.0, 11000.0)  
-    controller.\_unwind\_positions()  
-    assert sum(pos\["quantity"\] for pos in controller.positions.values()) \== 0.0, "Positions not unwound."
-
-if \_\_name\_\_ \== "\_\_main\_\_":  
-    test\_exposure\_limit()  
-    test\_drawdown\_limit()  
-    test\_position\_unwinding()  
+        Args:
+            symbol (str): The trading symbol.
+            price (float): The current price of the symbol.
+            risk_factor (float): The risk adjustment factor.
+        """
+        position = self.positions.get(symbol, {"quantity": 0.0})
+        adjustment = -position["quantity"] * risk_factor
+        print(f"Adjusting trade for {symbol} by {adjustment} units.")
+        # Logic to send adjustment order to the market goes here
+
+# Unit tests
+def test_exposure_limit():
+    """Test exposure limit enforcement."""
+    controller = RealTimeRiskController(max_exposure=10000.0, max_drawdown=10.0)
+    controller.initial_equity = 15000.0
+    controller.account_equity = 15000.0
+
+    controller.update_position("BTCUSD", 1.0, 11000.0)
+    assert controller.calculate_exposure() <= 10000.0, "Exposure limit not enforced."
+
+def test_short_exposure_limit():
+    """Test that the exposure limit is gross: short positions count against it."""
+    controller = RealTimeRiskController(max_exposure=10000.0, max_drawdown=10.0)
+    controller.initial_equity = controller.account_equity = 15000.0
+    controller.update_position("BTCUSD", 1.0, 6000.0)
+    assert not controller.validate_order("ETHUSD", "sell", 2.0, 3000.0), "Short over the gross limit accepted."
+    controller.update_position("ETHUSD", -2.0, 3000.0)
+    assert controller.calculate_exposure() == 0.0, "Gross breach not unwound."
+
+def test_drawdown_limit():
+    """Test drawdown limit enforcement."""
+    controller = RealTimeRiskController(max_exposure=10000.0, max_drawdown=10.0)
+    controller.initial_equity = 15000.0
+    controller.account_equity = 14000.0  # 6.7% drawdown, within the limit
+
+    controller.update_position("BTCUSD", 1.0, 9000.0)
+    assert controller.positions["BTCUSD"]["quantity"] == 1.0, "Position unwound within the drawdown limit."
+    controller.account_equity = 13000.0  # 13.3% drawdown
+    controller.update_position("BTCUSD", 0.1, 9000.0)
+    assert controller.calculate_drawdown() > 10.0 and controller.pretrade.killed, "Drawdown limit not enforced."
+    assert controller.positions["BTCUSD"]["quantity"] == 0.0, "Positions not unwound on a drawdown breach."
+
+def test_position_unwinding():
+    """Test emergency position unwinding."""
+    controller = RealTimeRiskController(max_exposure=10000.0, max_drawdown=10.0)
+    controller.initial_equity = 15000.0
+    controller.account_equity = 13000.0
+
+    controller.update_position("BTCUSD", 1.0, 11000.0)
+    controller._unwind_positions()
+    assert sum(pos["quantity"] for pos in controller.positions.values()) == 0.0, "Positions not unwound."
+
+def test_book_backed_positions():
+    """Test that fills and marks reach the position book and its dict view."""
+    controller = RealTimeRiskController(max_exposure=1e6, max_drawdown=10.0)
+    controller.initial_equity = controller.account_equity = 15000.0
+    controller.update_position("BTCUSD", 2.0, 100.0)
+    controller.update_position("ETHUSD", -1.0, 50.0)
+    controller.mark_price("BTCUSD", 110.0)
+    assert controller.positions["BTCUSD"] == {"quantity": 2.0, "value": 220.0, "avg_price": 100.0,
+                                              "realized_pnl": 0.0}, "Position view incorrect."
+    assert controller.book.gross_exposure == 270.0 and controller.book.unrealized_pnl == 20.0, "Totals incorrect."
+    assert set(controller.positions) == {"BTCUSD", "ETHUSD"}, "Symbols missing from the view."
+
+def test_validate_order():
+    """Test that orders breaching the exposure limit are rejected."""
+    controller = RealTimeRiskController(max_exposure=10000.0, max_drawdown=10.0)
+    controller.initial_equity = controller.account_equity = 15000.0
+    controller.update_position("BTCUSD", 0.1, 50000.0)
+    assert controller.validate_order("BTCUSD", "buy", 0.1), "Order within the limit rejected."
+    assert not controller.validate_order("BTCUSD", "buy", 0.2), "Order over the limit accepted."
+    assert controller.validate_order("BTCUSD", "sell", 0.2), "Reducing order rejected."
+    assert not controller.validate_order("ETHUSD", "buy", 1.0), "Order without a price accepted."
+
+if __name__ == "__main__":
+    test_exposure_limit()
+    test_short_exposure_limit()
+    test_drawdown_limit()
+    test_position_unwinding()
+    test_book_backed_positions()
+    test_validate_order()
     print("All tests passed.")
-
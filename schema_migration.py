@@ -0,0 +1,184 @@
+import argparse
+import logging
+import sqlite3
+from typing import Dict, List
+
+from storage import SCHEMA, to_epoch_ns
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+DEFAULT_SYMBOL = "BTCUSDT"  # price_data only ever held this symbol
+CHUNK_SIZE = 50000
+
+# Legacy layouts: SELECT used to read them and the target column order.
+LEGACY_SELECTS = {
+    "price_data": "SELECT ?, timestamp, price FROM {table} ORDER BY timestamp, id",
+    # NULL symbols are mapped to the default symbol before sorting, so they interleave with its rows by time.
+    "market_data": ("SELECT COALESCE(symbol, ?1) AS mapped, timestamp, exchange, price, volume FROM {table} "
+                    "ORDER BY mapped, timestamp, id"),
+}
+INSERTS = {
+    "price_data": "INSERT INTO price_data (symbol, ts, price) VALUES (?, ?, ?)",
+    "market_data": "INSERT INTO market_data (symbol, ts, exchange, price, volume) VALUES (?, ?, ?, ?, ?)",
+}
+
+
+def _columns(connection: sqlite3.Connection, table: str) -> List[str]:
+    return [row[1] for row in connection.execute(f"PRAGMA table_info({table})")]
+
+
+def needs_migration(connection: sqlite3.Connection, table: str) -> bool:
+    """Checks whether a table still uses the legacy TEXT-timestamp layout.
+
+    Args:
+        connection (sqlite3.Connection): Open database connection.
+        table (str): Table name.
+
+    Returns:
+        bool: True if the table exists and has a `timestamp` column.
+    """
+    return "timestamp" in _columns(connection, table)
+
+
+def migrate_table(connection: sqlite3.Connection, table: str, default_symbol: str = DEFAULT_SYMBOL) -> int:
+    """Rewrites one legacy table into the (symbol, ts) clustered layout.
+
+    Runs inside the caller's transaction. Rows are converted in chunks;
+    ticks that land on the same (symbol, ts) are shifted forward by one
+    nanosecond each so none are dropped and their order is kept.
+
+    Args:
+        connection (sqlite3.Connection): Connection with an open transaction.
+        table (str): "price_data" or "market_data".
+        default_symbol (str): Symbol for legacy price_data rows.
+
+    Returns:
+        int: Number of rows migrated.
+    """
+    legacy = f"{table}_legacy"
+    connection.execute(f"ALTER TABLE {table} RENAME TO {legacy}")
+    connection.execute(SCHEMA[table])
+
+    cursor = connection.execute(LEGACY_SELECTS[table].format(table=legacy), (default_symbol,))
+    last_ts: Dict[str, int] = {}
+    migrated = 0
+    while True:
+        rows = cursor.fetchmany(CHUNK_SIZE)
+        if not rows:
+            break
+        converted = []
+        for symbol, timestamp, *values in rows:
+            ts = to_epoch_ns(timestamp)
+            previous = last_ts.get(symbol)
+            if previous is not None and ts <= previous:
+                ts = previous + 1
+            last_ts[symbol] = ts
+            converted.append((symbol, ts, *values))
+        connection.executemany(INSERTS[table], converted)
+        migrated += len(converted)
+
+    connection.execute(f"DROP TABLE {legacy}")
+    return migrated
+
+
+def migrate_database(db_path: str, default_symbol: str = DEFAULT_SYMBOL, vacuum: bool = False) -> Dict[str, int]:
+    """Migrates price_data and market_data in a database file in place.
+
+    Each table is migrated in its own transaction, so a failure leaves that
+    table in its legacy layout. Already migrated tables are skipped.
+
+    Args:
+        db_path (str): Path to the SQLite database.
+        default_symbol (str): Symbol for legacy price_data rows.
+        vacuum (bool): Reclaim the space freed by the legacy tables.
+
+    Returns:
+        Dict[str, int]: Rows migrated per table.
+    """
+    connection = sqlite3.connect(db_path, isolation_level=None)
+    results = {}
+    try:
+        for table in LEGACY_SELECTS:
+            if not needs_migration(connection, table):
+                continue
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                results[table] = migrate_table(connection, table, default_symbol)
+                connection.execute("COMMIT")
+            except Exception:
+                connection.execute("ROLLBACK")
+                raise
+            logging.info(f"Migrated {results[table]} rows in {db_path}:{table}")
+        if vacuum and results:
+            connection.execute("VACUUM")
+        connection.execute("PRAGMA journal_mode=WAL")
+    finally:
+        connection.close()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Migrate price history tables to the (symbol, ts) schema.")
+    parser.add_argument("databases", nargs="+", help="SQLite files, e.g. crypto_prices.db market_data.db")
+    parser.add_argument("--symbol", default=DEFAULT_SYMBOL, help="Symbol for legacy price_data rows")
+    parser.add_argument("--vacuum", action="store_true", help="Compact each file after migrating")
+    args = parser.parse_args()
+    for db_path in args.databases:
+        migrate_database(db_path, args.symbol, args.vacuum)
+
+
+# Unit tests
+def test_migrate_legacy_tables(tmp_path):
+    """Test that legacy rows are converted, deduplicated and reindexed."""
+    db_path = str(tmp_path / "legacy.db")
+    connection = sqlite3.connect(db_path)
+    connection.execute("""CREATE TABLE price_data (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp TEXT NOT NULL, price REAL NOT NULL)""")
+    connection.execute("""CREATE TABLE market_data (
+        id INTEGER PRIMARY KEY, exchange TEXT, symbol TEXT,
+        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP, price REAL, volume REAL)""")
+    connection.executemany("INSERT INTO price_data (timestamp, price) VALUES (?, ?)",
+                           [("2025-01-01T00:00:01.500000", 2.0), ("2025-01-01T00:00:00", 1.0)])
+    connection.executemany("INSERT INTO market_data (exchange, symbol, timestamp, price, volume) VALUES (?, ?, ?, ?, ?)",
+                           [("ex", "BTC/USD", "2025-01-01 00:00:00", 1.0, 0.5),
+                            ("ex", "BTC/USD", "2025-01-01 00:00:00", 2.0, 0.5)])
+    connection.commit()
+    connection.close()
+
+    results = migrate_database(db_path)
+    assert results == {"price_data": 2, "market_data": 2}, "Unexpected migrated row counts."
+    assert migrate_database(db_path) == {}, "Migration is not idempotent."
+
+    connection = sqlite3.connect(db_path)
+    prices = connection.execute("SELECT symbol, ts, price FROM price_data ORDER BY ts").fetchall()
+    assert prices == [("BTCUSDT", 1735689600000000000, 1.0), ("BTCUSDT", 1735689601500000000, 2.0)], \
+        "price_data rows not converted."
+    ticks = connection.execute("SELECT ts, price FROM market_data WHERE symbol = 'BTC/USD' ORDER BY ts").fetchall()
+    assert ticks == [(1735689600000000000, 1.0), (1735689600000000001, 2.0)], "Duplicate timestamps not preserved."
+    connection.close()
+
+
+def test_null_symbols_sorted_with_default(tmp_path):
+    """Test that NULL-symbol rows are ordered by time among the default symbol's rows."""
+    db_path = str(tmp_path / "legacy.db")
+    connection = sqlite3.connect(db_path)
+    connection.execute("""CREATE TABLE market_data (
+        id INTEGER PRIMARY KEY, exchange TEXT, symbol TEXT,
+        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP, price REAL, volume REAL)""")
+    connection.executemany("INSERT INTO market_data (exchange, symbol, timestamp, price, volume) VALUES (?, ?, ?, ?, ?)",
+                           [("ex", None, "2025-06-01 00:00:00", 2.0, 0.5),
+                            ("ex", "BTCUSDT", "2025-01-01 00:00:00", 1.0, 0.5)])
+    connection.commit()
+    connection.close()
+
+    assert migrate_database(db_path) == {"market_data": 2}
+    connection = sqlite3.connect(db_path)
+    ticks = connection.execute("SELECT symbol, ts, price FROM market_data ORDER BY ts").fetchall()
+    assert ticks == [("BTCUSDT", 1735689600000000000, 1.0), ("BTCUSDT", 1748736000000000000, 2.0)], \
+        "NULL-symbol row shifted a later-sorted tick."
+    connection.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,355 @@
+import json
+import logging
+import math
+import os
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+# objective(params, fidelity) -> performance, where fidelity is the fraction of history used
+Objective = Callable[[Dict[str, Any], float], float]
+
+
+def history_slice(data: pd.DataFrame, fidelity: float) -> pd.DataFrame:
+    """Returns the most recent `fidelity` fraction of the rows (all of them at 1.0)."""
+    if fidelity >= 1.0:
+        return data
+    return data.iloc[len(data) - max(1, math.ceil(len(data) * fidelity)):]
+
+
+def _key(params: Dict[str, Any], fidelity: float) -> str:
+    return json.dumps([params, round(fidelity, 9)], sort_keys=True, default=str)
+
+
+class TrialLog:
+    """Append-only JSON-lines log of evaluated trials.
+
+    Every evaluation is written and flushed as soon as it finishes. A search
+    restarted with the same seed regenerates the same candidates and takes
+    their scores from the log, so an interrupted run resumes where it
+    stopped. A torn last line from an interrupted write is truncated on
+    load, so later appends start on a fresh line.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.records: List[Dict[str, Any]] = []
+        self._scores: Dict[str, float] = {}
+        if path and os.path.exists(path):
+            valid = 0  # Byte offset after the last complete record
+            with open(path, "rb") as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break
+                    valid += len(line)
+                    self.records.append(record)
+                    self._scores[_key(record["params"], record["fidelity"])] = record["performance"]
+            if valid < os.path.getsize(path):
+                logging.warning(f"Truncating torn trial log tail in {path} at byte {valid}")
+                with open(path, "r+b") as f:
+                    f.truncate(valid)
+
+    def lookup(self, params: Dict[str, Any], fidelity: float) -> Optional[float]:
+        """Returns the logged performance of a trial, or None if it has not run."""
+        return self._scores.get(_key(params, fidelity))
+
+    def append(self, record: Dict[str, Any]) -> None:
+        """Records a finished trial."""
+        self.records.append(record)
+        self._scores[_key(record["params"], record["fidelity"])] = record["performance"]
+        if self.path:
+            with open(self.path, "a") as f:
+                f.write(json.dumps(record, default=str) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+
+class SearchStrategy:
+    """Base class for budgeted, seeded parameter searches.
+
+    Subclasses implement `_search`, calling `self._evaluate(params, fidelity)`
+    for every trial; it enforces the budget, reuses scores from the trial
+    log and reports progress.
+
+    Args:
+        budget (int): Maximum number of evaluations, including resumed ones.
+        seed (int): Seed for candidate sampling.
+        log_path (str, optional): JSON-lines trial log for resuming.
+    """
+
+    name = "search"
+
+    def __init__(self, budget: int = 50, seed: int = 0, log_path: Optional[str] = None):
+        self.budget = budget
+        self.seed = seed
+        self.log_path = log_path
+
+    def run(self, objective: Objective, param_grid: Dict[str, Sequence[Any]],
+            progress: Optional[Callable[[int, int, float], Optional[bool]]] = None,
+            target: Optional[float] = None) -> Dict[str, Any]:
+        """Runs the search.
+
+        Args:
+            objective (Callable): Called as objective(params, fidelity).
+            param_grid (Dict[str, Sequence[Any]]): Candidate values per parameter.
+            progress (Callable, optional): Called as progress(done, budget, best);
+                returning True stops the search.
+            target (float, optional): Stop once a full-history score reaches this value.
+
+        Returns:
+            Dict[str, Any]: Best full-history "params" and "performance", the
+                "results" table of every trial, and "completed", "total",
+                "resumed" and "aborted".
+        """
+        self._objective = objective
+        self._progress = progress
+        self._target = target
+        self._log = TrialLog(self.log_path)
+        self._rng = np.random.default_rng(self.seed)
+        self._keys = list(param_grid)
+        self._values = [list(param_grid[key]) for key in self._keys]
+        self._trials: List[Dict[str, Any]] = []
+        self._resumed = 0
+        self._best: Tuple[Optional[Dict[str, Any]], float] = (None, -np.inf)
+        self._stopped = False
+        try:
+            self._search()
+        except _SearchFinished:
+            pass
+        params, performance = self._best
+        return {"params": params, "performance": performance, "results": pd.DataFrame(self._trials),
+                "completed": len(self._trials), "total": self.budget, "resumed": self._resumed,
+                "aborted": self._stopped}
+
+    def _search(self) -> None:
+        raise NotImplementedError
+
+    def _params(self, indices: Sequence[int]) -> Dict[str, Any]:
+        return {key: values[i] for key, values, i in zip(self._keys, self._values, indices)}
+
+    def _sample(self, n: int, exclude: Optional[set] = None) -> List[Tuple[int, ...]]:
+        """Draws up to `n` distinct grid points without building the full product."""
+        sizes = [len(values) for values in self._values]
+        n = min(n, int(np.prod(sizes, dtype=float)) - len(exclude or ()))
+        seen = set(exclude or ())
+        points = []
+        while len(points) < n:
+            point = tuple(int(self._rng.integers(size)) for size in sizes)
+            if point not in seen:
+                seen.add(point)
+                points.append(point)
+        return points
+
+    def _evaluate(self, params: Dict[str, Any], fidelity: float = 1.0) -> float:
+        if len(self._trials) >= self.budget:
+            raise _SearchFinished
+        performance = self._log.lookup(params, fidelity)
+        error = None
+        if performance is not None:
+            self._resumed += 1
+        else:
+            try:
+                performance = float(self._objective(params, fidelity))
+            except Exception as e:
+                performance, error = math.nan, f"{type(e).__name__}: {e}"
+                logging.warning(f"Trial {params} failed: {error}")
+            self._log.append({"trial": len(self._trials), "strategy": self.name, "params": params,
+                              "fidelity": fidelity, "performance": performance, "error": error})
+        self._trials.append(dict(params, trial=len(self._trials), fidelity=fidelity,
+                                 performance=performance, error=error))
+        if fidelity >= 1.0 and performance > self._best[1]:
+            self._best = (params, performance)
+        stop = self._progress(len(self._trials), self.budget, self._best[1]) if self._progress else False
+        if stop or (self._target is not None and self._best[1] >= self._target):
+            self._stopped = True
+            raise _SearchFinished
+        return performance
+
+
+class _SearchFinished(Exception):
+    """Raised inside a search when the budget is spent or the search is stopped."""
+
+
+class RandomSearch(SearchStrategy):
+    """Evaluates `budget` distinct grid points drawn uniformly at random on the full history."""
+
+    name = "random"
+
+    def _search(self) -> None:
+        for point in self._sample(self.budget):
+            self._evaluate(self._params(point))
+
+
+class SuccessiveHalving(SearchStrategy):
+    """Successive halving on growing slices of history.
+
+    Random candidates are first scored on the most recent `min_fidelity`
+    fraction of the data; each round keeps the best 1/`eta` of them and
+    multiplies the slice by `eta` until the full history is used. The
+    number of starting candidates is the largest that fits the budget.
+
+    Args:
+        eta (int): Reduction factor between rounds.
+        min_fidelity (float): Fraction of history used in the first round.
+    """
+
+    name = "successive_halving"
+
+    def __init__(self, budget: int = 50, seed: int = 0, log_path: Optional[str] = None,
+                 eta: int = 3, min_fidelity: float = 1 / 9):
+        super().__init__(budget, seed, log_path)
+        self.eta = eta
+        self.min_fidelity = min_fidelity
+
+    def _search(self) -> None:
+        rounds = max(1, math.ceil(math.log(1 / self.min_fidelity, self.eta) - 1e-9) + 1)
+        n = max(1, int(self.budget / sum(self.eta ** -r for r in range(rounds))))
+        candidates = [self._params(point) for point in self._sample(n)]
+        for r in range(rounds):
+            fidelity = 1.0 if r == rounds - 1 else self.min_fidelity * self.eta ** r
+            scores = [self._evaluate(params, fidelity) for params in candidates]
+            if r < rounds - 1:
+                order = np.argsort(-np.nan_to_num(scores, nan=-np.inf), kind="stable")
+                candidates = [candidates[i] for i in order[:max(1, len(candidates) // self.eta)]]
+
+
+class BayesianSearch(SearchStrategy):
+    """Gaussian-process surrogate search with expected improvement.
+
+    Grid points are encoded by the position of each value in its list,
+    scaled to [0, 1]. After `n_initial` random trials, each step fits a GP
+    with an RBF kernel to the scores so far and evaluates the untried point
+    with the highest expected improvement among `n_candidates` random ones.
+
+    Args:
+        n_initial (int): Random trials before the surrogate is used.
+        n_candidates (int): Points scored by the acquisition function per step.
+        length_scale (float): RBF kernel length scale in encoded units.
+    """
+
+    name = "bayesian"
+
+    def __init__(self, budget: int = 50, seed: int = 0, log_path: Optional[str] = None,
+                 n_initial: int = 10, n_candidates: int = 256, length_scale: float = 0.25):
+        super().__init__(budget, seed, log_path)
+        self.n_initial = n_initial
+        self.n_candidates = n_candidates
+        self.length_scale = length_scale
+
+    def _encode(self, points: Sequence[Tuple[int, ...]]) -> np.ndarray:
+        scale = np.array([max(1, len(values) - 1) for values in self._values], dtype=float)
+        return np.asarray(points, dtype=float).reshape(len(points), len(scale)) / scale
+
+    def _kernel(self, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        distances = ((a[:, None, :] - b[None, :, :]) ** 2).sum(axis=2)
+        return np.exp(-0.5 * distances / self.length_scale ** 2)
+
+    def _search(self) -> None:
+        tried = self._sample(min(self.n_initial, self.budget))
+        scores = [self._evaluate(self._params(point)) for point in tried]
+        erf = np.vectorize(math.erf)
+        while True:
+            candidates = self._sample(self.n_candidates, exclude=set(tried))
+            if not candidates:
+                return
+            finite = np.isfinite(scores)
+            x = self._encode([p for p, ok in zip(tried, finite) if ok])
+            y = np.asarray(scores)[finite]
+            if len(y) == 0:
+                point = candidates[0]
+            else:
+                mean, std = y.mean(), y.std() or 1.0
+                y_norm = (y - mean) / std
+                k = self._kernel(x, x) + 1e-6 * np.eye(len(x))
+                chol = np.linalg.cholesky(k)
+                alpha = np.linalg.solve(chol.T, np.linalg.solve(chol, y_norm))
+                k_star = self._kernel(self._encode(candidates), x)
+                mu = k_star @ alpha
+                v = np.linalg.solve(chol, k_star.T)
+                sigma = np.sqrt(np.maximum(1.0 - (v ** 2).sum(axis=0), 1e-12))
+                z = (mu - y_norm.max()) / sigma
+                cdf = 0.5 * (1 + erf(z / math.sqrt(2)))
+                pdf = np.exp(-0.5 * z ** 2) / math.sqrt(2 * math.pi)
+                point = candidates[int(np.argmax((mu - y_norm.max()) * cdf + sigma * pdf))]
+            tried.append(point)
+            scores.append(self._evaluate(self._params(point)))
+
+
+SEARCH_STRATEGIES = {cls.name: cls for cls in (RandomSearch, SuccessiveHalving, BayesianSearch)}
+
+
+def get_search_strategy(name: str, **kwargs) -> SearchStrategy:
+    """Creates a search strategy by name ("random", "successive_halving" or "bayesian")."""
+    if name not in SEARCH_STRATEGIES:
+        raise ValueError(f"Unknown search strategy: {name}")
+    return SEARCH_STRATEGIES[name](**kwargs)
+
+
+# Unit tests
+def _quadratic(params, fidelity):
+    """Peak at x=7, y=3; lower fidelity adds a fixed bias but keeps the ranking."""
+    return -(params["x"] - 7) ** 2 - (params["y"] - 3) ** 2 - (1 - fidelity)
+
+
+GRID = {"x": list(range(20)), "y": list(range(10))}
+
+
+def test_budget_seed_and_quality():
+    """Test that every strategy honors its budget, is reproducible and finds good regions."""
+    for name in SEARCH_STRATEGIES:
+        first = get_search_strategy(name, budget=40, seed=1).run(_quadratic, GRID)
+        second = get_search_strategy(name, budget=40, seed=1).run(_quadratic, GRID)
+        assert first["completed"] <= 40, f"{name} exceeded its budget."
+        assert first["results"].equals(second["results"]), f"{name} is not reproducible."
+        assert first["performance"] >= -5, f"{name} found a poor optimum: {first['params']}."
+    halving = get_search_strategy("successive_halving", budget=40, seed=1).run(_quadratic, GRID)
+    fidelities = halving["results"]["fidelity"].tolist()
+    assert fidelities == sorted(fidelities) and fidelities[-1] == 1.0, "Slices do not grow."
+
+
+def test_resume_from_trial_log(tmp_path):
+    """Test that an interrupted run resumes from its log without re-evaluating trials."""
+    path = str(tmp_path / "trials.jsonl")
+    calls = []
+
+    def objective(params, fidelity):
+        calls.append(params)
+        return _quadratic(params, fidelity)
+
+    interrupted = BayesianSearch(budget=25, seed=4, log_path=path).run(
+        objective, GRID, progress=lambda done, total, best: done >= 15)
+    assert interrupted["aborted"] and len(calls) == 15, "Run was not interrupted."
+    calls.clear()
+    resumed = BayesianSearch(budget=25, seed=4, log_path=path).run(objective, GRID)
+    full = BayesianSearch(budget=25, seed=4).run(_quadratic, GRID)
+    assert resumed["resumed"] == 15 and len(calls) == 10, "Logged trials were evaluated again."
+    assert resumed["results"].equals(full["results"]), "Resumed run diverged from an uninterrupted one."
+
+
+def test_torn_trial_log_tail(tmp_path):
+    """Test that a torn last line is dropped and does not swallow the next append."""
+    path = str(tmp_path / "torn.jsonl")
+    log = TrialLog(path)
+    log.append({"params": {"x": 1}, "fidelity": 1.0, "performance": 2.0})
+    with open(path, "a") as f:
+        f.write('{"params": {"x": 2}, "fide')
+    log = TrialLog(path)
+    assert len(log.records) == 1, "Torn line loaded."
+    log.append({"params": {"x": 3}, "fidelity": 1.0, "performance": 4.0})
+    reloaded = TrialLog(path)
+    assert reloaded.lookup({"x": 3}, 1.0) == 4.0 and len(reloaded.records) == 2, "Append after a torn line lost."
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+    test_budget_seed_and_quality()
+    with tempfile.TemporaryDirectory() as directory:
+        test_resume_from_trial_log(pathlib.Path(directory))
+        test_torn_trial_log_tail(pathlib.Path(directory))
+    print("All tests passed.")
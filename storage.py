@@ -0,0 +1,535 @@
+import contextlib
+import logging
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+# Schema for every table the bot writes to. Modules call `initialize` instead
+# of carrying their own copy of the DDL.
+SCHEMA: Dict[str, str] = {
+    # Price history is clustered on (symbol, ts) so "latest N ticks" and time
+    # range reads are index range scans. ts is integer epoch nanoseconds (UTC).
+    "price_data": """
+        CREATE TABLE IF NOT EXISTS price_data (
+            symbol TEXT NOT NULL,
+            ts INTEGER NOT NULL,
+            price REAL NOT NULL,
+            PRIMARY KEY (symbol, ts)
+        ) WITHOUT ROWID
+    """,
+    "trading_signals": """
+        CREATE TABLE IF NOT EXISTS trading_signals (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp TEXT NOT NULL,
+            signal TEXT NOT NULL
+        )
+    """,
+    "positions": """
+        CREATE TABLE IF NOT EXISTS positions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp TEXT NOT NULL,
+            symbol TEXT NOT NULL,
+            entry_price REAL NOT NULL,
+            position_size REAL NOT NULL,
+            stop_loss REAL NOT NULL,
+            status TEXT NOT NULL
+        )
+    """,
+    "market_data": """
+        CREATE TABLE IF NOT EXISTS market_data (
+            symbol TEXT NOT NULL,
+            ts INTEGER NOT NULL,
+            exchange TEXT,
+            price REAL,
+            volume REAL,
+            PRIMARY KEY (symbol, ts)
+        ) WITHOUT ROWID
+    """,
+    # OHLCV bars; start_ts is the bar's opening boundary in epoch nanoseconds.
+    "bars": """
+        CREATE TABLE IF NOT EXISTS bars (
+            symbol TEXT NOT NULL,
+            resolution TEXT NOT NULL,
+            start_ts INTEGER NOT NULL,
+            open REAL NOT NULL,
+            high REAL NOT NULL,
+            low REAL NOT NULL,
+            close REAL NOT NULL,
+            volume REAL NOT NULL,
+            trades INTEGER NOT NULL,
+            PRIMARY KEY (symbol, resolution, start_ts)
+        ) WITHOUT ROWID
+    """,
+}
+
+# Columns accepted by `save` for each table, in the order callers pass them.
+TABLE_COLUMNS: Dict[str, Tuple[str, ...]] = {
+    "price_data": ("symbol", "ts", "price"),
+    "trading_signals": ("timestamp", "signal"),
+    "positions": ("timestamp", "symbol", "entry_price", "position_size", "stop_loss", "status"),
+    "market_data": ("symbol", "ts", "exchange", "price", "volume"),
+    "bars": ("symbol", "resolution", "start_ts", "open", "high", "low", "close", "volume", "trades"),
+}
+
+# Tables whose rows are recomputed, so saving an existing key replaces it.
+REPLACE_TABLES = ("bars",)
+
+# Tables keyed on (symbol, ts) that support `fetch_latest` and `fetch_range`.
+TIME_SERIES_TABLES = ("price_data", "market_data")
+
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA busy_timeout=5000",
+)
+
+_last_ns = 0
+_clock_lock = threading.Lock()
+
+
+def now_ns() -> int:
+    """Returns the current UTC time in epoch nanoseconds, strictly increasing.
+
+    Ticks are keyed on (symbol, ts), so two ticks stamped in the same
+    nanosecond would collide; consecutive calls never return the same value.
+
+    Returns:
+        int: Epoch nanoseconds.
+    """
+    global _last_ns
+    with _clock_lock:
+        ts = time.time_ns()
+        if ts <= _last_ns:
+            ts = _last_ns + 1
+        _last_ns = ts
+        return ts
+
+
+def to_epoch_ns(value: Union[str, datetime, int, float]) -> int:
+    """Converts a timestamp to integer epoch nanoseconds.
+
+    Args:
+        value (Union[str, datetime, int, float]): ISO-8601 string or datetime
+            (naive values are taken as UTC), or epoch seconds.
+
+    Returns:
+        int: Epoch nanoseconds.
+    """
+    if isinstance(value, (int, float)):
+        return int(round(value * 1_000_000_000))
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    delta = value - datetime(1970, 1, 1, tzinfo=timezone.utc)
+    return (delta.days * 86400 + delta.seconds) * 1_000_000_000 + delta.microseconds * 1000
+
+
+def event_time_ns(timestamp: Any) -> Optional[int]:
+    """Converts an exchange timestamp in epoch seconds or milliseconds to nanoseconds."""
+    if not isinstance(timestamp, (int, float)):
+        return None
+    return int(timestamp * 1_000_000) if timestamp > 1e11 else int(timestamp * 1_000_000_000)
+
+
+class SQLiteStorage:
+    """Shared SQLite access layer with one long-lived connection per thread.
+
+    Connections are opened lazily on first use in each thread and kept for the
+    lifetime of the storage object. File databases run in WAL mode with
+    `synchronous=NORMAL`, so a commit appends to the log instead of forcing an
+    fsync of the main database file. In-memory databases are private to a
+    connection, so ":memory:" uses a single connection guarded by a lock.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._registry_lock = threading.Lock()
+        self._shared = db_path == ":memory:"
+        self._shared_lock = threading.RLock()
+        self._inserts = {table: self._insert_sql(table) for table in TABLE_COLUMNS}
+
+    @staticmethod
+    def _insert_sql(table: str) -> str:
+        columns = TABLE_COLUMNS[table]
+        placeholders = ", ".join("?" for _ in columns)
+        verb = "INSERT OR REPLACE" if table in REPLACE_TABLES else "INSERT"
+        return f"{verb} INTO {table} ({', '.join(columns)}) VALUES ({placeholders})"
+
+    def _open(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.db_path, check_same_thread=not self._shared)
+        for pragma in PRAGMAS:
+            connection.execute(pragma)
+        with self._registry_lock:
+            self._connections.append(connection)
+        return connection
+
+    def connection(self) -> sqlite3.Connection:
+        """Returns the calling thread's connection, opening it on first use.
+
+        Returns:
+            sqlite3.Connection: Connection owned by the current thread.
+        """
+        if self._shared:
+            with self._shared_lock:
+                if not self._connections:
+                    self._open()
+                return self._connections[0]
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._open()
+            self._local.connection = connection
+        return connection
+
+    def _lock(self):
+        return self._shared_lock if self._shared else contextlib.nullcontext()
+
+    def initialize(self, tables: Iterable[str]) -> None:
+        """Creates the given tables if they are not already present.
+
+        Args:
+            tables (Iterable[str]): Table names from `SCHEMA`.
+        """
+        with self._lock():
+            connection = self.connection()
+            with connection:
+                for table in tables:
+                    connection.execute(SCHEMA[table])
+
+    def save(self, table: str, data: Sequence[Any]) -> None:
+        """Inserts one row into the given table and commits it.
+
+        Args:
+            table (str): Target table name from `TABLE_COLUMNS`.
+            data (Sequence[Any]): Row values in `TABLE_COLUMNS[table]` order.
+
+        Raises:
+            ValueError: If the table is unknown.
+            sqlite3.Error: If the insert fails.
+        """
+        sql = self._inserts.get(table)
+        if sql is None:
+            raise ValueError(f"Unknown table: {table}")
+        with self._lock():
+            connection = self.connection()
+            with connection:
+                connection.execute(sql, data)
+
+    def save_many(self, table: str, rows: Sequence[Sequence[Any]]) -> None:
+        """Inserts many rows into the given table in a single transaction.
+
+        Args:
+            table (str): Target table name from `TABLE_COLUMNS`.
+            rows (Sequence[Sequence[Any]]): Rows in `TABLE_COLUMNS[table]` order.
+        """
+        self.save_batch({table: rows})
+
+    def save_batch(self, rows_by_table: Dict[str, Sequence[Sequence[Any]]]) -> None:
+        """Inserts rows into several tables with one `executemany` per table.
+
+        All rows are committed in a single transaction.
+
+        Args:
+            rows_by_table (Dict[str, Sequence[Sequence[Any]]]): Rows keyed by table name.
+
+        Raises:
+            ValueError: If a table is unknown; nothing is written.
+            sqlite3.Error: If an insert fails; no row of the batch is kept.
+        """
+        for table in rows_by_table:
+            if table not in self._inserts:
+                raise ValueError(f"Unknown table: {table}")
+        with self._lock():
+            connection = self.connection()
+            with connection:
+                for table, rows in rows_by_table.items():
+                    connection.executemany(self._inserts[table], rows)
+
+    def save_batch_nudged(self, rows_by_table: Dict[str, Sequence[Sequence[Any]]]) -> int:
+        """Inserts rows like `save_batch`, moving time-series rows off taken keys.
+
+        Rows are inserted one at a time. A row of a `TIME_SERIES_TABLES`
+        table whose (symbol, ts) key already exists, e.g. two trades in the
+        same exchange millisecond, is stored at the next free nanosecond
+        instead of failing the batch.
+
+        Args:
+            rows_by_table (Dict[str, Sequence[Sequence[Any]]]): Rows keyed by table name.
+
+        Returns:
+            int: Number of rows stored at a later ts than given.
+
+        Raises:
+            ValueError: If a table is unknown; nothing is written.
+            sqlite3.Error: If any other insert fails; no row of the batch is kept.
+        """
+        for table in rows_by_table:
+            if table not in self._inserts:
+                raise ValueError(f"Unknown table: {table}")
+        nudged = 0
+        with self._lock():
+            connection = self.connection()
+            with connection:
+                for table, rows in rows_by_table.items():
+                    sql = self._inserts[table]
+                    exists = f"SELECT 1 FROM {table} WHERE symbol = ? AND ts = ?"
+                    for row in rows:
+                        try:
+                            connection.execute(sql, row)
+                            continue
+                        except sqlite3.IntegrityError:
+                            if table not in TIME_SERIES_TABLES or not connection.execute(exists, row[:2]).fetchone():
+                                raise
+                        symbol, ts = row[0], row[1] + 1
+                        while connection.execute(exists, (symbol, ts)).fetchone():
+                            ts += 1
+                        connection.execute(sql, (symbol, ts, *row[2:]))
+                        nudged += 1
+        return nudged
+
+    def fetch_latest(self, table: str, symbol: str, limit: int,
+                     columns: Sequence[str] = ("ts", "price")) -> List[Tuple[Any, ...]]:
+        """Returns the most recent rows for a symbol, newest first.
+
+        Walks the (symbol, ts) primary key backwards, so the cost depends on
+        `limit` rather than on the size of the table.
+
+        Args:
+            table (str): One of `TIME_SERIES_TABLES`.
+            symbol (str): Trading symbol.
+            limit (int): Maximum number of rows.
+            columns (Sequence[str]): Columns to return.
+
+        Returns:
+            List[Tuple[Any, ...]]: Rows ordered by descending ts.
+        """
+        if table not in TIME_SERIES_TABLES:
+            raise ValueError(f"Not a time-series table: {table}")
+        sql = f"SELECT {', '.join(columns)} FROM {table} WHERE symbol = ? ORDER BY ts DESC LIMIT ?"
+        return self.query(sql, (symbol, limit))
+
+    def fetch_range(self, table: str, symbol: str, start_ns: Optional[int] = None,
+                    end_ns: Optional[int] = None,
+                    columns: Sequence[str] = ("ts", "price")) -> List[Tuple[Any, ...]]:
+        """Returns rows for a symbol with start_ns <= ts < end_ns, oldest first.
+
+        Args:
+            table (str): One of `TIME_SERIES_TABLES`.
+            symbol (str): Trading symbol.
+            start_ns (int, optional): Inclusive lower bound in epoch nanoseconds.
+            end_ns (int, optional): Exclusive upper bound in epoch nanoseconds.
+            columns (Sequence[str]): Columns to return.
+
+        Returns:
+            List[Tuple[Any, ...]]: Rows ordered by ascending ts.
+        """
+        if table not in TIME_SERIES_TABLES:
+            raise ValueError(f"Not a time-series table: {table}")
+        sql = f"SELECT {', '.join(columns)} FROM {table} WHERE symbol = ? AND ts >= ? AND ts < ? ORDER BY ts"
+        lower = start_ns if start_ns is not None else -(2 ** 63)
+        upper = end_ns if end_ns is not None else 2 ** 63 - 1
+        return self.query(sql, (symbol, lower, upper))
+
+    def delete_range(self, table: str, symbol: str, start_ns: Optional[int] = None,
+                     end_ns: Optional[int] = None) -> int:
+        """Deletes rows for a symbol with start_ns <= ts < end_ns in one transaction.
+
+        Args:
+            table (str): One of `TIME_SERIES_TABLES`.
+            symbol (str): Trading symbol.
+            start_ns (int, optional): Inclusive lower bound in epoch nanoseconds.
+            end_ns (int, optional): Exclusive upper bound in epoch nanoseconds.
+
+        Returns:
+            int: Number of rows deleted.
+        """
+        if table not in TIME_SERIES_TABLES:
+            raise ValueError(f"Not a time-series table: {table}")
+        lower = start_ns if start_ns is not None else -(2 ** 63)
+        upper = end_ns if end_ns is not None else 2 ** 63 - 1
+        with self._lock():
+            connection = self.connection()
+            with connection:
+                cursor = connection.execute(f"DELETE FROM {table} WHERE symbol = ? AND ts >= ? AND ts < ?",
+                                            (symbol, lower, upper))
+        return cursor.rowcount
+
+    @contextlib.contextmanager
+    def write_transaction(self) -> Iterator[sqlite3.Connection]:
+        """Holds the database write lock for a block, committing on success and rolling back on error.
+
+        Reads in the block see every committed row and no other writer can
+        commit until it ends (they wait up to `busy_timeout`), so rows read in
+        the block can be deleted without losing concurrent inserts. Keep it short.
+
+        Yields:
+            sqlite3.Connection: The calling thread's connection.
+        """
+        with self._lock():
+            connection = self.connection()
+            connection.execute("BEGIN IMMEDIATE")
+            with connection:
+                yield connection
+
+    def query(self, sql: str, params: Sequence[Any] = ()) -> List[Tuple[Any, ...]]:
+        """Runs a read query on the calling thread's connection.
+
+        Args:
+            sql (str): SQL statement.
+            params (Sequence[Any]): Bound parameters.
+
+        Returns:
+            List[Tuple[Any, ...]]: All result rows.
+        """
+        with self._lock():
+            return self.connection().execute(sql, params).fetchall()
+
+    def query_one(self, sql: str, params: Sequence[Any] = ()) -> Optional[Tuple[Any, ...]]:
+        """Runs a read query and returns the first row, or None."""
+        with self._lock():
+            return self.connection().execute(sql, params).fetchone()
+
+    def release(self) -> None:
+        """Closes the calling thread's connection, if it has one.
+
+        Worker threads call this before exiting so their connection is not
+        left open until `close`.
+        """
+        if self._shared:
+            return
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            return
+        self._local.connection = None
+        with self._registry_lock:
+            if connection in self._connections:
+                self._connections.remove(connection)
+        connection.close()
+
+    def close(self) -> None:
+        """Closes every connection opened by this storage object."""
+        with self._registry_lock:
+            connections, self._connections = self._connections, []
+        for connection in connections:
+            try:
+                connection.close()
+            except sqlite3.ProgrammingError:
+                # Connection belongs to a thread that is still running.
+                logging.warning("Could not close connection from another thread.")
+        self._local = threading.local()
+
+
+_storages: Dict[str, SQLiteStorage] = {}
+_storages_lock = threading.Lock()
+
+
+def get_storage(db_path: str) -> SQLiteStorage:
+    """Returns the process-wide storage object for a database path.
+
+    Args:
+        db_path (str): SQLite database path.
+
+    Returns:
+        SQLiteStorage: Shared storage for that path.
+    """
+    with _storages_lock:
+        storage = _storages.get(db_path)
+        if storage is None:
+            storage = SQLiteStorage(db_path)
+            _storages[db_path] = storage
+        return storage
+
+
+def close_all() -> None:
+    """Closes every shared storage object."""
+    with _storages_lock:
+        storages = list(_storages.values())
+        _storages.clear()
+    for storage in storages:
+        storage.close()
+
+
+# Unit tests
+def test_save_and_query():
+    """Test that rows written through `save` are readable."""
+    storage = SQLiteStorage(":memory:")
+    storage.initialize(["price_data", "trading_signals"])
+    storage.save("price_data", ("BTCUSDT", to_epoch_ns("2025-01-01T00:00:00"), 50000.0))
+    storage.save("trading_signals", ("2025-01-01T00:00:00", "BUY"))
+    assert storage.query("SELECT price FROM price_data") == [(50000.0,)], "Price row not stored."
+    assert storage.query_one("SELECT signal FROM trading_signals") == ("BUY",), "Signal row not stored."
+    storage.close()
+
+
+def test_unknown_table():
+    """Test that unknown tables are rejected."""
+    storage = SQLiteStorage(":memory:")
+    try:
+        storage.save("unknown", (1,))
+    except ValueError as e:
+        assert str(e) == "Unknown table: unknown", "Unexpected error message."
+    else:
+        assert False, "Unknown table was accepted."
+
+
+def test_connection_per_thread(tmp_path):
+    """Test that file databases reuse one WAL connection per thread."""
+    storage = SQLiteStorage(str(tmp_path / "test.db"))
+    storage.initialize(["price_data"])
+    assert storage.connection() is storage.connection(), "Connection not reused."
+    assert storage.query_one("PRAGMA journal_mode") == ("wal",), "WAL mode not enabled."
+
+    other = []
+    thread = threading.Thread(target=lambda: other.append(storage.connection()))
+    thread.start()
+    thread.join()
+    assert other[0] is not storage.connection(), "Threads should not share a connection."
+
+    for i in range(100):
+        storage.save("price_data", ("BTCUSDT", now_ns(), float(i)))
+    assert storage.query_one("SELECT COUNT(*) FROM price_data") == (100,), "Rows missing."
+    storage.close()
+
+
+def test_time_series_queries():
+    """Test latest-N and range reads on the (symbol, ts) key."""
+    storage = SQLiteStorage(":memory:")
+    storage.initialize(["price_data"])
+    base = to_epoch_ns("2025-01-01T00:00:00")
+    rows = [(symbol, base + i * 1_000_000_000, float(i)) for i in range(10) for symbol in ("BTCUSDT", "ETHUSDT")]
+    storage.save_many("price_data", rows)
+
+    latest = storage.fetch_latest("price_data", "BTCUSDT", 3)
+    assert [price for _, price in latest] == [9.0, 8.0, 7.0], "Latest rows not newest first."
+    window = storage.fetch_range("price_data", "ETHUSDT", base + 2_000_000_000, base + 5_000_000_000)
+    assert [price for _, price in window] == [2.0, 3.0, 4.0], "Range bounds not applied."
+    plan = storage.query("EXPLAIN QUERY PLAN SELECT ts, price FROM price_data WHERE symbol = ? "
+                         "AND ts >= ? AND ts < ? ORDER BY ts", ("BTCUSDT", 0, 1))
+    assert "PRIMARY KEY" in plan[0][-1], "Range query does not use the primary key."
+    storage.close()
+
+
+def test_timestamp_conversion():
+    """Test epoch-nanosecond conversion and the strictly increasing clock."""
+    assert to_epoch_ns("1970-01-01T00:00:01") == 1_000_000_000, "ISO conversion failed."
+    assert to_epoch_ns("2025-01-03 00:00:00.000001") == 1735862400000001000, "Microseconds lost."
+    assert to_epoch_ns(1.5) == 1_500_000_000, "Epoch seconds conversion failed."
+    first, second = now_ns(), now_ns()
+    assert second > first, "Clock is not strictly increasing."
+
+
+if __name__ == "__main__":
+    import tempfile
+    import pathlib
+    test_save_and_query()
+    test_unknown_table()
+    test_time_series_queries()
+    test_timestamp_conversion()
+    with tempfile.TemporaryDirectory() as directory:
+        test_connection_per_thread(pathlib.Path(directory))
+    print("All tests passed.")
@@ -1,105 +1,300 @@
-import time  
-from typing import Dict, Any  
+import asyncio
+import logging
+from typing import Dict, Any, List, Optional, Sequence, Tuple
 import numpy as np
+from execution_scheduler import ExecutionScheduler
+from order_router import RoutingTable
+from participation_vwap import ParticipationVWAP, VolumeProfile
 
-class OrderExecution:  
-    """Module for safe and efficient order execution."""
+class OrderExecution:
+    """Module for safe and efficient order execution.
 
-    def \_\_init\_\_(self, market\_data: Any, risk\_manager: Any):  
-        self.market\_data \= market\_data  
-        self.risk\_manager \= risk\_manager
+    Call `start` on the trading loop to run the TWAP/VWAP scheduler and the
+    routing table refresh in the background.
+    """
 
-    def smart\_order\_routing(self, order: Dict\[str, Any\]) \-\> str:  
+    def __init__(self, market_data: Any, risk_manager: Any, broker: Any = None, default_venue: Optional[str] = None):
+        self.market_data = market_data
+        self.risk_manager = risk_manager
+        self.broker = broker  # Sends accepted orders; the event backtester passes a simulated one
+        self.scheduler = ExecutionScheduler(self.send_child_order)
+        self.routing_table = RoutingTable(market_data, default_venue)
+        self.participation = None  # ParticipationVWAP, created by the first execute_vwap_live
+
+    async def start(self, symbols: Sequence[str] = (), refresh_interval: float = 1.0) -> None:
+        """Starts the order scheduler and the routing table refresh on the running loop.
+
+        Args:
+            symbols (Sequence[str]): Symbols to keep routing data for; symbols
+                first seen by `smart_order_routing` are added as they come.
+            refresh_interval (float): Seconds between routing table refreshes.
+        """
+        await self.scheduler.start()
+        await self.routing_table.start(symbols, refresh_interval)
+
+    async def stop(self) -> None:
+        """Stops the background scheduler and routing refresh."""
+        await self.routing_table.stop()
+        await self.scheduler.stop()
+
+    def smart_order_routing(self, order: Dict[str, Any]) -> str:
         """Routes orders to the optimal exchange based on liquidity and cost.
 
-        Args:  
-            order (Dict\[str, Any\]): The order details (e.g., symbol, side, quantity).
+        Reads the cached `routing_table`, so the cost includes size-dependent
+        slippage from cached depth and no venue is queried per order. While
+        `start` is running the refresh, a symbol missing from the table is
+        queued for the next refresh and gets the default venue; see `_ensure_routes`.
+
+        Args:
+            order (Dict[str, Any]): The order details (e.g., symbol, side, quantity).
+
+        Returns:
+            str: Selected exchange for order execution, or None to reject
+                while the symbol has no routing data and no default venue.
+        """
+        symbol = order["symbol"]
+        if not self._ensure_routes(symbol):
+            return self.routing_table.default_venue
+        return self.routing_table.route(symbol, order.get("side", "buy"), order.get("quantity", 0.0))
+
+    def split_order(self, order: Dict[str, Any]) -> List[Tuple[str, float]]:
+        """Splits a large order across exchanges, cheapest cached levels first.
+
+        Args:
+            order (Dict[str, Any]): The order details (symbol, side, quantity).
+
+        Returns:
+            List[Tuple[str, float]]: (exchange, quantity) pairs; the whole order
+                on the default venue, or empty, while the symbol has no routing data.
+        """
+        symbol = order["symbol"]
+        if not self._ensure_routes(symbol):
+            default = self.routing_table.default_venue
+            return [(default, order["quantity"])] if default is not None else []
+        return self.routing_table.split(symbol, order.get("side", "buy"), order["quantity"])
 
-        Returns:  
-            str: Selected exchange for order execution.  
-        """  
-        exchanges \= self.market\_data.get\_available\_exchanges(order\["symbol"\])  
-        best\_exchange \= min(exchanges, key=lambda ex: ex\["fee"\] \+ ex\["slippage"\])  
-        return best\_exchange\["name"\]
+    def _ensure_routes(self, symbol: str) -> bool:
+        """Returns True if the routing table has `symbol`.
 
-    def execute\_twap(self, symbol: str, quantity: float, duration: int) \-\> None:  
+        With the refresh running, a missing symbol is only queued. Without it
+        (`start` was never called) the symbol is loaded synchronously once, so
+        only the first order per symbol pays for the venue queries.
+        """
+        table = self.routing_table
+        if symbol in table.routes:
+            return True
+        if table.running:
+            table.request(symbol)
+            return False
+        logging.warning(f"Routing refresh not running; loading {symbol} synchronously once.")
+        try:
+            table.load(symbol)
+        except Exception as e:
+            logging.error(f"Routing load for {symbol} failed: {e}")
+            return False
+        return True
+
+    def execute_twap(self, symbol: str, quantity: float, duration: int, side: str = "buy", slices: int = 10,
+                     randomize: float = 0.0) -> str:
         """Executes a trade using the TWAP (Time-Weighted Average Price) algorithm.
 
-        Args:  
-            symbol (str): Trading pair symbol (e.g., BTC/USD).  
-            quantity (float): Total quantity to trade.  
-            duration (int): Duration in seconds for trade execution.  
-        """  
-        slices \= 10  
-        slice\_size \= quantity / slices  
-        interval \= duration / slices
-
-        for i in range(slices):  
-            price \= self.market\_data.get\_current\_price(symbol)  
-            self.place\_order(symbol, "buy", slice\_size, price)  
-            time.sleep(interval)
-
-    def execute\_vwap(self, symbol: str, quantity: float, volume\_data: np.ndarray) \-\> None:  
+        When `self.scheduler` is running on the current event loop the order
+        is scheduled and this returns at once; otherwise it blocks until the
+        last slice is sent.
+
+        Args:
+            symbol (str): Trading pair symbol (e.g., BTC/USD).
+            quantity (float): Total quantity to trade.
+            duration (int): Duration in seconds for trade execution.
+            side (str): Order side, "buy" or "sell".
+            slices (int): Number of child orders.
+            randomize (float): Fraction of the slice interval by which child orders may be sent early.
+
+        Returns:
+            str: Parent order id, for `self.scheduler.cancel`/`amend`/`status`.
+        """
+        return self._run_parent(lambda: self.scheduler.submit_twap(symbol, side, quantity, duration, slices,
+                                                                   randomize))
+
+    def execute_vwap(self, symbol: str, quantity: float, volume_data: np.ndarray, duration: int = 0,
+                     side: str = "buy", randomize: float = 0.0) -> str:
         """Executes a trade using the VWAP (Volume-Weighted Average Price) algorithm.
 
-        Args:  
-            symbol (str): Trading pair symbol (e.g., BTC/USD).  
-            quantity (float): Total quantity to trade.  
-            volume\_data (np.ndarray): Historical volume data.  
-        """  
-        total\_volume \= np.sum(volume\_data)  
-        weights \= volume\_data / total\_volume  
-        order\_sizes \= weights \* quantity
+        Args:
+            symbol (str): Trading pair symbol (e.g., BTC/USD).
+            quantity (float): Total quantity to trade.
+            volume_data (np.ndarray): Historical volume data, one child order per bucket.
+            duration (int): Duration in seconds over which the buckets are spread.
+            side (str): Order side, "buy" or "sell".
+            randomize (float): Fraction of the bucket interval by which child orders may be sent early.
+
+        Returns:
+            str: Parent order id.
+        """
+        return self._run_parent(lambda: self.scheduler.submit_vwap(symbol, side, quantity, duration, volume_data,
+                                                                   randomize))
+
+    def execute_vwap_live(self, symbol: str, quantity: float, participation_rate: float, duration: int,
+                          processor: Any, side: str = "buy", profile: VolumeProfile = None,
+                          min_child: float = 0.0) -> str:
+        """Executes a trade as a fixed share of the live trade volume (participation-rate VWAP).
+
+        Child orders are released from `processor`'s trade stream as market
+        volume arrives; see `participation_vwap.ParticipationVWAP`. Run
+        `self.participation.run()` on the trading loop for the historical
+        profile fallback and expiry, and read the slippage against the
+        realized VWAP with `self.participation.report(order_id)`.
+
+        Args:
+            symbol (str): Trading pair symbol (e.g., BTC/USD).
+            quantity (float): Total quantity to trade.
+            participation_rate (float): Target fraction of market volume, e.g. 0.1.
+            duration (int): Seconds until the order expires.
+            processor (MarketDataProcessor): Source of live trades.
+            side (str): Order side, "buy" or "sell".
+            profile (VolumeProfile, optional): Intraday volume profile used when the stream is quiet.
+            min_child (float): Smallest child order to release.
 
-        for order\_size in order\_sizes:  
-            price \= self.market\_data.get\_current\_price(symbol)  
-            self.place\_order(symbol, "buy", order\_size, price)
+        Returns:
+            str: Parent order id.
+        """
+        if self.participation is None:
+            self.participation = ParticipationVWAP(self.place_order)
+            processor.add_listener(self.participation.on_market_data)
+        return self.participation.submit(symbol, side, quantity, participation_rate, duration, min_child=min_child,
+                                         profile=profile)
 
-    def place\_order(self, symbol: str, side: str, quantity: float, price: float) \-\> None:  
+    def _run_parent(self, submit: Any) -> str:
+        if self.scheduler.running:
+            return submit()
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            raise RuntimeError("The scheduler is not running on this event loop; "
+                               "await OrderExecution.start() before executing orders from async code.")
+
+        async def run_blocking():
+            await self.scheduler.start()
+            try:
+                order_id = submit()
+                await self.scheduler.wait(order_id)
+                return order_id
+            finally:
+                await self.scheduler.stop()
+
+        return asyncio.run(run_blocking())
+
+    def send_child_order(self, symbol: str, side: str, quantity: float) -> bool:
+        """Places a scheduled child order at the current price."""
+        return self.place_order(symbol, side, quantity, self.market_data.get_current_price(symbol))
+
+    def place_order(self, symbol: str, side: str, quantity: float, price: float) -> bool:
         """Places an order on the selected exchange.
 
-        Args:  
-            symbol (str): Trading pair symbol (e.g., BTC/USD).  
-            side (str): Order side, "buy" or "sell".  
-            quantity (float): Order quantity.  
-            price (float): Limit price.  
-        """  
-        if self.risk\_manager.validate\_order(symbol, side, quantity):  
-            print(f"Order placed: {side} {quantity} {symbol} at {price}")  
-        else:  
+        Args:
+            symbol (str): Trading pair symbol (e.g., BTC/USD).
+            side (str): Order side, "buy" or "sell".
+            quantity (float): Order quantity.
+            price (float): Limit price.
+
+        Returns:
+            bool: True if the order passed risk checks and was sent.
+        """
+        if self.risk_manager.validate_order(symbol, side, quantity, price=price):
+            if self.broker is not None:
+                self.broker.submit_order(symbol, side, quantity, price)
+            else:
+                print(f"Order placed: {side} {quantity} {symbol} at {price}")
+            return True
+        else:
             print("Order rejected by risk management.")
+            return False
 
-\# Unit Tests  
-def test\_smart\_order\_routing():  
-    mock\_market\_data \= MockMarketData()  
-    mock\_risk\_manager \= MockRiskManager()  
-    execution \= OrderExecution(mock\_market\_data, mock\_risk\_manager)
+# Unit Tests
+class MockMarketData:
+    """Two venues with static costs; ExchangeA is cheaper."""
 
-    order \= {"symbol": "BTC/USD", "side": "buy", "quantity": 1.0}  
-    selected\_exchange \= execution.smart\_order\_routing(order)
+    def get_current_price(self, symbol):
+        return 50000.0
 
-    assert selected\_exchange \== "ExchangeA", "Incorrect exchange selected."
+    def get_available_exchanges(self, symbol):
+        return [{"name": "ExchangeA", "fee": 0.001, "slippage": 0.001},
+                {"name": "ExchangeB", "fee": 0.002, "slippage": 0.001}]
 
-def test\_execute\_twap():  
-    mock\_market\_data \= MockMarketData()  
-    mock\_risk\_manager \= MockRiskManager()  
-    execution \= OrderExecution(mock\_market\_data, mock\_risk\_manager)
+class MockRiskManager:
+    """Accepts every order and records it."""
 
-    execution.execute\_twap("BTC/USD", 1.0, 60\)  
-    \# Assert based on mocked order placement or logs
+    def __init__(self):
+        self.orders = []
 
-def test\_execute\_vwap():  
-    mock\_market\_data \= MockMarketData()  
-    mock\_risk\_manager \= MockRiskManager()  
-    execution \= OrderExecution(mock\_market\_data, mock\_risk\_manager)
+    def validate_order(self, symbol, side, quantity, price=None):
+        self.orders.append((symbol, side, quantity, price))
+        return True
 
-    volume\_data \= np.array(\[100, 200, 300\])  
-    execution.execute\_vwap("BTC/USD", 1.0, volume\_data)  
-    \# Assert based on mocked order placement or logs
+def test_smart_order_routing():
+    mock_market_data = MockMarketData()
+    mock_risk_manager = MockRiskManager()
+    execution = OrderExecution(mock_market_data, mock_risk_manager)
 
-if \_\_name\_\_ \== "\_\_main\_\_":  
-    test\_smart\_order\_routing()  
-    test\_execute\_twap()  
-    test\_execute\_vwap()  
-    print("All tests passed.")
+    order = {"symbol": "BTC/USD", "side": "buy", "quantity": 1.0}
+    assert execution.smart_order_routing(order) == "ExchangeA", "Incorrect exchange selected."
+
+    async def with_refresh():
+        background = OrderExecution(mock_market_data, mock_risk_manager, default_venue="ExchangeB")
+        await background.start(refresh_interval=60.0)
+        first = background.smart_order_routing(order)  # Queued, not loaded on the order path
+        while "BTC/USD" not in background.routing_table.routes:
+            await asyncio.sleep(0.001)
+        second = background.smart_order_routing(order)
+        await background.stop()
+        return first, second
+
+    assert asyncio.run(with_refresh()) == ("ExchangeB", "ExchangeA"), "Default venue or refresh not used."
+
+def test_execute_twap():
+    mock_market_data = MockMarketData()
+    mock_risk_manager = MockRiskManager()
+    execution = OrderExecution(mock_market_data, mock_risk_manager)
 
+    order_id = execution.execute_twap("BTC/USD", 1.0, 0.2)
+    assert execution.scheduler.status(order_id)["state"] == "done", "TWAP did not finish."
+    assert len(mock_risk_manager.orders) == 10, "Unexpected number of child orders."
+    assert abs(sum(order[2] for order in mock_risk_manager.orders) - 1.0) < 1e-9, "Child orders do not sum to the parent."
+
+def test_execute_twap_from_async_code():
+    execution = OrderExecution(MockMarketData(), MockRiskManager())
+
+    async def without_start():
+        try:
+            execution.execute_twap("BTC/USD", 1.0, 0.1)
+        except RuntimeError as e:
+            return str(e)
+
+    async def with_start():
+        await execution.start()
+        order_id = execution.execute_twap("BTC/USD", 1.0, 0.1)
+        status = await execution.scheduler.wait(order_id)
+        await execution.stop()
+        return status
+
+    assert "await OrderExecution.start()" in asyncio.run(without_start()), "No clear error without a scheduler."
+    assert asyncio.run(with_start())["state"] == "done", "TWAP not scheduled on the running loop."
+
+def test_execute_vwap():
+    mock_market_data = MockMarketData()
+    mock_risk_manager = MockRiskManager()
+    execution = OrderExecution(mock_market_data, mock_risk_manager)
+
+    volume_data = np.array([100, 200, 300])
+    execution.execute_vwap("BTC/USD", 1.0, volume_data)
+    quantities = [order[2] for order in mock_risk_manager.orders]
+    assert np.allclose(quantities, [1 / 6, 2 / 6, 3 / 6]), "Child orders not weighted by volume."
+
+if __name__ == "__main__":
+    test_smart_order_routing()
+    test_execute_twap()
+    test_execute_twap_from_async_code()
+    test_execute_vwap()
+    print("All tests passed.")
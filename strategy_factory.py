@@ -1,76 +1,222 @@
-import logging  
+import logging
 from abc import ABC, abstractmethod
 
-\# Configure logging  
-logging.basicConfig(level=logging.INFO, format='%(asctime)s \- %(levelname)s \- %(message)s', filename='trading\_bot.log')
-
-class Strategy(ABC):  
-    """Abstract base class for trading strategies."""
-
-    @abstractmethod  
-    def generate\_signals(self, market\_data):  
+import numpy as np
+
+import indicator_cache
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s', filename='trading_bot.log')
+
+def as_panel(prices):
+    """Return a price panel as a float64 array of shape (symbols, time).
+
+    Args:
+        prices: 2-D array of shape (symbols, time), or a DataFrame with one
+            column per symbol and one row per timestamp.
+
+    Returns:
+        np.ndarray: The panel; no copy is made when the input already is a
+            float64 array.
+    """
+    if hasattr(prices, "columns"):
+        return np.asarray(prices.to_numpy(dtype=np.float64).T)
+    panel = np.asarray(prices, dtype=np.float64)
+    if panel.ndim == 1:
+        panel = panel[np.newaxis, :]
+    if panel.ndim != 2:
+        raise ValueError(f"Expected a (symbols, time) panel, got shape {panel.shape}")
+    return panel
+
+def rolling_mean(panel, window):
+    """Trailing mean over `window` steps along the time axis of a panel.
+
+    Uses one cumulative sum per row, so the cost does not depend on the
+    window. Entries before the first full window, or whose window contains
+    a NaN, are NaN, as with pandas `rolling(window).mean()`.
+
+    Args:
+        panel (np.ndarray): Prices of shape (symbols, time).
+        window (int): Window length.
+
+    Returns:
+        np.ndarray: Means with the same shape as `panel`.
+    """
+    symbols, steps = panel.shape
+    out = np.full((symbols, steps), np.nan)
+    if window > steps:
+        return out
+    missing = np.isnan(panel)
+    totals = np.zeros((symbols, steps + 1))
+    np.cumsum(np.where(missing, 0.0, panel), axis=1, out=totals[:, 1:])
+    out[:, window - 1:] = (totals[:, window:] - totals[:, :-window]) / window
+    if missing.any():
+        counts = np.zeros((symbols, steps + 1), dtype=np.int64)
+        np.cumsum(missing, axis=1, out=counts[:, 1:])
+        out[:, window - 1:][(counts[:, window:] - counts[:, :-window]) > 0] = np.nan
+    return out
+
+class Strategy(ABC):
+    """Abstract base class for trading strategies.
+
+    Strategies that can evaluate a whole panel of symbols at once set
+    `supports_batch` and implement `generate_signals_batch`.
+    """
+
+    supports_batch = False
+
+    @abstractmethod
+    def generate_signals(self, market_data):
         pass
 
-class SMACrossoverStrategy(Strategy):  
+    def generate_signals_batch(self, prices):
+        """Generate signals for a (symbols, time) price panel as an int8 array."""
+        raise NotImplementedError(f"{type(self).__name__} does not support batch signals.")
+
+class SMACrossoverStrategy(Strategy):
     """Simple Moving Average Crossover Strategy."""
 
-    def \_\_init\_\_(self, short\_window, long\_window):  
-        self.short\_window \= short\_window  
-        self.long\_window \= long\_window
-
-    def generate\_signals(self, market\_data):  
-        """Generate buy/sell signals based on SMA crossover."""  
-        market\_data\['short\_sma'\] \= market\_data\['price'\].rolling(window=self.short\_window).mean()  
-        market\_data\['long\_sma'\] \= market\_data\['price'\].rolling(window=self.long\_window).mean()  
-        market\_data\['signal'\] \= 0  
-        market\_data.loc\[market\_data\['short\_sma'\] \> market\_data\['long\_sma'\], 'signal'\] \= 1  
-        market\_data.loc\[market\_data\['short\_sma'\] \<= market\_data\['long\_sma'\], 'signal'\] \= \-1  
-        logging.info("Generated signals using SMA Crossover Strategy.")  
-        return market\_data
-
-class StrategyFactory:  
+    supports_batch = True
+
+    def __init__(self, short_window, long_window, cache=None):
+        self.short_window = short_window
+        self.long_window = long_window
+        self.cache = cache if cache is not None else indicator_cache.get_cache()
+
+    def generate_signals(self, market_data):
+        """Generate buy/sell signals based on SMA crossover."""
+        prices = market_data['price']
+        market_data['short_sma'] = indicator_cache.rolling_mean(prices, self.short_window, self.cache)
+        market_data['long_sma'] = indicator_cache.rolling_mean(prices, self.long_window, self.cache)
+        market_data['signal'] = 0
+        market_data.loc[market_data['short_sma'] > market_data['long_sma'], 'signal'] = 1
+        market_data.loc[market_data['short_sma'] <= market_data['long_sma'], 'signal'] = -1
+        logging.info("Generated signals using SMA Crossover Strategy.")
+        return market_data
+
+    def generate_signals_batch(self, prices):
+        """Generate SMA crossover signals for many symbols in one pass.
+
+        Signals match `generate_signals`: 1 where the short SMA is above the
+        long SMA, -1 where it is at or below it, and 0 until both are
+        defined. The input is not modified.
+
+        Args:
+            prices: Panel of shape (symbols, time), or a DataFrame with one
+                column per symbol.
+
+        Returns:
+            np.ndarray: int8 signals of shape (symbols, time).
+        """
+        panel = as_panel(prices)
+        key = indicator_cache.fingerprint(panel)
+        short_sma, long_sma = (
+            self.cache.get_or_compute("panel_rolling_mean", (window,), panel, lambda: rolling_mean(panel, window), key)
+            for window in (self.short_window, self.long_window))
+        spread = short_sma - long_sma
+        signals = np.zeros(panel.shape, dtype=np.int8)
+        signals[spread > 0] = 1
+        signals[spread <= 0] = -1
+        return signals
+
+class StrategyFactory:
     """Factory for creating and managing trading strategies."""
 
-    def \_\_init\_\_(self):  
-        self.\_strategies \= {}
-
-    def register\_strategy(self, strategy\_name, strategy\_class):  
-        """Register a new strategy class."""  
-        self.\_strategies\[strategy\_name\] \= strategy\_class  
-        logging.info(f"Registered strategy: {strategy\_name}")
-
-    def create\_strategy(self, strategy\_name, \*args, \*\*kwargs):  
-        """Create an instance of the requested strategy."""  
-        strategy\_class \= self.\_strategies.get(strategy\_name)  
-        if not strategy\_class:  
-            logging.error(f"Strategy {strategy\_name} not found.")  
-            raise ValueError(f"Strategy {strategy\_name} is not registered.")  
-        return strategy\_class(\*args, \*\*kwargs)
-
-\# Unit tests  
-def test\_strategy\_factory():  
-    factory \= StrategyFactory()
-
-    \# Register and create SMA Crossover Strategy  
-    factory.register\_strategy("sma\_crossover", SMACrossoverStrategy)  
-    strategy \= factory.create\_strategy("sma\_crossover", short\_window=20, long\_window=50)
-
-    \# Mock market data  
-    import pandas as pd  
-    market\_data \= pd.DataFrame({  
-        'price': \[100 \+ i for i in range(100)\]  \# Example price data  
+    def __init__(self):
+        self._strategies = {}
+
+    def register_strategy(self, strategy_name, strategy_class):
+        """Register a new strategy class."""
+        self._strategies[strategy_name] = strategy_class
+        logging.info(f"Registered strategy: {strategy_name}")
+
+    def create_strategy(self, strategy_name, *args, **kwargs):
+        """Create an instance of the requested strategy."""
+        strategy_class = self._strategies.get(strategy_name)
+        if not strategy_class:
+            logging.error(f"Strategy {strategy_name} not found.")
+            raise ValueError(f"Strategy {strategy_name} is not registered.")
+        return strategy_class(*args, **kwargs)
+
+    def supports_batch(self, strategy_name):
+        """Return whether a registered strategy implements batch signals."""
+        strategy_class = self._strategies.get(strategy_name)
+        return bool(strategy_class and strategy_class.supports_batch)
+
+    def generate_panel_signals(self, strategy, prices):
+        """Generate int8 signals for a (symbols, time) panel with any strategy.
+
+        Uses `generate_signals_batch` when the strategy opts in, otherwise
+        runs `generate_signals` on a copy of each symbol's prices.
+        """
+        if strategy.supports_batch:
+            return strategy.generate_signals_batch(prices)
+        import pandas as pd
+        panel = as_panel(prices)
+        signals = np.zeros(panel.shape, dtype=np.int8)
+        for i, row in enumerate(panel):
+            frame = strategy.generate_signals(pd.DataFrame({'price': row}))
+            signals[i] = frame['signal'].to_numpy(dtype=np.int8)
+        return signals
+
+# Unit tests
+def test_strategy_factory():
+    factory = StrategyFactory()
+
+    # Register and create SMA Crossover Strategy
+    factory.register_strategy("sma_crossover", SMACrossoverStrategy)
+    strategy = factory.create_strategy("sma_crossover", short_window=20, long_window=50)
+
+    # Mock market data
+    import pandas as pd
+    market_data = pd.DataFrame({
+        'price': [100 + i for i in range(100)]  # Example price data
     })
 
-    \# Generate signals  
-    signals \= strategy.generate\_signals(market\_data)  
+    # Generate signals
+    signals = strategy.generate_signals(market_data)
     assert 'signal' in signals.columns, "Signal generation failed."
 
-    \# Test unregistered strategy error  
-    try:  
-        factory.create\_strategy("unknown\_strategy")  
-    except ValueError as e:  
-        assert str(e) \== "Strategy unknown\_strategy is not registered.", "Unregistered strategy error handling failed."
-
-if \_\_name\_\_ \== "\_\_main\_\_":  
-    test\_strategy\_factory()
+    # Test unregistered strategy error
+    try:
+        factory.create_strategy("unknown_strategy")
+    except ValueError as e:
+        assert str(e) == "Strategy unknown_strategy is not registered.", "Unregistered strategy error handling failed."
+
+def test_batch_signals_match_per_symbol():
+    """Test batch signals against per-symbol DataFrame signals, including NaN gaps."""
+    import pandas as pd
+    factory = StrategyFactory()
+    factory.register_strategy("sma_crossover", SMACrossoverStrategy)
+    assert factory.supports_batch("sma_crossover"), "SMA crossover should opt into batch signals."
+    strategy = factory.create_strategy("sma_crossover", short_window=5, long_window=20)
+
+    rng = np.random.default_rng(7)
+    panel = 100 + rng.standard_normal((4, 200)).cumsum(axis=1)
+    panel[2, 50] = np.nan
+    frame = pd.DataFrame(panel.T, columns=["A", "B", "C", "D"])
+    before = frame.copy()
+
+    signals = factory.generate_panel_signals(strategy, frame)
+    assert signals.dtype == np.int8 and signals.shape == (4, 200), "Unexpected signal array."
+    assert frame.equals(before), "Input frame was mutated."
+    for i, symbol in enumerate(frame.columns):
+        expected = strategy.generate_signals(pd.DataFrame({'price': frame[symbol]}))['signal'].to_numpy()
+        assert np.array_equal(signals[i], expected), f"Batch signals differ for {symbol}."
+
+def test_shared_indicator_cache():
+    """Test that strategies sharing a short window reuse its SMA."""
+    import pandas as pd
+    cache = indicator_cache.IndicatorCache()
+    panel = np.arange(300, dtype=float).reshape(3, 100)
+    for long_window in (30, 40, 50):
+        SMACrossoverStrategy(10, long_window, cache=cache).generate_signals_batch(panel)
+        SMACrossoverStrategy(10, long_window, cache=cache).generate_signals(pd.DataFrame({'price': panel[0]}))
+    stats = cache.stats()
+    assert stats["hits"] == 4 and stats["misses"] == 8, f"Unexpected cache counters: {stats}"
+
+if __name__ == "__main__":
+    test_strategy_factory()
+    test_batch_signals_match_per_symbol()
+    test_shared_indicator_cache()
 
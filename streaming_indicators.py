@@ -0,0 +1,432 @@
+import json
+import math
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+class Checkpointable:
+    """Mixin giving indicators a plain-dict state for checkpoints.
+
+    `state_dict` returns JSON-serializable state, with nested indicators
+    saved recursively, and `load_state_dict` restores it in place.
+    """
+
+    def state_dict(self) -> Dict[str, Any]:
+        state = {}
+        for key, value in self.__dict__.items():
+            if isinstance(value, Checkpointable):
+                state[key] = value.state_dict()
+            elif isinstance(value, list):
+                state[key] = list(value)
+            else:
+                state[key] = value
+        return state
+
+    def load_state_dict(self, state: Dict[str, Any]) -> None:
+        for key, value in state.items():
+            current = self.__dict__.get(key)
+            if isinstance(current, Checkpointable):
+                current.load_state_dict(value)
+            else:
+                self.__dict__[key] = list(value) if isinstance(value, list) else value
+
+
+class RollingSMA(Checkpointable):
+    """Simple moving average updated in O(1) per value.
+
+    Keeps the last `window` values in a ring buffer and a running sum. The
+    sum is recomputed exactly each time the ring wraps, so floating-point
+    drift cannot accumulate over a long session.
+    """
+
+    def __init__(self, window: int):
+        self.window = window
+        self._values: List[float] = [0.0] * window
+        self._index = 0
+        self._count = 0
+        self._sum = 0.0
+
+    @property
+    def ready(self) -> bool:
+        """True once `window` values have been seen."""
+        return self._count >= self.window
+
+    @property
+    def value(self) -> Optional[float]:
+        """Current average, or None until the window is full."""
+        return self._sum / self.window if self.ready else None
+
+    def update(self, value: float) -> Optional[float]:
+        """Adds a value and returns the updated average.
+
+        Args:
+            value (float): New observation.
+
+        Returns:
+            Optional[float]: The average, or None until the window is full.
+        """
+        old = self._values[self._index]
+        self._values[self._index] = value
+        self._index += 1
+        if self._count < self.window:
+            self._count += 1
+            self._sum += value
+        else:
+            self._sum += value - old
+        if self._index == self.window:
+            self._index = 0
+            self._sum = math.fsum(self._values)
+        return self.value
+
+    def warm_up(self, values: Iterable[float]) -> Optional[float]:
+        """Feeds historical values, oldest first."""
+        for value in values:
+            self.update(value)
+        return self.value
+
+
+class MovingAverageCrossover(Checkpointable):
+    """Short/long SMA pair for crossover signals on one symbol."""
+
+    def __init__(self, short_window: int = 20, long_window: int = 50):
+        self.short = RollingSMA(short_window)
+        self.long = RollingSMA(long_window)
+
+    def update(self, price: float) -> Tuple[Optional[float], Optional[float]]:
+        """Adds a price and returns the (short, long) averages."""
+        return self.short.update(price), self.long.update(price)
+
+    def warm_up(self, prices: Iterable[float]) -> Tuple[Optional[float], Optional[float]]:
+        """Feeds historical prices, oldest first."""
+        for price in prices:
+            self.update(price)
+        return self.values()
+
+    def values(self) -> Tuple[Optional[float], Optional[float]]:
+        """Returns the current (short, long) averages."""
+        return self.short.value, self.long.value
+
+
+class StreamingEMA(Checkpointable):
+    """Exponential moving average seeded with the SMA of the first `period` values, as in TA-Lib."""
+
+    def __init__(self, period: int):
+        self.period = period
+        self.k = 2.0 / (period + 1)
+        self._seed: List[float] = []
+        self.value: Optional[float] = None
+
+    def update(self, value: float) -> Optional[float]:
+        """Adds a value and returns the EMA, or None during the seed period."""
+        if self.value is not None:
+            self.value += self.k * (value - self.value)
+        else:
+            self._seed.append(value)
+            if len(self._seed) == self.period:
+                self.value = math.fsum(self._seed) / self.period
+                self._seed = []
+        return self.value
+
+
+class StreamingRSI(Checkpointable):
+    """Relative strength index with Wilder smoothing, as in TA-Lib.
+
+    The first value is produced after `period + 1` prices, from the simple
+    averages of the first `period` gains and losses.
+    """
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        self._last: Optional[float] = None
+        self._count = 0
+        self._gain = 0.0
+        self._loss = 0.0
+        self.value: Optional[float] = None
+
+    def update(self, price: float) -> Optional[float]:
+        """Adds a price and returns the RSI, or None during warm-up."""
+        if self._last is None:
+            self._last = price
+            return None
+        change = price - self._last
+        self._last = price
+        gain = change if change > 0 else 0.0
+        loss = -change if change < 0 else 0.0
+        self._count += 1
+        if self._count <= self.period:
+            self._gain += gain / self.period
+            self._loss += loss / self.period
+            if self._count < self.period:
+                return None
+        else:
+            self._gain = (self._gain * (self.period - 1) + gain) / self.period
+            self._loss = (self._loss * (self.period - 1) + loss) / self.period
+        total = self._gain + self._loss
+        self.value = 100.0 * self._gain / total if total else 0.0
+        return self.value
+
+
+class StreamingMACD(Checkpointable):
+    """MACD line, signal line and histogram, aligned with TA-Lib.
+
+    Both EMAs start at the same price: the slow EMA is seeded with the SMA
+    of the first `slow` prices and the fast EMA with the SMA of the last
+    `fast` of those. The signal EMA is seeded with the SMA of the first
+    `signal` MACD values, so the first output comes after
+    `slow + signal - 1` prices.
+    """
+
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        self.fast = fast
+        self.slow = slow
+        self._seed: List[float] = []
+        self._fast_ema = StreamingEMA(fast)
+        self._slow_ema = StreamingEMA(slow)
+        self._signal_ema = StreamingEMA(signal)
+        self.macd: Optional[float] = None
+        self.signal: Optional[float] = None
+        self.histogram: Optional[float] = None
+
+    def update(self, price: float) -> Tuple[Optional[float], Optional[float], Optional[float]]:
+        """Adds a price and returns (macd, signal, histogram), or Nones during warm-up."""
+        if self._slow_ema.value is None:
+            self._seed.append(price)
+            if len(self._seed) < self.slow:
+                return None, None, None
+            for value in self._seed:
+                self._slow_ema.update(value)
+            for value in self._seed[-self.fast:]:
+                self._fast_ema.update(value)
+            self._seed = []
+        else:
+            self._fast_ema.update(price)
+            self._slow_ema.update(price)
+        macd = self._fast_ema.value - self._slow_ema.value
+        signal = self._signal_ema.update(macd)
+        if signal is None:
+            return None, None, None
+        self.macd, self.signal, self.histogram = macd, signal, macd - signal
+        return self.macd, self.signal, self.histogram
+
+
+class StreamingBollinger(Checkpointable):
+    """Bollinger bands over a rolling window with population standard deviation, as in TA-Lib.
+
+    The rolling mean and sum of squared deviations are updated in O(1)
+    with Welford's method and recomputed exactly each time the window
+    wraps.
+    """
+
+    def __init__(self, period: int = 20, num_std: float = 2.0):
+        self.period = period
+        self.num_std = num_std
+        self._values: List[float] = [0.0] * period
+        self._index = 0
+        self._count = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+        self.upper: Optional[float] = None
+        self.middle: Optional[float] = None
+        self.lower: Optional[float] = None
+
+    def update(self, price: float) -> Tuple[Optional[float], Optional[float], Optional[float]]:
+        """Adds a price and returns (upper, middle, lower), or Nones during warm-up."""
+        old = self._values[self._index]
+        self._values[self._index] = price
+        self._index += 1
+        if self._count < self.period:
+            self._count += 1
+            delta = price - self._mean
+            self._mean += delta / self._count
+            self._m2 += delta * (price - self._mean)
+        else:
+            mean = self._mean + (price - old) / self.period
+            self._m2 += (price - old) * (price - mean + old - self._mean)
+            self._mean = mean
+        if self._index == self.period:
+            self._index = 0
+            self._mean = math.fsum(self._values) / self.period
+            self._m2 = math.fsum((v - self._mean) ** 2 for v in self._values)
+        if self._count < self.period:
+            return None, None, None
+        std = math.sqrt(max(self._m2, 0.0) / self.period)
+        self.middle = self._mean
+        self.upper = self._mean + self.num_std * std
+        self.lower = self._mean - self.num_std * std
+        return self.upper, self.middle, self.lower
+
+
+class TechnicalIndicators(Checkpointable):
+    """RSI(14), MACD(12, 26, 9) and Bollinger(20, 2) updated together per price."""
+
+    def __init__(self, rsi_period: int = 14, macd_periods: Tuple[int, int, int] = (12, 26, 9),
+                 bb_period: int = 20, bb_std: float = 2.0):
+        self.rsi = StreamingRSI(rsi_period)
+        self.macd = StreamingMACD(*macd_periods)
+        self.bollinger = StreamingBollinger(bb_period, bb_std)
+
+    def update(self, price: float) -> Dict[str, Optional[float]]:
+        """Adds a price and returns the latest indicator values."""
+        self.rsi.update(price)
+        self.macd.update(price)
+        self.bollinger.update(price)
+        return self.values()
+
+    def warm_up(self, prices: Iterable[float]) -> Dict[str, Optional[float]]:
+        """Feeds historical prices, oldest first."""
+        for price in prices:
+            self.update(price)
+        return self.values()
+
+    def values(self) -> Dict[str, Optional[float]]:
+        """Returns the indicators in the format of `calculate_technical_indicators`."""
+        return {
+            "RSI": self.rsi.value,
+            "MACD": self.macd.macd,
+            "Signal": self.macd.signal,
+            "UpperBand": self.bollinger.upper,
+            "LowerBand": self.bollinger.lower,
+        }
+
+    def save(self, path: str) -> None:
+        """Writes a JSON checkpoint."""
+        with open(path, "w") as f:
+            json.dump(self.state_dict(), f)
+
+    def restore(self, path: str) -> None:
+        """Loads a JSON checkpoint written by `save`."""
+        with open(path) as f:
+            self.load_state_dict(json.load(f))
+
+
+# Unit tests
+def test_rolling_sma_matches_pandas():
+    """Test that the streaming SMA matches pandas rolling means."""
+    import numpy as np
+    import pandas as pd
+    prices = 50000 + np.random.default_rng(0).standard_normal(500).cumsum() * 100
+    expected = pd.Series(prices).rolling(20).mean()
+    sma = RollingSMA(20)
+    for i, price in enumerate(prices):
+        value = sma.update(price)
+        if i < 19:
+            assert value is None, "Average returned before the window filled."
+        else:
+            assert abs(value - expected[i]) < 1e-6, f"Average diverged at tick {i}."
+
+
+def test_crossover_warm_up():
+    """Test that warm-up and incremental updates agree."""
+    prices = [float(p) for p in range(100)]
+    warmed = MovingAverageCrossover(20, 50)
+    warmed.warm_up(prices[:60])
+    assert warmed.values() == (sum(prices[40:60]) / 20, sum(prices[10:60]) / 50), "Warm-up averages incorrect."
+    assert warmed.update(60.0) == (sum(prices[41:61]) / 20, sum(prices[11:61]) / 50), "Update incorrect."
+
+
+PARITY_FIXTURE = "fixtures/btcusdt_1h_closes.csv"  # Relative to this file: open_time_ms,close per line
+KLINES_URL = "https://api.binance.com/api/v3/klines"
+
+
+def record_parity_fixture(path: Optional[str] = None, symbol: str = "BTCUSDT", interval: str = "1h",
+                          limit: int = 3000) -> int:
+    """Records real exchange closes for `test_talib_parity`.
+
+    Run once with network access and commit the file:
+    `python -c "import streaming_indicators as s; s.record_parity_fixture()"`.
+
+    Returns:
+        int: Number of closes written.
+    """
+    import os
+    import urllib.parse
+    import urllib.request
+    path = path or os.path.join(os.path.dirname(os.path.abspath(__file__)), PARITY_FIXTURE)
+    klines: List[List[Any]] = []
+    end_time = None
+    while len(klines) < limit:
+        params = {"symbol": symbol, "interval": interval, "limit": min(1000, limit - len(klines))}
+        if end_time is not None:
+            params["endTime"] = end_time
+        with urllib.request.urlopen(f"{KLINES_URL}?{urllib.parse.urlencode(params)}", timeout=10) as response:
+            page = json.loads(response.read())
+        if not page:
+            break
+        klines = page + klines
+        end_time = page[0][0] - 1
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write("open_time_ms,close\n")
+        f.writelines(f"{k[0]},{k[4]}\n" for k in klines)
+    return len(klines)
+
+
+def _recorded_prices():
+    """Real closes from `PARITY_FIXTURE`; skips the calling test if it has not been recorded."""
+    import os
+    import numpy as np
+    import pytest
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), PARITY_FIXTURE)
+    if not os.path.exists(path):
+        pytest.skip(f"{PARITY_FIXTURE} not recorded; run record_parity_fixture() with network access.")
+    return np.loadtxt(path, delimiter=",", skiprows=1, usecols=1)
+
+
+def _random_walk_prices(n: int = 2000):
+    """Deterministic random-walk prices with flat stretches and jumps."""
+    import numpy as np
+    rng = np.random.default_rng(42)
+    steps = rng.standard_normal(n) * 25
+    steps[rng.random(n) < 0.1] = 0.0  # Unchanged prices
+    steps[rng.random(n) < 0.01] *= 20  # Jumps
+    return 50000 + steps.cumsum()
+
+
+def test_talib_parity():
+    """Test the streaming indicators against TA-Lib on recorded exchange closes."""
+    import numpy as np
+    import pytest
+    talib = pytest.importorskip("talib")
+    prices = _recorded_prices()
+    expected_rsi = talib.RSI(prices, timeperiod=14)
+    expected_macd, expected_signal, expected_hist = talib.MACD(prices, fastperiod=12, slowperiod=26, signalperiod=9)
+    expected_upper, expected_middle, expected_lower = talib.BBANDS(prices, timeperiod=20)
+
+    rsi, macd, bands = StreamingRSI(14), StreamingMACD(12, 26, 9), StreamingBollinger(20)
+    for i, price in enumerate(prices):
+        values = {"rsi": (rsi.update(price),), "macd": macd.update(price), "bands": bands.update(price)}
+        expected = {
+            "rsi": (expected_rsi[i],),
+            "macd": (expected_macd[i], expected_signal[i], expected_hist[i]),
+            "bands": (expected_upper[i], expected_middle[i], expected_lower[i]),
+        }
+        for name, got in values.items():
+            for value, reference in zip(got, expected[name]):
+                if np.isnan(reference):
+                    assert value is None, f"{name} produced a value during warm-up at tick {i}."
+                else:
+                    assert value is not None and abs(value - reference) <= 1e-6 * max(1.0, abs(reference)), \
+                        f"{name} differs from TA-Lib at tick {i}: {value} != {reference}."
+
+
+def test_checkpoint_round_trip(tmp_path):
+    """Test that a restored checkpoint continues exactly like the original."""
+    prices = _random_walk_prices(300).tolist()
+    original = TechnicalIndicators()
+    original.warm_up(prices[:150])
+    path = str(tmp_path / "indicators.json")
+    original.save(path)
+    restored = TechnicalIndicators()
+    restored.restore(path)
+    for price in prices[150:]:
+        assert restored.update(price) == original.update(price), "Restored indicators diverged."
+
+
+if __name__ == "__main__":
+    test_rolling_sma_matches_pandas()
+    test_crossover_warm_up()
+    test_talib_parity()
+    import tempfile
+    import pathlib
+    with tempfile.TemporaryDirectory() as directory:
+        test_checkpoint_round_trip(pathlib.Path(directory))
+    print("All tests passed.")
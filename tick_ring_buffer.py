@@ -0,0 +1,163 @@
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+FIELDS = ("timestamp", "price", "volume", "symbol_id")
+
+
+class TickRingBuffer:
+    """Fixed-capacity tick buffer backed by preallocated NumPy arrays.
+
+    Timestamps, prices, volumes and symbol ids are stored as separate arrays
+    (struct of arrays). Every tick is written twice, at `i` and
+    `i + capacity`, so the newest `n` ticks always form one contiguous slice
+    and `window` can return views without copying or reassembling the wrap.
+
+    There is a single writer at a time (`append` is serialized by the
+    caller or by `lock`). Readers never take that lock: `snapshot` uses a
+    sequence counter that the writer makes odd while it is writing, and
+    retries if the counter moved during the copy.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.timestamp = np.zeros(2 * capacity, dtype=np.float64)
+        self.price = np.zeros(2 * capacity, dtype=np.float64)
+        self.volume = np.zeros(2 * capacity, dtype=np.float64)
+        self.symbol_id = np.zeros(2 * capacity, dtype=np.int32)
+        self.symbols: List[str] = []
+        self._symbol_ids: Dict[str, int] = {}
+        self.count = 0  # Ticks appended since creation
+        self._seq = 0
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return min(self.count, self.capacity)
+
+    def symbol_index(self, symbol: str) -> int:
+        """Returns the id of a symbol, registering it if it is new."""
+        symbol_id = self._symbol_ids.get(symbol)
+        if symbol_id is None:
+            symbol_id = len(self.symbols)
+            self.symbols.append(symbol)
+            self._symbol_ids[symbol] = symbol_id
+        return symbol_id
+
+    def append(self, timestamp: float, price: float, volume: float, symbol: str) -> None:
+        """Appends one tick, overwriting the oldest once the buffer is full."""
+        symbol_id = self.symbol_index(symbol)
+        i = self.count % self.capacity
+        j = i + self.capacity
+        self._seq += 1  # Odd: write in progress
+        self.timestamp[i] = self.timestamp[j] = timestamp
+        self.price[i] = self.price[j] = price
+        self.volume[i] = self.volume[j] = volume
+        self.symbol_id[i] = self.symbol_id[j] = symbol_id
+        self.count += 1
+        self._seq += 1
+
+    def _bounds(self, n: Optional[int]) -> slice:
+        size = len(self)
+        n = size if n is None else min(n, size)
+        end = self.count % self.capacity + self.capacity if self.count >= self.capacity else self.count
+        return slice(end - n, end)
+
+    def window(self, n: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Returns the newest `n` ticks as zero-copy views, oldest first.
+
+        The views are not protected against concurrent writes. The newest
+        `n` ticks stay intact for the next `capacity - n` appends, so readers
+        that need a stable copy across a burst should use `snapshot`.
+
+        Args:
+            n (int, optional): Number of ticks. Defaults to every buffered tick.
+
+        Returns:
+            Dict[str, np.ndarray]: Views keyed by field name.
+        """
+        bounds = self._bounds(n)
+        return {field: getattr(self, field)[bounds] for field in FIELDS}
+
+    def snapshot(self, n: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Returns a consistent copy of the newest `n` ticks without blocking the writer.
+
+        Args:
+            n (int, optional): Number of ticks. Defaults to every buffered tick.
+
+        Returns:
+            Dict[str, np.ndarray]: Copies keyed by field name, oldest first.
+        """
+        attempts = 0
+        while True:
+            seq = self._seq
+            if seq % 2 == 0:
+                bounds = self._bounds(n)
+                copy = {field: getattr(self, field)[bounds].copy() for field in FIELDS}
+                if self._seq == seq:
+                    return copy
+            attempts += 1
+            if attempts % 64 == 0:
+                time.sleep(0)  # Let the writer finish
+
+    def to_records(self, n: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Returns a consistent snapshot as a list of tick dicts, oldest first."""
+        data = self.snapshot(n)
+        symbols = self.symbols
+        return [{"timestamp": t, "price": p, "volume": v, "symbol": symbols[s]}
+                for t, p, v, s in zip(data["timestamp"].tolist(), data["price"].tolist(),
+                                      data["volume"].tolist(), data["symbol_id"].tolist())]
+
+    def symbol_snapshot(self, symbol: str, n: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Returns the buffered ticks of one symbol among the newest `n`."""
+        data = self.snapshot(n)
+        symbol_id = self._symbol_ids.get(symbol, -1)
+        mask = data["symbol_id"] == symbol_id
+        return {field: values[mask] for field, values in data.items()}
+
+
+# Unit tests
+def test_overflow_and_window():
+    """Test append order, overwrite of the oldest ticks and contiguous views."""
+    buffer = TickRingBuffer(4)
+    for i in range(6):
+        buffer.append(float(i), float(10 + i), 1.0, "BTCUSD" if i % 2 else "ETHUSD")
+    assert len(buffer) == 4, "Capacity not enforced."
+    window = buffer.window()
+    assert window["price"].tolist() == [12.0, 13.0, 14.0, 15.0], "Oldest ticks not discarded in order."
+    assert np.shares_memory(window["price"], buffer.price), "Window copied the data."
+    assert buffer.window(2)["timestamp"].tolist() == [4.0, 5.0], "Partial window incorrect."
+    records = buffer.to_records(1)
+    assert records == [{"timestamp": 5.0, "price": 15.0, "volume": 1.0, "symbol": "BTCUSD"}], "Records incorrect."
+    assert buffer.symbol_snapshot("ETHUSD")["price"].tolist() == [12.0, 14.0], "Symbol filter incorrect."
+
+
+def test_snapshot_consistent_under_writes():
+    """Test that snapshots taken during concurrent appends are never torn."""
+    buffer = TickRingBuffer(1000)
+    stop = threading.Event()
+
+    def write():
+        i = 0
+        while not stop.is_set():
+            buffer.append(float(i), float(i), float(i), "BTCUSD")
+            i += 1
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    try:
+        for _ in range(200):
+            data = buffer.snapshot()
+            ts = data["timestamp"]
+            assert np.array_equal(ts, data["price"]), "Snapshot fields from different ticks."
+            assert len(ts) < 2 or np.all(np.diff(ts) == 1), "Snapshot is torn."
+    finally:
+        stop.set()
+        writer.join()
+
+
+if __name__ == "__main__":
+    test_overflow_and_window()
+    test_snapshot_consistent_under_writes()
+    print("All tests passed.")
@@ -0,0 +1,260 @@
+import json
+import os
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+# One fixed-width record per tick; the data file is a bare array of these.
+TICK_DTYPE = np.dtype([("ts", "<i8"), ("price", "<f8"), ("volume", "<f8"), ("symbol_id", "<u4")])
+FORMAT_VERSION = 1
+BLOCK_SIZE = 65536
+
+
+def _index_path(path: str) -> str:
+    return path + ".idx.json"
+
+
+def _read_index(path: str) -> Dict[str, Any]:
+    with open(_index_path(path)) as f:
+        index = json.load(f)
+    if index["version"] != FORMAT_VERSION:
+        raise ValueError(f"Unsupported tick store version: {index['version']}")
+    return index
+
+
+class TickStoreWriter:
+    """Appends ticks to a fixed-width binary file with a JSON sidecar index.
+
+    Ticks must be appended in non-decreasing `ts` order across all symbols.
+    The sidecar records the committed tick count, the symbol table and the
+    first timestamp of every `block_size` ticks. It is replaced atomically on
+    `flush`, so readers never see a partially written tail.
+    """
+
+    def __init__(self, path: str, block_size: int = BLOCK_SIZE):
+        self.path = path
+        if os.path.exists(_index_path(path)):
+            index = _read_index(path)
+        else:
+            index = {"version": FORMAT_VERSION, "count": 0, "block_size": block_size,
+                     "symbols": [], "blocks": [], "last_ts": None}
+        self.index = index
+        self._symbol_ids = {symbol: i for i, symbol in enumerate(index["symbols"])}
+        self._pending: List[np.ndarray] = []
+        self._last_ts = index["last_ts"]
+        # Drop records written after the last committed flush.
+        with open(path, "ab") as f:
+            f.truncate(index["count"] * TICK_DTYPE.itemsize)
+
+    def symbol_id(self, symbol: str) -> int:
+        """Returns the id of a symbol, registering it if it is new."""
+        symbol_id = self._symbol_ids.get(symbol)
+        if symbol_id is None:
+            symbol_id = len(self.index["symbols"])
+            self.index["symbols"].append(symbol)
+            self._symbol_ids[symbol] = symbol_id
+        return symbol_id
+
+    def append(self, symbol: str, ts: int, price: float, volume: float) -> None:
+        """Appends one tick."""
+        self.append_many(symbol, [ts], [price], [volume])
+
+    def append_many(self, symbols: Union[str, Sequence[str]], ts: Sequence[int],
+                    prices: Sequence[float], volumes: Sequence[float]) -> None:
+        """Appends a batch of ticks.
+
+        Args:
+            symbols (Union[str, Sequence[str]]): One symbol for the whole
+                batch, or one symbol per tick.
+            ts (Sequence[int]): Epoch-nanosecond timestamps, non-decreasing.
+            prices (Sequence[float]): Trade prices.
+            volumes (Sequence[float]): Trade volumes.
+        """
+        records = np.empty(len(ts), dtype=TICK_DTYPE)
+        records["ts"] = ts
+        records["price"] = prices
+        records["volume"] = volumes
+        if isinstance(symbols, str):
+            records["symbol_id"] = self.symbol_id(symbols)
+        else:
+            records["symbol_id"] = [self.symbol_id(symbol) for symbol in symbols]
+        if len(records) == 0:
+            return
+        if np.any(np.diff(records["ts"]) < 0) or (self._last_ts is not None and records["ts"][0] < self._last_ts):
+            raise ValueError("Ticks must be appended in non-decreasing timestamp order.")
+        self._last_ts = int(records["ts"][-1])
+        self._pending.append(records)
+
+    def flush(self) -> None:
+        """Writes pending ticks, fsyncs them and commits the sidecar index."""
+        if not self._pending:
+            return
+        records = np.concatenate(self._pending)
+        start = self.index["count"]
+        with open(self.path, "ab") as f:
+            records.tofile(f)
+            f.flush()
+            os.fsync(f.fileno())
+
+        block_size = self.index["block_size"]
+        first_block = -(-start // block_size)
+        for offset in range(first_block * block_size - start, len(records), block_size):
+            self.index["blocks"].append(int(records["ts"][offset]))
+        self.index["count"] = start + len(records)
+        self.index["last_ts"] = self._last_ts
+        tmp_path = _index_path(self.path) + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.index, f)
+        os.replace(tmp_path, _index_path(self.path))
+        self._pending = []
+
+    def close(self) -> None:
+        """Flushes pending ticks."""
+        self.flush()
+
+    def __enter__(self) -> "TickStoreWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class TickStoreReader:
+    """Read-only, memory-mapped view of a tick store.
+
+    Time slices are views into the mapped file, so nothing is copied until
+    the caller touches the values, and worker processes opening the same
+    file share its pages through the OS page cache. Pickling a reader only
+    sends the path; the copy re-maps the file on the other side.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.refresh()
+
+    def refresh(self) -> None:
+        """Re-reads the sidecar index to pick up ticks appended since opening."""
+        index = _read_index(self.path)
+        self.symbols: List[str] = index["symbols"]
+        self._symbol_ids = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.block_size = index["block_size"]
+        self._blocks = np.asarray(index["blocks"], dtype=np.int64)
+        if index["count"]:
+            self.ticks = np.memmap(self.path, dtype=TICK_DTYPE, mode="r", shape=(index["count"],))
+        else:
+            self.ticks = np.empty(0, dtype=TICK_DTYPE)
+
+    def __len__(self) -> int:
+        return len(self.ticks)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {"path": self.path}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.path = state["path"]
+        self.refresh()
+
+    def _lower_bound(self, ts: int) -> int:
+        # The block index narrows the binary search to a single block, so
+        # only that block's pages are touched.
+        block = int(np.searchsorted(self._blocks, ts, side="left"))
+        lo = (block - 1) * self.block_size if block > 0 else 0
+        hi = min(block * self.block_size, len(self.ticks))
+        return lo + int(np.searchsorted(self.ticks["ts"][lo:hi], ts, side="left"))
+
+    def time_slice(self, start_ns: Optional[int] = None, end_ns: Optional[int] = None) -> np.ndarray:
+        """Returns ticks with start_ns <= ts < end_ns as a zero-copy view.
+
+        Args:
+            start_ns (int, optional): Inclusive lower bound in epoch nanoseconds.
+            end_ns (int, optional): Exclusive upper bound in epoch nanoseconds.
+
+        Returns:
+            np.ndarray: Structured array view with `TICK_DTYPE` fields.
+        """
+        lo = self._lower_bound(start_ns) if start_ns is not None else 0
+        hi = self._lower_bound(end_ns) if end_ns is not None else len(self.ticks)
+        return self.ticks[lo:max(lo, hi)]
+
+    def symbol_ticks(self, symbol: str, start_ns: Optional[int] = None,
+                     end_ns: Optional[int] = None) -> np.ndarray:
+        """Returns one symbol's ticks in a time range.
+
+        Ticks of different symbols are interleaved in the file, so this
+        copies the matching rows of the window.
+        """
+        window = self.time_slice(start_ns, end_ns)
+        symbol_id = self._symbol_ids.get(symbol)
+        if symbol_id is None:
+            return np.empty(0, dtype=TICK_DTYPE)
+        return window[window["symbol_id"] == symbol_id]
+
+    def to_frame(self, symbol: Optional[str] = None, start_ns: Optional[int] = None,
+                 end_ns: Optional[int] = None) -> pd.DataFrame:
+        """Returns a window as a DataFrame with `timestamp`, `close`, `volume` and `symbol` columns."""
+        ticks = self.symbol_ticks(symbol, start_ns, end_ns) if symbol else self.time_slice(start_ns, end_ns)
+        return pd.DataFrame({
+            "timestamp": pd.to_datetime(ticks["ts"], unit="ns"),
+            "close": ticks["price"],
+            "volume": ticks["volume"],
+            "symbol": pd.Categorical.from_codes(ticks["symbol_id"].astype(np.int32), categories=self.symbols)
+            if self.symbols else pd.Categorical([]),
+        })
+
+
+# Unit tests
+def _write_sample(path: str, n: int = 1000, block_size: int = 64) -> None:
+    with TickStoreWriter(path, block_size=block_size) as writer:
+        ts = np.arange(n, dtype=np.int64) * 1_000_000_000
+        symbols = ["BTC/USD" if i % 2 == 0 else "ETH/USD" for i in range(n)]
+        writer.append_many(symbols, ts, np.arange(n, dtype=np.float64), np.ones(n))
+
+
+def test_time_slice_is_zero_copy(tmp_path):
+    """Test that time slices are views of the memory map with correct bounds."""
+    path = str(tmp_path / "ticks.bin")
+    _write_sample(path)
+    reader = TickStoreReader(path)
+    assert len(reader) == 1000, "Unexpected tick count."
+    window = reader.time_slice(100 * 1_000_000_000, 300 * 1_000_000_000)
+    assert window["price"][0] == 100.0 and window["price"][-1] == 299.0, "Slice bounds incorrect."
+    assert np.shares_memory(window, reader.ticks), "Slice copied the data."
+    for start, end in ((0, 1), (63, 65), (999, 2000), (-5, 0)):
+        expected = np.arange(1000)[(np.arange(1000) >= start) & (np.arange(1000) < end)]
+        got = reader.time_slice(start * 1_000_000_000, end * 1_000_000_000)["price"]
+        assert np.array_equal(got, expected), f"Slice [{start}, {end}) incorrect."
+    btc = reader.symbol_ticks("BTC/USD", 0, 10 * 1_000_000_000)
+    assert btc["price"].tolist() == [0.0, 2.0, 4.0, 6.0, 8.0], "Symbol filter incorrect."
+
+
+def test_reopen_append_and_pickle(tmp_path):
+    """Test appending after reopening, discarding an unflushed tail and pickling."""
+    import pickle
+    path = str(tmp_path / "ticks.bin")
+    _write_sample(path, n=10)
+    with open(path, "ab") as f:
+        f.write(b"\x00" * 7)  # Torn write from a crash after the last flush
+    writer = TickStoreWriter(path)
+    writer.append("SOL/USD", 10 * 1_000_000_000, 10.0, 2.0)
+    try:
+        writer.append("SOL/USD", 0, 1.0, 1.0)
+        assert False, "Out-of-order tick accepted."
+    except ValueError:
+        pass
+    writer.close()
+
+    reader = pickle.loads(pickle.dumps(TickStoreReader(path)))
+    assert len(reader) == 11, "Reopened store has the wrong length."
+    frame = reader.to_frame("SOL/USD")
+    assert frame["close"].tolist() == [10.0], "Appended tick not readable."
+    assert os.path.getsize(path) == 11 * TICK_DTYPE.itemsize, "Torn tail not truncated."
+
+
+if __name__ == "__main__":
+    import tempfile
+    import pathlib
+    for test in (test_time_slice_is_zero_copy, test_reopen_append_and_pickle):
+        with tempfile.TemporaryDirectory() as directory:
+            test(pathlib.Path(directory))
+    print("All tests passed.")
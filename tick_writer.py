@@ -0,0 +1,286 @@
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from storage import SQLiteStorage, now_ns
+
+_STOP = object()
+
+
+class TickWriter:
+    """Background writer that group-commits ticks to SQLite.
+
+    Producers call `submit` from any thread; a single writer thread collects
+    rows from a bounded queue and flushes them with `executemany` in a single
+    transaction, either when `batch_size` rows are pending or
+    `flush_interval_ms` after the first pending row, whichever comes first.
+    A batch that repeats a (symbol, ts) key is rewritten row by row with the
+    repeats moved to the next free nanosecond, counted in "key_conflicts".
+    """
+
+    def __init__(self, storage: SQLiteStorage, batch_size: int = 500,
+                 flush_interval_ms: float = 50.0, max_queue: int = 100000):
+        self.storage = storage
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000.0
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_queue)
+        self._submit_lock = threading.Lock()
+        self._durable = threading.Condition()
+        self._next_seq = 0
+        self._processed_seq = 0
+        self._failed: List[Tuple[int, int]] = []
+        self._thread: Optional[threading.Thread] = None
+        self.metrics = {
+            "flushes": 0,
+            "rows_written": 0,
+            "errors": 0,
+            "key_conflicts": 0,
+            "last_flush_ms": 0.0,
+            "avg_flush_ms": 0.0,
+            "max_flush_ms": 0.0,
+            "last_batch_size": 0,
+            "avg_batch_size": 0.0,
+            "max_batch_size": 0,
+            "max_queue_depth": 0,
+        }
+
+    def start(self) -> "TickWriter":
+        """Starts the writer thread.
+
+        Returns:
+            TickWriter: The writer itself, for chaining.
+        """
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="tick-writer", daemon=True)
+            self._thread.start()
+        return self
+
+    def submit(self, table: str, row: Sequence[Any]) -> int:
+        """Queues one row for writing.
+
+        Blocks while the queue is full, which pushes back on producers
+        instead of growing memory without bound.
+
+        Args:
+            table (str): Target table name.
+            row (Sequence[Any]): Row values in the table's column order.
+
+        Returns:
+            int: Sequence number to pass to `wait_durable`.
+        """
+        with self._submit_lock:
+            self._next_seq += 1
+            seq = self._next_seq
+            self._queue.put((seq, table, row))
+        depth = self._queue.qsize()
+        if depth > self.metrics["max_queue_depth"]:
+            self.metrics["max_queue_depth"] = depth
+        return seq
+
+    def wait_durable(self, seq: Optional[int] = None, timeout: Optional[float] = None) -> bool:
+        """Waits until a submitted row has been committed.
+
+        Args:
+            seq (int, optional): Sequence number from `submit`. Defaults to
+                every row submitted so far.
+            timeout (float, optional): Maximum seconds to wait.
+
+        Returns:
+            bool: True if the row was committed, False on timeout or if its
+            batch failed to write.
+        """
+        if seq is None:
+            seq = self._next_seq
+        with self._durable:
+            if not self._durable.wait_for(lambda: self._processed_seq >= seq, timeout):
+                return False
+            return not any(first <= seq <= last for first, last in self._failed)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Waits until every row submitted so far has been committed."""
+        return self.wait_durable(None, timeout)
+
+    def queue_depth(self) -> int:
+        """Returns the number of rows waiting to be written."""
+        return self._queue.qsize()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Returns flush latency, batch size and queue depth statistics.
+
+        Returns:
+            Dict[str, Any]: A copy of the writer metrics.
+        """
+        metrics = dict(self.metrics)
+        metrics["queue_depth"] = self._queue.qsize()
+        return metrics
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Drains the queue, writes every pending row and stops the thread.
+
+        Args:
+            timeout (float, optional): Maximum seconds to wait for the drain.
+        """
+        if self._thread is None:
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def __enter__(self) -> "TickWriter":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._write(batch)
+        # Rows submitted concurrently with close() are still written.
+        remaining = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                remaining.append(item)
+        for i in range(0, len(remaining), self.batch_size):
+            self._write(remaining[i:i + self.batch_size])
+        self.storage.release()
+
+    def _write(self, batch: List[Tuple[int, str, Sequence[Any]]]) -> None:
+        rows_by_table: Dict[str, List[Sequence[Any]]] = defaultdict(list)
+        for _, table, row in batch:
+            rows_by_table[table].append(row)
+        first_seq, last_seq = batch[0][0], batch[-1][0]
+
+        start = time.perf_counter()
+        try:
+            try:
+                self.storage.save_batch(rows_by_table)
+            except sqlite3.IntegrityError:
+                self.metrics["key_conflicts"] += self.storage.save_batch_nudged(rows_by_table)
+        except (sqlite3.Error, ValueError) as e:
+            logging.error(f"Error writing tick batch to database: {e}")
+            self.metrics["errors"] += 1
+            failed = (first_seq, last_seq)
+        else:
+            failed = None
+        elapsed_ms = (time.perf_counter() - start) * 1000.0
+
+        self._record(len(batch), elapsed_ms, failed is None)
+        with self._durable:
+            if failed is not None:
+                self._failed.append(failed)
+            self._processed_seq = last_seq
+            self._durable.notify_all()
+
+    def _record(self, batch_size: int, elapsed_ms: float, ok: bool) -> None:
+        m = self.metrics
+        m["flushes"] += 1
+        if ok:
+            m["rows_written"] += batch_size
+        m["last_flush_ms"] = elapsed_ms
+        m["avg_flush_ms"] += (elapsed_ms - m["avg_flush_ms"]) / m["flushes"]
+        m["max_flush_ms"] = max(m["max_flush_ms"], elapsed_ms)
+        m["last_batch_size"] = batch_size
+        m["avg_batch_size"] += (batch_size - m["avg_batch_size"]) / m["flushes"]
+        m["max_batch_size"] = max(m["max_batch_size"], batch_size)
+
+
+# Unit tests
+def test_batches_by_size(tmp_path):
+    """Test that a burst is written in batches of at most `batch_size` rows."""
+    storage = SQLiteStorage(str(tmp_path / "ticks.db"))
+    storage.initialize(["market_data"])
+    writer = TickWriter(storage, batch_size=100, flush_interval_ms=1000).start()
+    for i in range(1000):
+        writer.submit("market_data", ("BTC/USD", now_ns(), "test_exchange", 50000.0 + i, 1.0))
+    assert writer.flush(timeout=5), "Flush did not complete."
+    metrics = writer.get_metrics()
+    assert metrics["rows_written"] == 1000, "Rows were lost."
+    assert metrics["max_batch_size"] <= 100, "Batch size limit not respected."
+    assert storage.query_one("SELECT COUNT(*) FROM market_data") == (1000,), "Rows not committed."
+    writer.close()
+    storage.close()
+
+
+def test_flushes_on_interval(tmp_path):
+    """Test that a partial batch is flushed once the interval elapses."""
+    storage = SQLiteStorage(str(tmp_path / "ticks.db"))
+    storage.initialize(["price_data"])
+    writer = TickWriter(storage, batch_size=1000, flush_interval_ms=10).start()
+    seq = writer.submit("price_data", ("BTCUSDT", now_ns(), 50000.0))
+    assert writer.wait_durable(seq, timeout=1), "Partial batch was not flushed."
+    assert writer.get_metrics()["last_batch_size"] == 1, "Unexpected batch size."
+    writer.close()
+    storage.close()
+
+
+def test_close_drains_queue(tmp_path):
+    """Test that closing the writer commits every queued row."""
+    storage = SQLiteStorage(str(tmp_path / "ticks.db"))
+    storage.initialize(["price_data"])
+    writer = TickWriter(storage, batch_size=50, flush_interval_ms=1000).start()
+    for i in range(500):
+        writer.submit("price_data", ("BTCUSDT", now_ns(), float(i)))
+    writer.close()
+    assert storage.query_one("SELECT COUNT(*) FROM price_data") == (500,), "Queue not drained on close."
+    storage.close()
+
+
+def test_failed_batch_is_not_durable(tmp_path):
+    """Test that rows in a failed batch are reported as not durable."""
+    storage = SQLiteStorage(str(tmp_path / "ticks.db"))
+    writer = TickWriter(storage, batch_size=10, flush_interval_ms=1).start()
+    seq = writer.submit("price_data", ("BTCUSDT", now_ns(), 50000.0))  # Table was never created
+    assert not writer.wait_durable(seq, timeout=1), "Failed row reported as durable."
+    assert writer.get_metrics()["errors"] == 1, "Write error not counted."
+    writer.close()
+    storage.close()
+
+
+def test_duplicate_key_does_not_drop_batch(tmp_path):
+    """Test that a repeated (symbol, ts) mid-batch keeps every row and is counted."""
+    storage = SQLiteStorage(str(tmp_path / "ticks.db"))
+    storage.initialize(["price_data"])
+    writer = TickWriter(storage, batch_size=5, flush_interval_ms=1000).start()
+    ts = 1735689600000 * 1_000_000  # Millisecond exchange timestamps
+    for offset, price in ((0, 1.0), (1_000_000, 2.0), (1_000_000, 3.0), (1_000_001, 4.0), (2_000_000, 5.0)):
+        writer.submit("price_data", ("BTCUSDT", ts + offset, price))
+    assert writer.flush(timeout=5), "Batch with a repeated key failed."
+    rows = storage.query("SELECT ts - ?, price FROM price_data ORDER BY ts", (ts,))
+    assert rows == [(0, 1.0), (1_000_000, 2.0), (1_000_001, 3.0), (1_000_002, 4.0), (2_000_000, 5.0)], rows
+    assert writer.get_metrics()["key_conflicts"] == 2 and writer.get_metrics()["errors"] == 0
+    writer.close()
+    storage.close()
+
+
+if __name__ == "__main__":
+    import tempfile
+    import pathlib
+    for test in (test_batches_by_size, test_flushes_on_interval, test_close_drains_queue,
+                 test_failed_batch_is_not_durable, test_duplicate_key_does_not_drop_batch):
+        with tempfile.TemporaryDirectory() as directory:
+            test(pathlib.Path(directory))
+    print("All tests passed.")
@@ -9,7 +9,9 @@
 import logging\
 import sqlite3\
 from datetime import datetime\
-import requests\
+from price_client import get_client\
+from storage import get_storage, now_ns, to_epoch_ns\
+from tick_writer import TickWriter\
 \
 # Configure logging\
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')\
@@ -23,55 +25,36 @@ RATE_LIMIT = 60  # API requests per minute\
 # Database setup\
 def initialize_database():\
     """Create the database and table if not already present."""\
-    conn = sqlite3.connect(DB_NAME)\
-    cursor = conn.cursor()\
-    cursor.execute("""\
-        CREATE TABLE IF NOT EXISTS price_data (\
-            id INTEGER PRIMARY KEY AUTOINCREMENT,\
-            timestamp TEXT NOT NULL,\
-            price REAL NOT NULL\
-        )\
-    """)\
-    conn.commit()\
-    conn.close()\
+    get_storage(DB_NAME).initialize(["price_data"])\
 \
 # Fetch price data\
 def fetch_price():\
     """Fetch the current price of BTC/USDT from Binance."""\
-    try:\
-        response = requests.get(API_URL, params=\{"symbol": SYMBOL\})\
-        response.raise_for_status()\
-        data = response.json()\
-        price = float(data["price"])\
-        return price\
-    except requests.exceptions.RequestException as e:\
-        logging.error(f"Error fetching price data: \{e\}")\
-        return None\
+    return get_client(API_URL).get_price(SYMBOL)\
 \
 # Save to database\
 def save_to_database(timestamp, price):\
     """Save the price data to the local database."""\
     try:\
-        conn = sqlite3.connect(DB_NAME)\
-        cursor = conn.cursor()\
-        cursor.execute("INSERT INTO price_data (timestamp, price) VALUES (?, ?)", (timestamp, price))\
-        conn.commit()\
+        get_storage(DB_NAME).save("price_data", (SYMBOL, to_epoch_ns(timestamp), price))\
     except sqlite3.Error as e:\
         logging.error(f"Error saving data to database: \{e\}")\
-    finally:\
-        conn.close()\
 \
 # Main trading bot logic\
 def run_trading_bot():\
     """Run the trading bot to fetch and log price data."""\
     initialize_database()\
-    while True:\
-        price = fetch_price()\
-        if price is not None:\
-            timestamp = datetime.utcnow().isoformat()\
-            logging.info(f"Fetched price: \{price\} at \{timestamp\}")\
-            save_to_database(timestamp, price)\
-        time.sleep(60 / RATE_LIMIT)\
+    writer = TickWriter(get_storage(DB_NAME)).start()\
+    try:\
+        while True:\
+            price = fetch_price()\
+            if price is not None:\
+                timestamp = datetime.utcnow().isoformat()\
+                logging.info(f"Fetched price: \{price\} at \{timestamp\}")\
+                writer.submit("price_data", (SYMBOL, now_ns(), price))\
+            time.sleep(60 / RATE_LIMIT)\
+    finally:\
+        writer.close()\
 \
 if __name__ == "__main__":\
     run_trading_bot()\
@@ -0,0 +1,261 @@
+import inspect
+import itertools
+import logging
+import multiprocessing
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from indicator_cache import IndicatorCache
+from parallel_backtest import SharedFrame, attach_frame, score_strategy
+
+Fold = Tuple[int, Tuple[int, int], Tuple[int, int]]  # (fold, (train_start, train_end), (test_start, test_end))
+
+
+def make_folds(n_rows: int, train_size: int, test_size: int, step: Optional[int] = None,
+               anchored: bool = False) -> List[Fold]:
+    """Splits `n_rows` rows into walk-forward train/test folds.
+
+    Args:
+        n_rows (int): Number of rows of history.
+        train_size (int): Rows in each training window (the first one when anchored).
+        test_size (int): Rows in each test window, directly after its training window.
+        step (int, optional): Rows between fold starts. Defaults to `test_size`.
+        anchored (bool): Grow the training window from row 0 instead of rolling it.
+
+    Returns:
+        List[Fold]: Folds as (index, (train_start, train_end), (test_start, test_end)), end exclusive.
+    """
+    step = step or test_size
+    folds = []
+    start = 0
+    while start + train_size + test_size <= n_rows:
+        train = (0 if anchored else start, start + train_size)
+        folds.append((len(folds), train, (train[1], train[1] + test_size)))
+        start += step
+    return folds
+
+
+class FoldIndicatorCache:
+    """Indicator arrays computed once over the full history and sliced per fold.
+
+    Only trailing indicators are cached (a value at row t depends on rows up
+    to t), so slicing the full-history array gives each fold the same values
+    as recomputing on its window, minus the warm-up gap at the window start.
+    Arrays live in an LRU `indicator_cache.IndicatorCache`, so the memory
+    budget applies across folds.
+    """
+
+    def __init__(self, data: pd.DataFrame, cache: Optional[IndicatorCache] = None):
+        self.data = data
+        self.cache = cache if cache is not None else IndicatorCache()
+        self._data_key = ("walk_forward_history", id(self))
+
+    @property
+    def hits(self) -> int:
+        return self.cache.hits
+
+    @property
+    def misses(self) -> int:
+        return self.cache.misses
+
+    def get(self, key: Tuple[Any, ...], compute: Callable[[], Any]) -> np.ndarray:
+        """Returns the full-history array for `key`, computing it on first use."""
+        return self.cache.get_or_compute(key[0], key[1:], None, lambda: np.asarray(compute(), dtype=np.float64),
+                                         data_key=self._data_key)
+
+    def view(self, start: int, end: int) -> "IndicatorView":
+        """Returns the indicators of rows [start, end)."""
+        return IndicatorView(self, start, end)
+
+
+class IndicatorView:
+    """Indicators for one window of rows, passed to strategies as `indicators=`."""
+
+    def __init__(self, cache: FoldIndicatorCache, start: int, end: int):
+        self.cache = cache
+        self.start = start
+        self.end = end
+
+    def _series(self, values: np.ndarray) -> pd.Series:
+        return pd.Series(values[self.start:self.end], index=self.cache.data.index[self.start:self.end])
+
+    def rolling_mean(self, column: str, window: int) -> pd.Series:
+        """Trailing mean of `column` over `window` rows."""
+        return self._series(self.cache.get(("rolling_mean", column, window),
+                                           lambda: self.cache.data[column].rolling(window).mean()))
+
+    def rolling_std(self, column: str, window: int) -> pd.Series:
+        """Trailing standard deviation of `column` over `window` rows."""
+        return self._series(self.cache.get(("rolling_std", column, window),
+                                           lambda: self.cache.data[column].rolling(window).std()))
+
+    def ewm_mean(self, column: str, span: int) -> pd.Series:
+        """Exponential moving average of `column` with the given span."""
+        return self._series(self.cache.get(("ewm_mean", column, span),
+                                           lambda: self.cache.data[column].ewm(span=span, adjust=False).mean()))
+
+    def compute(self, name: str, func: Callable[[pd.DataFrame], Any], *key: Any) -> pd.Series:
+        """Any other trailing indicator: `func(full_data)` cached under (name, *key)."""
+        return self._series(self.cache.get((name,) + key, lambda: func(self.cache.data)))
+
+
+def _accepts_indicators(strategy_func: Callable) -> bool:
+    try:
+        return "indicators" in inspect.signature(strategy_func).parameters
+    except (TypeError, ValueError):
+        return False
+
+
+def run_fold(data: pd.DataFrame, strategy_func: Callable, param_sets: Sequence[Dict[str, Any]], fold: Fold,
+             cache: Optional[FoldIndicatorCache] = None) -> Dict[str, Any]:
+    """Optimizes on a fold's training window and scores the best parameters on its test window.
+
+    Args:
+        data (pd.DataFrame): Full history with a 'close' column.
+        strategy_func (Callable): Strategy; if it accepts `indicators`, it gets
+            an `IndicatorView` for the window being scored.
+        param_sets (Sequence[Dict[str, Any]]): Parameter sets to try.
+        fold (Fold): Fold from `make_folds`.
+        cache (FoldIndicatorCache, optional): Cache over `data` shared across folds.
+
+    Returns:
+        Dict[str, Any]: Fold bounds, best params, train and test scores.
+    """
+    index, (train_start, train_end), (test_start, test_end) = fold
+
+    def score(params, start, end):
+        if cache is not None:
+            params = dict(params, indicators=cache.view(start, end))
+        return score_strategy(data.iloc[start:end], strategy_func, params)
+
+    best_params, best_score = None, -np.inf
+    for params in param_sets:
+        try:
+            performance = score(params, train_start, train_end)
+        except Exception as e:
+            logging.warning(f"Fold {index}: trial {params} failed: {type(e).__name__}: {e}")
+            continue
+        if performance > best_score:
+            best_params, best_score = params, performance
+    test_score = score(best_params, test_start, test_end) if best_params is not None else np.nan
+    return {"fold": index, "train_start": train_start, "train_end": train_end, "test_start": test_start,
+            "test_end": test_end, "params": best_params, "train_score": best_score, "test_score": test_score}
+
+
+_worker: Dict[str, Any] = {}
+
+
+def _init_worker(descriptor: Dict[str, Any], strategy_func: Callable, param_sets: List[Dict[str, Any]],
+                 use_cache: bool) -> None:
+    _worker["data"] = data = attach_frame(descriptor)
+    _worker["strategy"] = strategy_func
+    _worker["param_sets"] = param_sets
+    _worker["cache"] = FoldIndicatorCache(data) if use_cache else None
+
+
+def _run_worker_fold(fold: Fold) -> Dict[str, Any]:
+    cache = _worker["cache"]
+    before = (cache.hits, cache.misses) if cache else (0, 0)
+    result = run_fold(_worker["data"], _worker["strategy"], _worker["param_sets"], fold, cache)
+    if cache:
+        result["cache_hits"], result["cache_misses"] = cache.hits - before[0], cache.misses - before[1]
+    return result
+
+
+def walk_forward(data: pd.DataFrame, strategy_func: Callable, param_grid: Dict[str, Sequence[Any]],
+                 train_size: int, test_size: int, step: Optional[int] = None, anchored: bool = False,
+                 processes: int = 1, use_cache: Optional[bool] = None,
+                 mp_context: Optional[str] = None) -> Dict[str, Any]:
+    """Walk-forward optimization: optimize on each training window, score out of sample on the next.
+
+    Folds run on a process pool sharing the data through a `SharedFrame`.
+    Each worker keeps one `FoldIndicatorCache` for every fold it runs, so
+    indicators for overlapping windows are computed once per worker rather
+    than once per fold and trial.
+
+    Args:
+        data (pd.DataFrame): History with a 'close' column.
+        strategy_func (Callable): Picklable strategy function.
+        param_grid (Dict[str, Sequence[Any]]): Parameter values to search per fold.
+        train_size (int): Rows per training window.
+        test_size (int): Rows per test window.
+        step (int, optional): Rows between folds. Defaults to `test_size`.
+        anchored (bool): Grow training windows from the first row.
+        processes (int): Worker processes; 1 runs in this process.
+        use_cache (bool, optional): Pass cached indicators to the strategy.
+            Defaults to whether `strategy_func` accepts `indicators`.
+        mp_context (str, optional): Multiprocessing start method.
+
+    Returns:
+        Dict[str, Any]: The per-fold "results" table, the mean and total
+            out-of-sample "test_score", and cache statistics.
+    """
+    folds = make_folds(len(data), train_size, test_size, step, anchored)
+    if not folds:
+        raise ValueError("History is too short for one train/test fold.")
+    keys = list(param_grid)
+    param_sets = [dict(zip(keys, values)) for values in itertools.product(*param_grid.values())]
+    if use_cache is None:
+        use_cache = _accepts_indicators(strategy_func)
+    start = time.perf_counter()
+    if processes <= 1:
+        cache = FoldIndicatorCache(data) if use_cache else None
+        rows = [run_fold(data, strategy_func, param_sets, fold, cache) for fold in folds]
+        hits, misses = (cache.hits, cache.misses) if cache else (0, 0)
+    else:
+        context = multiprocessing.get_context(mp_context)
+        with SharedFrame(data) as shared:
+            with context.Pool(min(processes, len(folds)), initializer=_init_worker,
+                              initargs=(shared.descriptor, strategy_func, param_sets, use_cache)) as pool:
+                rows = sorted(pool.imap_unordered(_run_worker_fold, folds), key=lambda row: row["fold"])
+        hits = sum(row.pop("cache_hits", 0) for row in rows)
+        misses = sum(row.pop("cache_misses", 0) for row in rows)
+    table = pd.DataFrame(rows)
+    return {"results": table, "test_score": table["test_score"].mean(),
+            "total_test_score": table["test_score"].sum(), "folds": len(folds),
+            "cache_hits": hits, "cache_misses": misses, "elapsed_s": time.perf_counter() - start}
+
+
+# Unit tests
+def _crossover(data, fast, slow, indicators=None):
+    """Long when the fast mean of close is above the slow mean."""
+    if indicators is not None:
+        fast_ma, slow_ma = indicators.rolling_mean("close", fast), indicators.rolling_mean("close", slow)
+    else:
+        fast_ma, slow_ma = data["close"].rolling(fast).mean(), data["close"].rolling(slow).mean()
+    return (fast_ma > slow_ma).astype(float)
+
+
+def _test_data(n=2000):
+    rng = np.random.default_rng(11)
+    return pd.DataFrame({"close": 100 + rng.standard_normal(n).cumsum()},
+                        index=pd.date_range("2023-01-01", periods=n, freq="h"))
+
+
+def test_folds():
+    """Test rolling and anchored fold boundaries."""
+    assert make_folds(10, 4, 2) == [(0, (0, 4), (4, 6)), (1, (2, 6), (6, 8)), (2, (4, 8), (8, 10))]
+    assert [f[1] for f in make_folds(10, 4, 3, anchored=True)] == [(0, 4), (0, 7)], "Anchored folds incorrect."
+
+
+def test_walk_forward_cache_and_parallel():
+    """Test that cached, uncached and parallel runs pick the same params and reuse indicators."""
+    data = _test_data()
+    grid = {"fast": [5, 10, 20], "slow": [50, 100]}
+    cached = walk_forward(data, _crossover, grid, train_size=600, test_size=200)
+    assert cached["folds"] == 7 and cached["cache_misses"] == 5, "Indicators not computed once per key."
+    assert cached["cache_hits"] > 5 * cached["folds"], "Indicators not reused across folds."
+    parallel = walk_forward(data, _crossover, grid, train_size=600, test_size=200, processes=2)
+    assert parallel["results"]["params"].tolist() == cached["results"]["params"].tolist(), "Parallel folds differ."
+    assert np.allclose(parallel["results"]["test_score"], cached["results"]["test_score"]), "Parallel scores differ."
+    uncached = walk_forward(data, _crossover, grid, train_size=600, test_size=200, use_cache=False)
+    assert uncached["cache_misses"] == 0 and len(uncached["results"]) == 7, "Uncached run incomplete."
+
+
+if __name__ == "__main__":
+    test_folds()
+    test_walk_forward_cache_and_parallel()
+    print("All tests passed.")